@@ -0,0 +1,281 @@
+"""
+Admin helpers for large tables.
+
+``PerformanceModelAdmin`` is a drop-in base class for ``ModelAdmin`` that keeps
+the changelist usable on tables with millions of rows:
+
+- row counts come from table statistics or a short-lived cache instead of
+  running ``SELECT COUNT(*)`` (twice) on every page view;
+- changelists ordered by primary key are paged with a keyset cursor
+  (``WHERE pk < last_seen``) instead of ``OFFSET``;
+- ``list_select_related`` is derived from the foreign keys in
+  ``list_display``;
+- large text/binary/JSON columns that are not displayed are deferred.
+
+Usage::
+
+    from app.admin import PerformanceModelAdmin
+
+    @admin.register(Event)
+    class EventAdmin(PerformanceModelAdmin):
+        list_display = ("id", "user", "created_at")
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.utils.functional import cached_property
+
+# Query string parameter holding the keyset cursor (last primary key seen).
+CURSOR_VAR = "cursor"
+
+# Column types considered "heavy" and deferred when not shown in the list.
+HEAVY_FIELD_TYPES = (models.TextField, models.BinaryField, models.JSONField)
+
+
+def table_row_estimate(model, using="default"):
+    """
+    Return the planner's row estimate for ``model``'s table, or ``None``.
+
+    PostgreSQL reads ``pg_class.reltuples`` and MySQL reads
+    ``information_schema.TABLES``; both are O(1) and may lag behind the real
+    count until the next ANALYZE. Other backends have no cheap estimate.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                [connection.ops.quote_name(table)],
+            )
+        elif connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+
+    # PostgreSQL reports -1 for tables that have never been analyzed.
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def cached_count(queryset, timeout=None):
+    """
+    Return ``queryset.count()``, cached by the SQL it would run.
+
+    Identical changelist views (same filters and search) share one COUNT for
+    ``ADMIN_COUNT_CACHE_TIMEOUT`` seconds.
+    """
+    if timeout is None:
+        timeout = getattr(settings, "ADMIN_COUNT_CACHE_TIMEOUT", 60)
+
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+
+    digest = hashlib.sha256(f"{queryset.db}:{sql}:{params!r}".encode()).hexdigest()
+    return cache.get_or_set(f"admin:count:{digest}", queryset.count, timeout)
+
+
+def estimated_count(queryset, threshold=None):
+    """
+    Return a cheap row count for ``queryset``.
+
+    Unfiltered querysets on large tables use the database's table statistics.
+    Small tables, filtered querysets and backends without statistics fall
+    back to :func:`cached_count`, so the figure is exact but possibly a few
+    seconds old.
+    """
+    if threshold is None:
+        threshold = getattr(settings, "ADMIN_ESTIMATED_COUNT_THRESHOLD", 100_000)
+
+    if not queryset.query.where and not queryset.query.distinct:
+        estimate = table_row_estimate(queryset.model, using=queryset.db)
+        if estimate is not None and estimate >= threshold:
+            return estimate
+
+    return cached_count(queryset)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that counts with :func:`estimated_count`.
+
+    Pages past the first use a late row lookup: the OFFSET scan only reads
+    primary keys, and full rows are then fetched for that page alone.
+    """
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, models.QuerySet):
+            return estimated_count(self.object_list)
+        return super().count
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if number == 1 or not isinstance(self.object_list, models.QuerySet):
+            return super().page(number)
+
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        pks = list(self.object_list.values_list("pk", flat=True)[bottom:top])
+        return self._get_page(self.object_list.filter(pk__in=pks), number, self)
+
+
+class PerformanceChangeList(ChangeList):
+    """
+    ChangeList with keyset pagination and deferred heavy columns.
+
+    Keyset mode is used whenever the effective ordering is the primary key
+    alone (the admin default when no ordering is declared). Other orderings
+    fall back to page numbers through :class:`EstimatedCountPaginator`.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        # get_results() runs inside ChangeList.__init__, so the cursor has
+        # to be known before delegating.
+        self.cursor = request.GET.get(CURSOR_VAR) or None
+        self.keyset = False
+        self.next_cursor = None
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Sorting, filtering and searching always restart from the first page.
+        remove = [*(remove or ()), CURSOR_VAR]
+        return super().get_query_string(new_params, remove)
+
+    def get_queryset(self, request, exclude_parameters=None):
+        qs = super().get_queryset(request, exclude_parameters)
+        deferred = self.model_admin.get_list_deferred_fields(request)
+        if deferred:
+            qs = qs.defer(*deferred)
+        return qs
+
+    def get_keyset_direction(self):
+        """Return ``"asc"``/``"desc"`` for a primary key ordering, else ``None``."""
+        pk = self.lookup_opts.pk
+        pk_names = {"pk", pk.name, pk.attname}
+        directions = set()
+        for term in self.queryset.query.order_by:
+            # ChangeList may repeat the tie-breaking pk term.
+            if not isinstance(term, str) or term.lstrip("-") not in pk_names:
+                return None
+            directions.add("desc" if term.startswith("-") else "asc")
+        return directions.pop() if len(directions) == 1 else None
+
+    def get_results(self, request):
+        direction = None if self.show_all else self.get_keyset_direction()
+        if direction is None:
+            return super().get_results(request)
+
+        qs = self.queryset
+        if self.cursor is not None:
+            try:
+                cursor = self.lookup_opts.pk.to_python(self.cursor)
+            except ValidationError:
+                cursor = None
+            if cursor is not None:
+                lookup = "pk__lt" if direction == "desc" else "pk__gt"
+                qs = qs.filter(**{lookup: cursor})
+
+        # Read one extra key to know whether a next page exists. The page
+        # itself stays a queryset because list_editable formsets need one.
+        pks = list(qs.values_list("pk", flat=True)[: self.list_per_page + 1])
+        has_next = len(pks) > self.list_per_page
+        pks = pks[: self.list_per_page]
+
+        paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
+        self.keyset = True
+        self.next_cursor = pks[-1] if has_next else None
+        self.result_count = paginator.count
+        self.show_full_result_count = self.model_admin.show_full_result_count
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = self.queryset.filter(pk__in=pks)
+        self.can_show_all = False
+        self.multi_page = has_next or self.cursor is not None
+        self.paginator = paginator
+
+    @property
+    def next_page_url(self):
+        if self.next_cursor is None:
+            return None
+        return self.get_query_string({CURSOR_VAR: self.next_cursor})
+
+    @property
+    def first_page_url(self):
+        if self.cursor is None:
+            return None
+        return self.get_query_string()
+
+
+class PerformanceModelAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin tuned for large tables.
+
+    Set ``list_deferred_fields`` to defer extra columns, or ``None`` to
+    disable automatic deferral of heavy columns.
+    """
+
+    change_list_template = "admin/performance_change_list.html"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_deferred_fields: tuple[str, ...] | None = ()
+
+    def get_changelist(self, request, **kwargs):
+        return PerformanceChangeList
+
+    def get_list_select_related(self, request):
+        if self.list_select_related is not False:
+            return self.list_select_related
+
+        # Join only the relations that are displayed, instead of the
+        # blanket select_related() Django falls back to.
+        related = []
+        for name in self.get_list_display(request):
+            if not isinstance(name, str):
+                continue
+            try:
+                field = self.opts.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if field.many_to_one or field.one_to_one:
+                if name != getattr(field, "attname", None):
+                    related.append(name)
+        return tuple(related)
+
+    def get_list_deferred_fields(self, request):
+        """Return the field names to defer on the changelist queryset."""
+        if self.list_deferred_fields is None:
+            return ()
+
+        displayed = {
+            name for name in self.get_list_display(request) if isinstance(name, str)
+        }
+        displayed.update(self.get_search_fields(request))
+        deferred = list(self.list_deferred_fields)
+        for field in self.opts.concrete_fields:
+            if isinstance(field, HEAVY_FIELD_TYPES) and field.name not in displayed:
+                deferred.append(field.name)
+        return tuple(dict.fromkeys(deferred))
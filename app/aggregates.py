@@ -0,0 +1,259 @@
+"""
+Materialized counters and sums, maintained incrementally.
+
+Dashboards read precomputed values instead of running ``COUNT``/``SUM``
+over whole tables. Declare aggregates in ``MATERIALIZED_AGGREGATES``::
+
+    MATERIALIZED_AGGREGATES = {
+        "users.active": {"model": "auth.User", "filter": {"is_active": True}},
+        "orders.revenue": {
+            "model": "shop.Order",
+            "op": "sum",
+            "field": "amount",
+            "group_by": "customer_id",
+            "filter": {"status": "paid"},
+        },
+    }
+
+or from code with :func:`register`. Each aggregate stores one
+:class:`app.models.MaterializedAggregate` row per group, so
+:func:`value` is a single indexed lookup.
+
+Saving or deleting a row of a watched model adds the difference between its
+old and new contribution with ``UPDATE ... SET value = value + delta`` from
+the signal handlers, so it commits or rolls back with the caller's
+transaction (``ATOMIC_REQUESTS`` or ``atomic()``) and concurrent writers
+never overwrite each other. ``filter`` holds
+exact field values, so contributions are computed without extra queries;
+updates also cost one query to read the row's previous values.
+
+``QuerySet.update()``, ``bulk_create()`` and raw SQL bypass signals.
+``python manage.py reconcile_aggregates`` recomputes every aggregate and
+fixes any drift; run it periodically, e.g. from cron::
+
+    */30 * * * * python manage.py reconcile_aggregates
+"""
+
+import logging
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+OPERATIONS = {"count": models.Count, "sum": models.Sum}
+
+
+class Aggregate:
+    """A ``COUNT`` or ``SUM`` over ``model``, optionally per ``group_by`` value."""
+
+    def __init__(self, name, model, op="count", field=None, group_by=None, filter=None):
+        if op not in OPERATIONS:
+            raise ImproperlyConfigured(f"Aggregate {name}: unknown op {op!r}")
+        if op == "sum" and not field:
+            raise ImproperlyConfigured(f"Aggregate {name}: sum needs a field")
+        self.name = name
+        self.model = model
+        self.op = op
+        self.field = field
+        self.group_by = group_by
+        self.filter = dict(filter or {})
+
+    @property
+    def columns(self):
+        """The fields an instance's contribution depends on."""
+        extra = [column for column in (self.field, self.group_by) if column]
+        return {*self.filter, *extra}
+
+    def contribution(self, values):
+        """Return ``(group, amount)`` for a row's ``values``, or None."""
+        if any(values[key] != expected for key, expected in self.filter.items()):
+            return None
+        group = "" if self.group_by is None else _group_key(values[self.group_by])
+        if self.op == "count":
+            return group, Decimal(1)
+        return group, Decimal(str(values[self.field] or 0))
+
+    def compute(self):
+        """Return ``{group: value}`` computed from the source table."""
+        queryset = self.model._default_manager.filter(**self.filter)
+        expression = OPERATIONS[self.op](self.field or "pk")
+        if self.group_by is None:
+            result = queryset.aggregate(value=expression)["value"]
+            return {"": Decimal(str(result or 0))}
+        rows = queryset.values(self.group_by).annotate(value=expression)
+        return {
+            _group_key(row[self.group_by]): Decimal(str(row["value"] or 0))
+            for row in rows.order_by()
+        }
+
+    def convert(self, value):
+        return int(value) if self.op == "count" else value
+
+
+def _group_key(value):
+    return "" if value is None else str(value)
+
+
+_registry = {}
+
+
+def register(name, model, op="count", field=None, group_by=None, filter=None):
+    """Declare an aggregate and start maintaining it from ``model``'s signals."""
+    if isinstance(model, str):
+        model = apps.get_model(model)
+    aggregate = Aggregate(name, model, op, field, group_by, filter)
+    _registry[name] = aggregate
+    pre_save.connect(_remember_old_values, sender=model, dispatch_uid="aggregates")
+    post_save.connect(_saved, sender=model, dispatch_uid="aggregates")
+    post_delete.connect(_deleted, sender=model, dispatch_uid="aggregates")
+    return aggregate
+
+
+def unregister(name):
+    aggregate = _registry.pop(name, None)
+    if aggregate and not _for_model(aggregate.model):
+        for signal in (pre_save, post_save, post_delete):
+            signal.disconnect(sender=aggregate.model, dispatch_uid="aggregates")
+
+
+def register_from_settings():
+    """Register the aggregates listed in ``MATERIALIZED_AGGREGATES``."""
+    for name, options in getattr(settings, "MATERIALIZED_AGGREGATES", {}).items():
+        register(name, **options)
+
+
+def get_aggregate(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise ImproperlyConfigured(f"Unknown aggregate {name!r}") from None
+
+
+def registered():
+    return list(_registry)
+
+
+def _for_model(model):
+    return [aggregate for aggregate in _registry.values() if aggregate.model is model]
+
+
+def _columns(aggregates):
+    return sorted(set().union(*(aggregate.columns for aggregate in aggregates)))
+
+
+def _instance_values(instance, columns):
+    return {column: getattr(instance, column) for column in columns}
+
+
+def _remember_old_values(sender, instance, raw=False, **kwargs):
+    instance._aggregate_old_values = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    columns = _columns(_for_model(sender))
+    instance._aggregate_old_values = (
+        sender._default_manager.filter(pk=instance.pk).values(*columns).first()
+    )
+
+
+def _saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return  # Fixture loading; reconcile afterwards.
+    aggregates = _for_model(sender)
+    old = getattr(instance, "_aggregate_old_values", None)
+    new = _instance_values(instance, _columns(aggregates))
+    instance._aggregate_old_values = None
+    for aggregate in aggregates:
+        before = aggregate.contribution(old) if old is not None else None
+        after = aggregate.contribution(new)
+        if before != after:
+            _apply(aggregate, before, sign=-1)
+            _apply(aggregate, after, sign=1)
+
+
+def _deleted(sender, instance, **kwargs):
+    for aggregate in _for_model(sender):
+        values = _instance_values(instance, aggregate.columns)
+        _apply(aggregate, aggregate.contribution(values), sign=-1)
+
+
+def _apply(aggregate, contribution, sign):
+    if contribution is not None and contribution[1]:
+        group, amount = contribution
+        add(aggregate.name, group, sign * amount)
+
+
+def add(name, group, amount):
+    """Add ``amount`` to a stored value with a single atomic ``UPDATE``."""
+    from .models import MaterializedAggregate
+
+    rows = MaterializedAggregate.objects.filter(name=name, group=group)
+    changes = {"value": F("value") + amount, "updated_at": timezone.now()}
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            MaterializedAggregate.objects.create(name=name, group=group, value=amount)
+    except IntegrityError:
+        rows.update(**changes)  # Created concurrently since the UPDATE.
+
+
+def value(name, group=""):
+    """Return the stored value of one group of ``name`` (0 if it has none)."""
+    from .models import MaterializedAggregate
+
+    aggregate = get_aggregate(name)
+    stored = (
+        MaterializedAggregate.objects.filter(name=name, group=_group_key(group))
+        .values_list("value", flat=True)
+        .first()
+    )
+    return aggregate.convert(stored or Decimal(0))
+
+
+def values(name):
+    """Return ``{group: value}`` for every stored group of ``name``."""
+    from .models import MaterializedAggregate
+
+    aggregate = get_aggregate(name)
+    rows = MaterializedAggregate.objects.filter(name=name).values_list("group", "value")
+    return {group: aggregate.convert(stored) for group, stored in rows}
+
+
+def reconcile(name, fix=True):
+    """
+    Recompute ``name`` and return ``[(group, stored, actual)]`` for drifted groups.
+
+    With ``fix``, the stored rows are locked while recomputing, then corrected.
+    """
+    from .models import MaterializedAggregate
+
+    aggregate = get_aggregate(name)
+    with transaction.atomic():
+        rows = MaterializedAggregate.objects.filter(name=name)
+        if fix:
+            rows = rows.select_for_update()
+        stored = dict(rows.values_list("group", "value"))
+        actual = aggregate.compute()
+        drift = [
+            (group, stored.get(group, Decimal(0)), actual.get(group, Decimal(0)))
+            for group in sorted(stored.keys() | actual.keys())
+            if stored.get(group, Decimal(0)) != actual.get(group, Decimal(0))
+        ]
+        if fix:
+            for group, _, correct in drift:
+                if correct or group == "":
+                    MaterializedAggregate.objects.update_or_create(
+                        name=name, group=group, defaults={"value": correct}
+                    )
+                else:
+                    rows.filter(group=group).delete()
+    if drift:
+        logger.warning("Aggregate %s drifted in %d groups", name, len(drift))
+    return drift
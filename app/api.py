@@ -0,0 +1,242 @@
+"""
+Lightweight JSON API layer.
+
+Lists are serialized from ``values_list()`` rows, so no model instances are
+built, and encoded with orjson when it is installed (``pip install orjson``)
+or the stdlib ``json`` module otherwise::
+
+    class UserResource(api.Resource):
+        model = User
+        fields = {"id": "pk", "username": "username", "joined": "date_joined"}
+        default_fields = ["id", "username"]
+
+    path("api/users/", UserResource.as_view(), name="api-users")
+
+Clients choose what they get:
+
+- ``?fields=id,joined``: sparse fieldsets, limited to ``Resource.fields``;
+- ``?limit=50&cursor=...``: keyset pagination on ``Resource.ordering``.
+  ``next`` in the response links to the following page, and deep pages cost
+  the same as the first;
+- ``?stream=1``: the whole list as one JSON array, produced in
+  ``API_STREAM_CHUNK_SIZE``-row chunks from a server-side cursor and
+  gzip-compressed on the fly for clients that accept it.
+"""
+
+import base64
+import datetime
+import decimal
+import json
+import uuid
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import Promise
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def _default(value):
+    """Encode the types orjson does not know about."""
+    if isinstance(value, (decimal.Decimal, Promise)):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+_encoder = DjangoJSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+
+def dumps(data):
+    """Serialize ``data`` to compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+    return _encoder.encode(data).encode()
+
+
+class JSONResponse(HttpResponse):
+    """An ``HttpResponse`` of ``data`` encoded with :func:`dumps`."""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(dumps(data), **kwargs)
+
+
+class APIError(Exception):
+    """A client error, answered as ``{"error": message}`` with ``status``."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def encode_cursor(value):
+    return base64.urlsafe_b64encode(dumps([value])).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        (value,) = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise APIError("Invalid cursor") from None
+    return value
+
+
+def _stream_chunks(rows, names):
+    """Yield a JSON array of ``rows`` (tuples) as objects keyed by ``names``."""
+    separator = b"["
+    for batch in rows:
+        if batch:
+            body = b",".join(dumps(dict(zip(names, row))) for row in batch)
+            yield separator + body
+            separator = b","
+    yield b"[]" if separator == b"[" else b"]"
+
+
+def _gzip(chunks):
+    # Sync-flush each chunk so clients can parse the list while it arrives.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def _batched(iterator, size):
+    batch = []
+    for row in iterator:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    yield batch
+
+
+class Resource:
+    """
+    A read-only list endpoint over ``model``.
+
+    ``fields`` maps public names to model fields or lookups (``"author__name"``);
+    ``ordering`` is a unique field, optionally prefixed with ``-``, used for
+    the cursor.
+    """
+
+    model = None
+    fields = {}
+    default_fields = None
+    ordering = "pk"
+    page_size = 20
+    max_page_size = 100
+
+    def get_queryset(self, request):
+        return self.model._default_manager.all()
+
+    def has_permission(self, request):
+        return True
+
+    @classmethod
+    def as_view(cls):
+        def view(request):
+            return cls().dispatch(request)
+
+        view.__doc__ = cls.__doc__
+        return view
+
+    def dispatch(self, request):
+        if request.method not in ("GET", "HEAD"):
+            return JSONResponse({"error": "Method not allowed"}, status=405)
+        if not self.has_permission(request):
+            return JSONResponse({"error": "Permission denied"}, status=403)
+        try:
+            names = self.selected_fields(request)
+            if request.GET.get("stream") in ("1", "true"):
+                return self.stream(request, names)
+            return self.page(request, names)
+        except APIError as error:
+            return JSONResponse({"error": str(error)}, status=error.status)
+
+    def selected_fields(self, request):
+        """Return the public field names requested with ``?fields=``."""
+        requested = request.GET.get("fields")
+        if not requested:
+            return list(self.default_fields or self.fields)
+        names = [name.strip() for name in requested.split(",") if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown or not names:
+            raise APIError(f"Unknown fields: {', '.join(unknown) or requested!r}")
+        return names
+
+    def rows(self, queryset, names, *extra):
+        """Return ``values_list()`` of ``names``' lookups in cursor order."""
+        lookups = [self.fields[name] for name in names]
+        return queryset.order_by(self.ordering).values_list(*lookups, *extra)
+
+    def page(self, request, names):
+        try:
+            limit = min(
+                int(request.GET.get("limit", self.page_size)), self.max_page_size
+            )
+        except ValueError:
+            raise APIError("limit must be an integer") from None
+        if limit < 1:
+            raise APIError("limit must be positive")
+
+        key = self.ordering.lstrip("-")
+        queryset = self.get_queryset(request)
+        cursor = request.GET.get("cursor")
+        if cursor:
+            lookup = "lt" if self.ordering.startswith("-") else "gt"
+            try:
+                queryset = queryset.filter(
+                    **{f"{key}__{lookup}": decode_cursor(cursor)}
+                )
+            except (ValueError, TypeError, ValidationError):
+                raise APIError("Invalid cursor") from None
+
+        # The cursor column rides along as the last value of each row.
+        rows = list(self.rows(queryset, names, key)[: limit + 1])
+        next_url = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            params = request.GET.copy()
+            params["cursor"] = encode_cursor(_cursor_value(rows[-1][-1]))
+            next_url = request.build_absolute_uri(
+                f"{request.path}?{params.urlencode()}"
+            )
+        return JSONResponse(
+            {
+                "results": [dict(zip(names, row)) for row in rows],
+                "next": next_url,
+            }
+        )
+
+    def stream(self, request, names):
+        chunk_size = getattr(settings, "API_STREAM_CHUNK_SIZE", 2000)
+        rows = self.rows(self.get_queryset(request), names).iterator(chunk_size)
+        chunks = _stream_chunks(_batched(rows, chunk_size), names)
+
+        gzip = getattr(settings, "API_STREAM_GZIP", True) and "gzip" in (
+            request.headers.get("Accept-Encoding", "")
+        )
+        response = StreamingHttpResponse(
+            _gzip(chunks) if gzip else chunks, content_type="application/json"
+        )
+        if gzip:
+            response["Content-Encoding"] = "gzip"
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return response
+
+
+def _cursor_value(value):
+    # isoformat() keeps microseconds, which DjangoJSONEncoder would drop.
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    return value
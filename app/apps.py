@@ -0,0 +1,20 @@
+"""
+Application configuration for the main Django application.
+"""
+
+from django.apps import AppConfig
+
+
+class MainAppConfig(AppConfig):
+    name = "app"
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        from . import aggregates, auth, cache_policy, search
+
+        aggregates.register_from_settings()
+        auth.connect_invalidation()
+        cache_policy.connect_purge_hooks()
+        search.register_from_settings()
+        post_migrate.connect(search.create_tables, dispatch_uid="search")
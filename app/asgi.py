@@ -11,6 +11,13 @@ import os
 
 from django.core.asgi import get_asgi_application
 
+from app import preload, static
+from app.profiling import ProfilingASGIMiddleware
+from app.realtime import ProtocolRouter
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
 
-application = get_asgi_application()
+application = ProfilingASGIMiddleware(
+    ProtocolRouter(preload.EarlyHintsMiddleware(get_asgi_application()))
+)
+static.preload()
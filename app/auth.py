@@ -0,0 +1,238 @@
+"""
+Authentication backends for the project.
+
+:class:`ModelBackend` is Django's backend with a non-blocking async path.
+Django's ``ModelBackend.aauthenticate()`` fetches the user asynchronously but
+then hashes the password on the event loop, stalling every other request on
+an ASGI worker for the whole hash. Here the hash runs in the pool from
+:mod:`app.hashers`, so async login views can use it freely::
+
+    user = await auth.aauthenticate(request, username=name, password=password)
+    if user is not None:
+        await auth.alogin(request, user)
+
+The sync path is unchanged; WSGI requests already hash on their own thread.
+
+:class:`CachedModelBackend` (the configured backend) also keeps user rows and
+permission sets in the ``AUTH_CACHE_ALIAS`` cache for ``AUTH_CACHE_TIMEOUT``
+seconds. ``AuthenticationMiddleware`` and permission checks then stop
+querying ``auth_user``, ``auth_permission`` and ``auth_group`` on every
+request. Saving or deleting a user, or changing their groups or direct
+permissions, drops that user's entries; saving or deleting a group or
+permission, or changing a group's permissions, bumps a generation number
+that is part of every permission key. Both happen immediately and again
+once the transaction commits. ``QuerySet.update()`` and raw SQL bypass the
+signals; the timeout bounds how long such changes take to show.
+"""
+
+from django.conf import settings
+from django.contrib.auth import backends, get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from . import hashers, request_cache
+
+
+class ModelBackend(backends.ModelBackend):
+    """``ModelBackend`` whose ``aauthenticate()`` hashes in a thread pool."""
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await UserModel._default_manager.aget_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown usernames take as long as wrong passwords.
+            await hashers.amake_password(password)
+            return None
+
+        is_correct, must_update = await hashers.averify_password(
+            password, user.password
+        )
+        if not is_correct:
+            return None
+        if must_update:
+            # Rehash with the current profile; not a password change.
+            user.password = await hashers.amake_password(password)
+            await user.asave(update_fields=["password"])
+        return user if self.user_can_authenticate(user) else None
+
+
+_GENERATION_KEY = "auth:perms:generation"
+
+
+def _cache():
+    return caches[getattr(settings, "AUTH_CACHE_ALIAS", "default")]
+
+
+def _timeout():
+    return getattr(settings, "AUTH_CACHE_TIMEOUT", 300)
+
+
+def _user_key(user_id):
+    return f"auth:user:{user_id}"
+
+
+def _generation():
+    """Return the permission generation, read once per request."""
+    return request_cache.get_or_set(
+        _GENERATION_KEY, lambda: _cache().get(_GENERATION_KEY, 0)
+    )
+
+
+async def _ageneration():
+    generation = request_cache.get(_GENERATION_KEY)
+    if generation is None:
+        generation = await _cache().aget(_GENERATION_KEY, 0)
+        request_cache.store(_GENERATION_KEY, generation)
+    return generation
+
+
+def _perms_key(generation, from_name, user_id):
+    return f"auth:perms:{generation}:{from_name}:{user_id}"
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ``ModelBackend`` caching user rows and permission sets.
+
+    ``AuthenticationMiddleware`` gets the session's user from the cache, and
+    ``has_perm()``/``has_module_perms()`` read the user's permission strings
+    from it, so an authenticated admin page costs no auth queries at all.
+    """
+
+    def get_user(self, user_id):
+        cache = _cache()
+        user = cache.get(_user_key(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(_user_key(user_id), user, _timeout())
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        cache = _cache()
+        user = await cache.aget(_user_key(user_id))
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is not None:
+                await cache.aset(_user_key(user_id), user, _timeout())
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    def _get_permissions(self, user_obj, obj, from_name):
+        if not _cacheable(user_obj, obj, from_name):
+            return super()._get_permissions(user_obj, obj, from_name)
+        key = _perms_key(_generation(), from_name, user_obj.pk)
+        perms = _cache().get(key)
+        if perms is None:
+            perms = super()._get_permissions(user_obj, obj, from_name)
+            _cache().set(key, perms, _timeout())
+        setattr(user_obj, f"_{from_name}_perm_cache", perms)
+        return perms
+
+    async def _aget_permissions(self, user_obj, obj, from_name):
+        if not _cacheable(user_obj, obj, from_name):
+            return await super()._aget_permissions(user_obj, obj, from_name)
+        key = _perms_key(await _ageneration(), from_name, user_obj.pk)
+        perms = await _cache().aget(key)
+        if perms is None:
+            perms = await super()._aget_permissions(user_obj, obj, from_name)
+            await _cache().aset(key, perms, _timeout())
+        setattr(user_obj, f"_{from_name}_perm_cache", perms)
+        return perms
+
+
+def _cacheable(user_obj, obj, from_name):
+    """Whether the permissions are neither trivial nor already on the instance."""
+    return (
+        user_obj.is_active
+        and not user_obj.is_anonymous
+        and obj is None
+        and not hasattr(user_obj, f"_{from_name}_perm_cache")
+    )
+
+
+def invalidate_user(user_id):
+    """Drop the cached row and permissions of one user."""
+    generation = _cache().get(_GENERATION_KEY, 0)
+    _cache().delete_many(
+        [
+            _user_key(user_id),
+            _perms_key(generation, "user", user_id),
+            _perms_key(generation, "group", user_id),
+        ]
+    )
+
+
+def invalidate_permissions():
+    """Drop every cached permission set, e.g. after a group's permissions change."""
+    cache = _cache()
+    if not cache.add(_GENERATION_KEY, 1, None):
+        try:
+            cache.incr(_GENERATION_KEY)
+        except ValueError:  # Evicted since add().
+            cache.set(_GENERATION_KEY, 1, None)
+
+
+def _invalidate_users(user_ids):
+    # Now, so this transaction sees its own changes, and again after the
+    # commit, in case another request re-cached the old rows meanwhile.
+    user_ids = list(user_ids)
+    for pk in user_ids:
+        invalidate_user(pk)
+    transaction.on_commit(lambda: [invalidate_user(pk) for pk in user_ids])
+
+
+def _invalidate_permissions():
+    invalidate_permissions()
+    transaction.on_commit(invalidate_permissions)
+
+
+def _user_changed(sender, instance, **kwargs):
+    _invalidate_users([instance.pk])
+
+
+def _user_relations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        # user.groups or user.user_permissions changed.
+        _invalidate_users([instance.pk])
+    elif pk_set is not None:
+        # group.user_set or permission.user_set changed.
+        _invalidate_users(pk_set)
+    else:
+        # A reverse clear() doesn't say which users it affected.
+        _invalidate_permissions()
+
+
+def _permissions_changed(sender, **kwargs):
+    action = kwargs.get("action", "post_")
+    if action.startswith("post_"):
+        _invalidate_permissions()
+
+
+def connect_invalidation():
+    """Connect the signals keeping the cache current; called at startup."""
+    UserModel = get_user_model()
+    for signal in (post_save, post_delete):
+        signal.connect(_user_changed, sender=UserModel, dispatch_uid="auth_cache")
+        for model in (Group, Permission):
+            signal.connect(
+                _permissions_changed, sender=model, dispatch_uid="auth_cache"
+            )
+    for field in ("groups", "user_permissions"):
+        through = getattr(UserModel, field).through
+        m2m_changed.connect(
+            _user_relations_changed, sender=through, dispatch_uid="auth_cache"
+        )
+    m2m_changed.connect(
+        _permissions_changed,
+        sender=Group.permissions.through,
+        dispatch_uid="auth_cache",
+    )
@@ -0,0 +1,224 @@
+"""
+HTTP cache policies declared per URL name.
+
+Policies live in one place, ``CACHE_POLICIES`` in settings, or are added from
+code with :func:`register`::
+
+    CACHE_POLICIES = {
+        "home": {
+            "max_age": 60,
+            "s_maxage": 600,
+            "stale_while_revalidate": 60,
+            "vary": ["Accept-Language"],
+            "tags": ["pages"],
+            "purge_on": ["auth.User"],
+        },
+    }
+
+:class:`app.middleware.CachePolicyMiddleware` turns the policy of the matched
+URL into ``Cache-Control``, ``Vary`` and ``Cache-Tag`` headers, so a CDN or
+reverse proxy can answer repeat anonymous requests. A response is only marked
+shareable when it is the same for every visitor: views that set their own
+``Cache-Control``, set cookies, use the CSRF token or vary on ``Cookie`` (e.g.
+by touching the session) get ``private, no-cache`` instead.
+
+When a model listed in ``purge_on`` is saved or deleted, :func:`purge` sends
+:data:`purge_requested` with the policy's URL and tags once the transaction
+commits; ``CACHE_PURGE_BACKENDS`` receive it (:func:`log_purge`,
+:func:`http_purge`). ``python manage.py cache_policies`` lists routes and
+their policies and flags routes without one.
+"""
+
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal
+from django.urls import NoReverseMatch, reverse
+from django.utils.cache import has_vary_header, patch_vary_headers
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Statuses RFC 9111 lets shared caches store without explicit freshness.
+CACHEABLE_STATUSES = frozenset({200, 203, 204, 206, 300, 301, 308, 404, 405, 410})
+
+# Sent with ``urls`` and ``tags`` after a change to a model a policy watches.
+purge_requested = Signal()
+
+
+class CachePolicy:
+    """How responses of one URL name may be cached by browsers and proxies."""
+
+    def __init__(
+        self,
+        max_age=0,
+        s_maxage=None,
+        stale_while_revalidate=None,
+        stale_if_error=None,
+        vary=(),
+        private=False,
+        no_store=False,
+        tags=(),
+        purge_on=(),
+    ):
+        self.max_age = max_age
+        self.s_maxage = s_maxage
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+        self.vary = tuple(vary)
+        self.private = private
+        self.no_store = no_store
+        self.tags = tuple(tags)
+        self.purge_on = tuple(purge_on)
+
+    def __repr__(self):
+        return f"<CachePolicy {self.cache_control()}>"
+
+    def cache_control(self, shared=True):
+        """Return the ``Cache-Control`` value, downgraded unless ``shared``."""
+        if self.no_store:
+            return "no-store"
+        if self.private:
+            return f"private, max-age={self.max_age}"
+        if not shared:
+            # A per-visitor response on a public route: keep it out of shared
+            # caches and have the browser revalidate.
+            return "private, no-cache"
+
+        directives = ["public", f"max-age={self.max_age}"]
+        for name, value in (
+            ("s-maxage", self.s_maxage),
+            ("stale-while-revalidate", self.stale_while_revalidate),
+            ("stale-if-error", self.stale_if_error),
+        ):
+            if value is not None:
+                directives.append(f"{name}={value}")
+        return ", ".join(directives)
+
+
+_registry = {}
+
+
+def register(url_name, **options):
+    """Declare the policy for ``url_name`` (``namespace:name`` if namespaced)."""
+    _registry[url_name] = CachePolicy(**options)
+    return _registry[url_name]
+
+
+def get_policies():
+    """Return all policies by URL name; code registrations override settings."""
+    policies = {
+        name: CachePolicy(**options)
+        for name, options in getattr(settings, "CACHE_POLICIES", {}).items()
+    }
+    policies.update(_registry)
+    return policies
+
+
+def get_policy(url_name):
+    if url_name in _registry:
+        return _registry[url_name]
+    options = getattr(settings, "CACHE_POLICIES", {}).get(url_name)
+    return None if options is None else CachePolicy(**options)
+
+
+def is_shared(request, response):
+    """Return True if ``response`` is the same for every visitor."""
+    return not (
+        response.cookies
+        or request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        or has_vary_header(response, "Cookie")
+        or has_vary_header(response, "*")
+    )
+
+
+def apply(policy, request, response):
+    """Add the policy's caching headers to ``response``, if it may be cached."""
+    if response.has_header("Cache-Control"):
+        return response
+    if request.method not in ("GET", "HEAD"):
+        return response
+    if response.status_code not in CACHEABLE_STATUSES:
+        return response
+
+    shared = is_shared(request, response)
+    if policy.vary:
+        patch_vary_headers(response, policy.vary)
+    response["Cache-Control"] = policy.cache_control(shared)
+    if shared and policy.tags and not policy.private:
+        header = getattr(settings, "CACHE_POLICY_TAG_HEADER", "Cache-Tag")
+        response[header] = " ".join(policy.tags)
+    return response
+
+
+def purge(urls=(), tags=()):
+    """Ask the purge backends to drop ``urls`` and ``tags`` after commit."""
+    urls, tags = sorted(set(urls)), sorted(set(tags))
+    if urls or tags:
+        transaction.on_commit(
+            lambda: purge_requested.send(sender=CachePolicy, urls=urls, tags=tags)
+        )
+
+
+def purge_for_model(model):
+    """Purge every policy that watches ``model``."""
+    label = model._meta.label_lower
+    urls, tags = [], []
+    for url_name, policy in get_policies().items():
+        if label not in (name.lower() for name in policy.purge_on):
+            continue
+        tags += policy.tags
+        try:
+            urls.append(reverse(url_name))
+        except NoReverseMatch:
+            pass  # Routes with arguments are purged by tag.
+    purge(urls, tags)
+
+
+def _model_changed(sender, **kwargs):
+    purge_for_model(sender)
+
+
+def connect_purge_hooks():
+    """Connect model signals for every ``purge_on`` model; called at startup."""
+    for policy in get_policies().values():
+        for label in policy.purge_on:
+            model = apps.get_model(label)
+            for signal in (post_save, post_delete):
+                signal.connect(
+                    _model_changed, sender=model, dispatch_uid="cache_policy"
+                )
+    for path in getattr(settings, "CACHE_PURGE_BACKENDS", []):
+        purge_requested.connect(import_string(path), dispatch_uid=path)
+
+
+def log_purge(sender, urls, tags, **kwargs):
+    """Purge backend that only logs; useful without a CDN."""
+    logger.info("Cache purge requested: urls=%s tags=%s", urls, tags)
+
+
+def http_purge(sender, urls, tags, **kwargs):
+    """
+    Purge backend sending ``PURGE`` requests to ``CACHE_PURGE_ORIGIN``.
+
+    Varnish and nginx-based proxies purge the request URL; tags are sent in
+    the ``CACHE_POLICY_TAG_HEADER`` header of a ``PURGE /`` request.
+    """
+    from app.http_client import HTTPError, get_client
+
+    origin = getattr(settings, "CACHE_PURGE_ORIGIN", "").rstrip("/")
+    if not origin:
+        return
+    client = get_client()
+    requests = [(url, {}) for url in urls]
+    if tags:
+        header = getattr(settings, "CACHE_POLICY_TAG_HEADER", "Cache-Tag")
+        requests.append(("/", {header: " ".join(tags)}))
+    for path, headers in requests:
+        try:
+            client.request("PURGE", origin + path, headers=headers, retries=0)
+        except HTTPError as error:
+            logger.warning("Cache purge of %s failed: %s", path, error)
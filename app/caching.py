@@ -0,0 +1,366 @@
+"""
+Cache helpers with stampede protection.
+
+Plain ``cache.get``/``cache.set`` lets every worker recompute a hot key at the
+moment it expires. :func:`get_or_compute` avoids that with three techniques:
+
+- **Probabilistic early expiration** ("XFetch"): each read may decide to
+  recompute slightly before expiry, with a probability that grows as expiry
+  approaches and with how long the value took to compute. Recomputations are
+  spread out instead of piling up on the expiry instant.
+- **Single-flight locking**: within a process, concurrent callers for the same
+  key share one computation; across processes, ``cache.add()`` elects a
+  single computing worker while the others wait for its result.
+- **Stale-while-revalidate**: with ``stale_ttl`` set, expired values are kept
+  for ``stale_ttl`` more seconds and served immediately while one background
+  thread refreshes them.
+
+Usage::
+
+    from app.caching import cache_view, cached, get_or_compute
+
+    report = get_or_compute("report:daily", build_report, 300, stale_ttl=60)
+
+    @cached(timeout=60)
+    def expensive(user_id): ...
+
+    @cache_view(timeout=30, stale_ttl=300)
+    def dashboard(request): ...
+"""
+
+import functools
+import hashlib
+import logging
+import math
+import pickle
+import random
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.db import connections
+from django.utils import translation
+from django.utils.cache import has_vary_header
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class _NoStore:
+    """Wrap a computed value that must be returned but not cached."""
+
+    def __init__(self, value):
+        self.value = value
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+_flights: dict[tuple[str, str], _Flight] = {}
+_flights_lock = threading.Lock()
+
+
+def _single_flight(flight_key, func, busy=_MISSING, compute=None):
+    """
+    Run ``func`` once per ``flight_key`` across concurrent threads.
+
+    Threads arriving while a call is in flight wait for its result, or return
+    ``busy`` immediately when one is given. Like cache reads, each waiting
+    thread gets its own copy of the result, so mutable values such as
+    responses are never shared between requests. A result ``func`` marks
+    ``_NoStore`` is not shared at all: waiting threads call ``compute()``.
+    """
+    with _flights_lock:
+        flight = _flights.get(flight_key)
+        leader = flight is None
+        if leader:
+            flight = _flights[flight_key] = _Flight()
+
+    if not leader:
+        if busy is not _MISSING:
+            return busy
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        if isinstance(flight.value, _NoStore):
+            return _unwrap(compute())
+        return pickle.loads(pickle.dumps(flight.value, pickle.HIGHEST_PROTOCOL))
+
+    try:
+        flight.value = func()
+        return _unwrap(flight.value)
+    except BaseException as error:
+        flight.error = error
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[flight_key]
+        flight.done.set()
+
+
+def _unwrap(value):
+    return value.value if isinstance(value, _NoStore) else value
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _should_refresh_early(expires_at, delta, beta, now):
+    """XFetch: recompute early with probability rising towards expiry."""
+    if beta <= 0 or delta <= 0:
+        return now >= expires_at
+    # -log(random()) is an exponential sample; 1 - random() avoids log(0).
+    return now - delta * beta * math.log(1.0 - random.random()) >= expires_at
+
+
+def _compute_and_store(cache, key, compute, timeout, stale_ttl):
+    start = time.monotonic()
+    value = compute()
+    if isinstance(value, _NoStore):
+        return value
+
+    delta = time.monotonic() - start
+    # The entry outlives its logical expiry by stale_ttl so that stale
+    # values can still be served while a refresh is running.
+    ttl = None if timeout is None else timeout + stale_ttl
+    expires_at = math.inf if timeout is None else time.time() + timeout
+    cache.set(key, (value, expires_at, delta), ttl)
+    return value
+
+
+def _recompute(cache, key, compute, timeout, stale_ttl, lock_wait, fallback):
+    """
+    Compute and store ``key`` if this process wins the cross-process lock.
+
+    Losers return ``fallback`` when there is one (a stale or still-valid
+    value), otherwise they poll for the winner's result for ``lock_wait``
+    seconds and finally compute without storing.
+    """
+    lock_key = f"{key}:lock"
+    lock_timeout = _setting("CACHE_LOCK_TIMEOUT", 30)
+    token = uuid.uuid4().hex
+
+    if cache.add(lock_key, token, lock_timeout):
+        try:
+            return _compute_and_store(cache, key, compute, timeout, stale_ttl)
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    if fallback is not _MISSING:
+        return fallback
+
+    deadline = time.monotonic() + lock_wait
+    while time.monotonic() < deadline:
+        time.sleep(0.01)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+
+    return compute()
+
+
+def _refresh_in_background(alias, key, compute, timeout, stale_ttl):
+    flight_key = (alias, key)
+    with _flights_lock:
+        if flight_key in _flights:
+            return None
+
+    def run():
+        try:
+            _single_flight(
+                flight_key,
+                lambda: _recompute(
+                    caches[alias], key, compute, timeout, stale_ttl, 0, None
+                ),
+                busy=None,
+            )
+        except Exception:
+            logger.exception("Background refresh of cache key %r failed", key)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=run, name=f"cache-refresh:{key}", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_or_compute(
+    key,
+    compute,
+    timeout=None,
+    *,
+    stale_ttl=0,
+    beta=None,
+    lock_wait=None,
+    using=DEFAULT_CACHE_ALIAS,
+):
+    """
+    Return the cached value for ``key``, calling ``compute()`` when needed.
+
+    ``timeout`` is the freshness lifetime in seconds (``None`` means the
+    cache's default timeout). ``stale_ttl`` keeps expired values around for
+    that many seconds and serves them while a background thread refreshes
+    them. ``beta`` tunes early expiration (0 disables it, higher values
+    refresh earlier). ``lock_wait`` bounds how long a caller without a value
+    to serve waits for another worker's computation.
+    """
+    cache = caches[using]
+    if timeout is None:
+        timeout = cache.default_timeout
+    if beta is None:
+        beta = _setting("CACHE_EARLY_EXPIRATION_BETA", 1.0)
+    if lock_wait is None:
+        lock_wait = _setting("CACHE_LOCK_WAIT", 1.0)
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires_at, delta = entry
+        now = time.time()
+        if not _should_refresh_early(expires_at, delta, beta, now):
+            return value
+        if stale_ttl or now < expires_at:
+            if stale_ttl:
+                _refresh_in_background(using, key, compute, timeout, stale_ttl)
+                return value
+            # Early refresh: one caller recomputes, the rest keep the
+            # still-valid value.
+            return _single_flight(
+                (using, key),
+                lambda: _recompute(
+                    cache, key, compute, timeout, stale_ttl, lock_wait, value
+                ),
+                busy=value,
+            )
+
+    return _single_flight(
+        (using, key),
+        lambda: _recompute(
+            cache, key, compute, timeout, stale_ttl, lock_wait, _MISSING
+        ),
+        compute=compute,
+    )
+
+
+def invalidate(key, using=DEFAULT_CACHE_ALIAS):
+    """Drop ``key`` so the next read recomputes it."""
+    caches[using].delete(key)
+
+
+def make_key(prefix, *parts):
+    """Build a cache key from ``prefix`` and a hash of ``parts``."""
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    return f"{prefix}:{digest}"
+
+
+def cached(timeout=None, *, key=None, stale_ttl=0, beta=None, using=None):
+    """
+    Cache a function's return value per call arguments.
+
+    ``key`` may be a callable building the cache key from the call
+    arguments; by default the arguments' ``repr`` is hashed. The wrapper
+    exposes ``invalidate(*args, **kwargs)``.
+    """
+
+    def decorator(func):
+        prefix = f"fn:{func.__module__}.{func.__qualname__}"
+
+        def build_key(*args, **kwargs):
+            if key is not None:
+                return f"{prefix}:{key(*args, **kwargs)}"
+            return make_key(prefix, args, sorted(kwargs.items()))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return get_or_compute(
+                build_key(*args, **kwargs),
+                lambda: func(*args, **kwargs),
+                timeout,
+                stale_ttl=stale_ttl,
+                beta=beta,
+                using=using or DEFAULT_CACHE_ALIAS,
+            )
+
+        def invalidate_call(*args, **kwargs):
+            invalidate(build_key(*args, **kwargs), using or DEFAULT_CACHE_ALIAS)
+
+        wrapper.invalidate = invalidate_call  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
+
+
+def _is_cacheable(request, response):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    # A page that used the CSRF token embeds it, and one that varies on
+    # cookies differs per visitor; the key covers neither.
+    if request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+        return False
+    if has_vary_header(response, "Cookie") or has_vary_header(response, "*"):
+        return False
+    cache_control = response.get("Cache-Control", "")
+    return "private" not in cache_control and "no-store" not in cache_control
+
+
+def cache_view(timeout=None, *, stale_ttl=0, beta=None, per_user=False, using=None):
+    """
+    Cache a view's GET/HEAD responses by full path and language.
+
+    With ``per_user=False`` (the default) only anonymous requests are cached;
+    ``per_user=True`` adds the user id to the key and caches for everyone.
+    Responses that set cookies, are streamed, are not 200 OK, are marked
+    private/no-store, vary on ``Cookie`` or used the CSRF token are never
+    stored.
+
+    With ``stale_ttl`` the view may be re-run in a background thread with
+    the original request, so it must not rely on per-request side effects.
+    """
+
+    def decorator(view):
+        prefix = f"view:{view.__module__}.{view.__qualname__}"
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            user = getattr(request, "user", None)
+            authenticated = user is not None and user.is_authenticated
+            if request.method not in ("GET", "HEAD") or (
+                authenticated and not per_user
+            ):
+                return view(request, *args, **kwargs)
+
+            key = make_key(
+                prefix,
+                request.get_full_path(),
+                translation.get_language(),
+                user.pk if authenticated else None,
+            )
+
+            def compute():
+                response = view(request, *args, **kwargs)
+                if hasattr(response, "render") and callable(response.render):
+                    response = response.render()
+                return (
+                    response if _is_cacheable(request, response) else _NoStore(response)
+                )
+
+            return get_or_compute(
+                key,
+                compute,
+                timeout,
+                stale_ttl=stale_ttl,
+                beta=beta,
+                using=using or DEFAULT_CACHE_ALIAS,
+            )
+
+        return wrapper
+
+    return decorator
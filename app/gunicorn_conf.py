@@ -0,0 +1,38 @@
+"""
+Gunicorn server hooks.
+
+Load with ``gunicorn -c python:app.gunicorn_conf app.wsgi:application``.
+Command-line options still take precedence over anything set here.
+"""
+
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+
+
+def post_fork(server, worker):
+    """Set up per-worker instrumentation once the worker process exists."""
+    from django.conf import settings
+
+    if settings.MEMORY_PROFILING:
+        from app import memory
+
+        # Gunicorn resets worker signal handlers before this hook runs, so
+        # SIGUSR2 is free to use for on-demand snapshots.
+        memory.get_profiler().start()
+        memory.install_signal_handler()
+
+
+def worker_exit(server, worker):
+    """Flush per-worker state before the process goes away."""
+    from django.conf import settings
+
+    from app import images, write_buffer
+
+    images.shutdown()
+    write_buffer.flush()
+
+    if settings.MEMORY_PROFILING:
+        from app import memory
+
+        memory.get_profiler().take_snapshot()
@@ -0,0 +1,106 @@
+"""
+Password hashers with tunable cost, and a thread pool to run them in.
+
+``PASSWORD_HASHER_PROFILE`` picks one of ``PASSWORD_HASHER_PROFILES`` in
+settings: ``argon2`` (production default, needs ``pip install argon2-cffi``),
+``scrypt``, ``pbkdf2`` (Django's default) or ``fast`` for the test suite and
+throwaway seed databases. The first hasher of a profile hashes new passwords;
+the others only verify existing hashes, which are rehashed with the
+profile's hasher on the next successful login.
+
+The hashers below read their cost from settings, so it can be tuned per
+deployment without code changes (``python -m benchmarks login`` shows the
+resulting logins per second per core)::
+
+    PASSWORD_ARGON2_TIME_COST = 2
+    PASSWORD_ARGON2_MEMORY_COST = 65536  # KiB
+    PASSWORD_SCRYPT_WORK_FACTOR = 2**15
+
+Raising a cost makes ``must_update()`` true for older hashes, so they are
+upgraded as users log in.
+
+Hashing is deliberately slow CPU work. :func:`averify_password` and
+:func:`amake_password` run it in a pool of ``PASSWORD_HASH_WORKERS`` threads
+(hashlib and argon2-cffi release the GIL while hashing), so ASGI login views
+don't block the event loop for the duration of a hash.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2id with the cost taken from ``PASSWORD_ARGON2_*`` settings."""
+
+    @property
+    def time_cost(self):
+        return getattr(settings, "PASSWORD_ARGON2_TIME_COST", 2)
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, "PASSWORD_ARGON2_MEMORY_COST", 102400)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, "PASSWORD_ARGON2_PARALLELISM", 8)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """scrypt with the cost taken from ``PASSWORD_SCRYPT_*`` settings."""
+
+    @property
+    def work_factor(self):
+        return getattr(settings, "PASSWORD_SCRYPT_WORK_FACTOR", 2**14)
+
+    @property
+    def block_size(self):
+        return getattr(settings, "PASSWORD_SCRYPT_BLOCK_SIZE", 8)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, "PASSWORD_SCRYPT_PARALLELISM", 1)
+
+    @property
+    def maxmem(self):
+        # hashlib's default (32 MiB) is too small for larger work factors.
+        return 256 * self.work_factor * self.block_size * self.parallelism
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return this process's hashing pool, creating it after a fork."""
+    global _executor, _executor_pid
+
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            workers = getattr(settings, "PASSWORD_HASH_WORKERS", None)
+            _executor = ThreadPoolExecutor(
+                max_workers=workers or os.cpu_count() or 1,
+                thread_name_prefix="password-hash",
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+async def run_in_pool(func, *args):
+    """Await ``func(*args)`` run in the hashing pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), func, *args)
+
+
+async def averify_password(password, encoded, preferred="default"):
+    """Return ``(is_correct, must_update)`` without blocking the event loop."""
+    return await run_in_pool(hashers.verify_password, password, encoded, preferred)
+
+
+async def amake_password(password, salt=None, hasher="default"):
+    return await run_in_pool(hashers.make_password, password, salt, hasher)
@@ -0,0 +1,533 @@
+"""
+Shared client for outbound HTTP calls from views.
+
+One process-wide :class:`HTTPClient` (:func:`get_client`) keeps a pool of
+keep-alive connections per host, so repeated calls to the same service skip
+the TCP and TLS handshakes. It adds:
+
+- a timeout on every call (``HTTP_CLIENT_TIMEOUT``);
+- retries with full-jitter exponential backoff for connection errors and
+  502/503/504 responses to idempotent requests;
+- a circuit breaker per host: after ``HTTP_CLIENT_BREAKER_THRESHOLD``
+  consecutive failures, calls fail fast with :class:`CircuitOpenError` for
+  ``HTTP_CLIENT_BREAKER_RESET`` seconds;
+- concurrent fan-out with :meth:`HTTPClient.gather` (sync views) and
+  :meth:`HTTPClient.agather` (async views), both running on a bounded thread
+  pool, so N calls cost the slowest one rather than their sum;
+- per-host latency metrics (:meth:`HTTPClient.metrics`).
+
+The client uses ``http.client`` only and has no third-party dependencies.
+"""
+
+import asyncio
+import http.client
+import json
+import logging
+import os
+import random
+import ssl
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+# A pooled connection the server has closed fails on first use with one of
+# these; idempotent requests are resent once on a fresh connection.
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+class HTTPError(Exception):
+    """An outbound call failed."""
+
+
+class RequestError(HTTPError):
+    """The request could not be completed (connection error or timeout)."""
+
+
+class PoolTimeoutError(RequestError):
+    """Every pooled connection to the host stayed busy for the whole timeout."""
+
+
+class HTTPStatusError(HTTPError):
+    """The server answered with an error status."""
+
+    def __init__(self, response):
+        super().__init__(f"{response.status} {response.reason} for {response.url}")
+        self.response = response
+
+
+class CircuitOpenError(HTTPError):
+    """Calls to the host are short-circuited after repeated failures."""
+
+
+class Response:
+    """A fully read HTTP response."""
+
+    def __init__(self, url, status, reason, headers, content, elapsed):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return f"<Response [{self.status}] {self.url}>"
+
+    @property
+    def ok(self):
+        return self.status < 400
+
+    @property
+    def text(self):
+        charset = "utf-8"
+        for part in self.headers.get("content-type", "").split(";")[1:]:
+            name, _, value = part.strip().partition("=")
+            if name.lower() == "charset" and value:
+                charset = value.strip('"')
+        return self.content.decode(charset, errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise HTTPStatusError(self)
+        return self
+
+
+class ConnectionPool:
+    """Idle keep-alive connections to one host, at most ``maxsize`` in use."""
+
+    def __init__(self, scheme, host, port, maxsize=10, ssl_context=None):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.idle = deque()
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(maxsize)
+
+    def new_connection(self, timeout):
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(
+                self.host, self.port, timeout=timeout, context=self.ssl_context
+            )
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def acquire(self, timeout):
+        """Return ``(connection, reused)``, waiting up to ``timeout`` for a slot."""
+        if not self.slots.acquire(timeout=timeout):
+            raise PoolTimeoutError(
+                f"No free connection to {self.host} within {timeout}s"
+            )
+        with self.lock:
+            connection = self.idle.pop() if self.idle else None
+        if connection is None:
+            return self.new_connection(timeout), False
+        if connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        return connection, True
+
+    def release(self, connection, reusable):
+        if reusable:
+            with self.lock:
+                self.idle.append(connection)
+        else:
+            connection.close()
+        self.slots.release()
+
+    def close(self):
+        with self.lock:
+            while self.idle:
+                self.idle.pop().close()
+
+
+class CircuitBreaker:
+    """
+    Closed until ``threshold`` consecutive failures, then open for
+    ``reset_timeout`` seconds, then half-open: one trial call decides
+    whether it closes again.
+    """
+
+    def __init__(self, threshold=5, reset_timeout=30.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def allow(self):
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def release_trial(self):
+        """Let another call try the host; this one never reached it."""
+        with self.lock:
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            if self.threshold and (
+                self.opened_at is not None or self.failures >= self.threshold
+            ):
+                self.opened_at = time.monotonic()
+                return True
+        return False
+
+
+class HostMetrics:
+    """Call counts and latency distribution for one host."""
+
+    def __init__(self, window=1000):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.short_circuited = 0
+        self.pool_timeouts = 0
+        self.latencies = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def increment(self, counter):
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def record(self, elapsed, error=False):
+        with self.lock:
+            self.requests += 1
+            self.errors += error
+            self.latencies.append(elapsed)
+
+    def snapshot(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            data = {
+                "requests": self.requests,
+                "errors": self.errors,
+                "retries": self.retries,
+                "short_circuited": self.short_circuited,
+                "pool_timeouts": self.pool_timeouts,
+            }
+        if latencies:
+            data.update(
+                p50_ms=statistics.median(latencies) * 1000,
+                p95_ms=latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+                max_ms=latencies[-1] * 1000,
+            )
+        return data
+
+
+class HTTPClient:
+    """Pooled, retrying, circuit-breaking HTTP client with sync and async calls."""
+
+    def __init__(
+        self,
+        timeout=5.0,
+        retries=2,
+        backoff=0.1,
+        pool_size=10,
+        breaker_threshold=5,
+        breaker_reset=30.0,
+        max_workers=32,
+        user_agent=None,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self.max_workers = max_workers
+        self.user_agent = user_agent or getattr(settings, "PROJECT_NAME", "app")
+        self.ssl_context = ssl.create_default_context()
+        self.pid = os.getpid()
+        self.pools = {}
+        self.breakers = {}
+        self.host_metrics = {}
+        self.lock = threading.Lock()
+        self._executor = None
+
+    @property
+    def executor(self):
+        with self.lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="http-client"
+                )
+            return self._executor
+
+    def _host_state(self, scheme, host, port):
+        key = f"{scheme}://{host}:{port}"
+        with self.lock:
+            if key not in self.pools:
+                self.pools[key] = ConnectionPool(
+                    scheme, host, port, self.pool_size, self.ssl_context
+                )
+                self.breakers[key] = CircuitBreaker(
+                    self.breaker_threshold, self.breaker_reset
+                )
+                self.host_metrics[key] = HostMetrics()
+            return self.pools[key], self.breakers[key], self.host_metrics[key]
+
+    def request(
+        self,
+        method,
+        url,
+        *,
+        params=None,
+        json=None,
+        data=None,
+        headers=None,
+        timeout=None,
+        retries=None,
+    ):
+        """
+        Send a request and return the :class:`Response`.
+
+        Raises :class:`RequestError` when the host cannot be reached in time,
+        :class:`PoolTimeoutError` when no pooled connection frees up in time
+        and :class:`CircuitOpenError` while the host's breaker is open. Error
+        statuses are returned; call :meth:`Response.raise_for_status`.
+        """
+        method = method.upper()
+        parts, target, body, request_headers = self._prepare(
+            url, params, json, data, headers
+        )
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        if method not in IDEMPOTENT_METHODS:
+            retries = 0
+
+        pool, breaker, metrics = self._host_state(parts.scheme, parts.hostname, port)
+        for attempt in range(retries + 1):
+            self._wait_for_attempt(attempt, breaker, metrics, parts.netloc)
+            started = time.perf_counter()
+            try:
+                response = self._send(
+                    pool, method, target, body, request_headers, url, timeout
+                )
+            except PoolTimeoutError:
+                # Local saturation says nothing about the host's health.
+                metrics.increment("pool_timeouts")
+                breaker.release_trial()
+                raise
+            except RequestError:
+                metrics.record(time.perf_counter() - started, error=True)
+                self._failure(breaker, parts.netloc)
+                if attempt == retries:
+                    raise
+                continue
+
+            response.elapsed = time.perf_counter() - started
+            failed = response.status in RETRY_STATUSES
+            metrics.record(response.elapsed, error=failed)
+            if not failed:
+                breaker.record_success()
+                return response
+            self._failure(breaker, parts.netloc)
+            if attempt == retries:
+                return response
+
+    def _wait_for_attempt(self, attempt, breaker, metrics, host):
+        """Fail fast while the circuit is open; back off before retries."""
+        if not breaker.allow():
+            metrics.increment("short_circuited")
+            raise CircuitOpenError(f"Circuit open for {host}")
+        if attempt:
+            metrics.increment("retries")
+            # Full jitter spreads the retries of many callers apart.
+            time.sleep(random.uniform(0, self.backoff * 2**attempt))  # nosec B311
+
+    def _prepare(self, url, params, json, data, headers):
+        """Return the split URL, request target, body and headers to send."""
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported URL: {url!r}")
+        target = parts.path or "/"
+        query = "&".join(filter(None, [parts.query, urlencode(params or {}, True)]))
+        if query:
+            target = f"{target}?{query}"
+
+        body = data
+        request_headers = {"User-Agent": self.user_agent, "Accept-Encoding": "identity"}
+        if json is not None:
+            body = _json_dumps(json)
+            request_headers["Content-Type"] = "application/json"
+        if isinstance(body, str):
+            body = body.encode()
+        request_headers.update(headers or {})
+        return parts, target, body, request_headers
+
+    def _send(self, pool, method, target, body, headers, url, timeout):
+        connection, reused = pool.acquire(timeout)
+        reusable = False
+        try:
+            while True:
+                try:
+                    connection.request(method, target, body=body, headers=headers)
+                    raw = connection.getresponse()
+                    content = raw.read()
+                except STALE_CONNECTION_ERRORS:
+                    # The server may have processed a non-idempotent request
+                    # before closing the connection.
+                    if not reused or method not in IDEMPOTENT_METHODS:
+                        raise
+                    connection.close()
+                    connection, reused = pool.new_connection(timeout), False
+                    continue
+                break
+            reusable = not raw.will_close
+            return Response(
+                url,
+                raw.status,
+                raw.reason,
+                {name.lower(): value for name, value in raw.getheaders()},
+                content,
+                0.0,
+            )
+        except (OSError, http.client.HTTPException) as error:
+            kind = "timed out" if isinstance(error, TimeoutError) else "failed"
+            raise RequestError(f"{method} {url} {kind}: {error}") from error
+        finally:
+            pool.release(connection, reusable)
+
+    def _failure(self, breaker, host):
+        if breaker.record_failure():
+            logger.warning("Circuit opened for %s after repeated failures", host)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    async def arequest(self, method, url, **kwargs):
+        """Async :meth:`request`, run on the client's thread pool."""
+        loop = asyncio.get_running_loop()
+        call = partial(self.request, method, url, **kwargs)
+        return await loop.run_in_executor(self.executor, call)
+
+    async def aget(self, url, **kwargs):
+        return await self.arequest("GET", url, **kwargs)
+
+    async def apost(self, url, **kwargs):
+        return await self.arequest("POST", url, **kwargs)
+
+    def gather(self, *calls, return_exceptions=False):
+        """
+        Run calls concurrently and return their results in order.
+
+        Each call is a URL (GET) or a ``(method, url, kwargs)`` tuple. With
+        ``return_exceptions`` failures are returned in place of responses.
+        """
+        futures = []
+        for call in calls:
+            method, url, kwargs = _call_args(call)
+            futures.append(self.executor.submit(self.request, method, url, **kwargs))
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except HTTPError as error:
+                if not return_exceptions:
+                    raise
+                results.append(error)
+        return results
+
+    async def agather(self, *calls, return_exceptions=False):
+        """Async :meth:`gather`."""
+        requests = []
+        for call in calls:
+            method, url, kwargs = _call_args(call)
+            requests.append(self.arequest(method, url, **kwargs))
+        return await asyncio.gather(*requests, return_exceptions=return_exceptions)
+
+    def metrics(self):
+        """Return ``{host: counts and p50/p95/max latency}``."""
+        with self.lock:
+            hosts = dict(self.host_metrics)
+            breakers = dict(self.breakers)
+        return {
+            host: {**metrics.snapshot(), "circuit": breakers[host].state}
+            for host, metrics in hosts.items()
+        }
+
+    def close(self):
+        with self.lock:
+            pools = list(self.pools.values())
+            executor, self._executor = self._executor, None
+        for pool in pools:
+            pool.close()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+def _json_dumps(value):
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _call_args(call):
+    if isinstance(call, str):
+        return "GET", call, {}
+    return call
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return this process's shared client, creating it after a fork."""
+    global _client
+
+    with _client_lock:
+        if _client is None or _client.pid != os.getpid():
+            _client = HTTPClient(
+                timeout=getattr(settings, "HTTP_CLIENT_TIMEOUT", 5.0),
+                retries=getattr(settings, "HTTP_CLIENT_RETRIES", 2),
+                backoff=getattr(settings, "HTTP_CLIENT_BACKOFF", 0.1),
+                pool_size=getattr(settings, "HTTP_CLIENT_POOL_SIZE", 10),
+                breaker_threshold=getattr(settings, "HTTP_CLIENT_BREAKER_THRESHOLD", 5),
+                breaker_reset=getattr(settings, "HTTP_CLIENT_BREAKER_RESET", 30.0),
+                max_workers=getattr(settings, "HTTP_CLIENT_MAX_WORKERS", 32),
+            )
+        return _client
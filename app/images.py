@@ -0,0 +1,305 @@
+"""
+Resized and re-encoded image variants (WebP/AVIF) with an on-disk cache.
+
+Derivatives of images under ``MEDIA_ROOT`` are rendered on first request
+(``app.views.image_derivative``, linked from ``{% srcset %}``/``{% picture %}``
+in ``app/templatetags/images.py``) or ahead of time with :func:`pregenerate`,
+which uploads call for image files. Rendering runs in a process pool of
+``IMAGE_WORKERS`` processes, so decoding and resampling are not serialized by
+the GIL; ``IMAGE_WORKERS = 0`` renders in the calling thread.
+
+The cache under ``IMAGE_CACHE_DIR`` is content-addressed: a derivative's
+file name is a hash of the source bytes and the rendering parameters, so an
+edited source never reuses stale variants and identical uploads share them.
+Hits refresh the file's mtime; when the cache grows past
+``IMAGE_CACHE_MAX_SIZE`` bytes the least recently used files are removed.
+
+Pillow is optional (``pip install pillow``); without it only the original
+image is linked.
+"""
+
+import functools
+import hashlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+# Format name -> (Pillow format, file extension, MIME type).
+FORMATS = {
+    "avif": ("AVIF", "avif", "image/avif"),
+    "webp": ("WEBP", "webp", "image/webp"),
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+    "png": ("PNG", "png", "image/png"),
+}
+IMAGE_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".webp", ".gif", ".avif"})
+
+# Bumped when rendering changes, so old derivatives are not reused.
+RENDER_VERSION = 1
+
+
+def pillow_available():
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def supported_formats():
+    """Return the configured formats the installed Pillow can write."""
+    if not pillow_available():
+        return []
+    from PIL import features
+
+    return [
+        name
+        for name in getattr(settings, "IMAGE_FORMATS", ["avif", "webp"])
+        if name != "avif" or features.check("avif")
+    ]
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def cache_dir():
+    return Path(_setting("IMAGE_CACHE_DIR", Path(settings.MEDIA_ROOT) / "derivatives"))
+
+
+# Per-source facts by (path, mtime_ns, size): hashing or opening large
+# originals on every page render would cost more than the tags save.
+@functools.lru_cache(maxsize=4096)
+def _source_info(path, mtime_ns, size, compute):
+    return compute(path)
+
+
+def _cached_info(source, compute):
+    stat = os.stat(source)
+    return _source_info(str(source), stat.st_mtime_ns, stat.st_size, compute)
+
+
+def _sha256(source):
+    hasher = hashlib.sha256()
+    with open(source, "rb") as file:
+        while chunk := file.read(1024 * 1024):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def source_digest(source):
+    """Return the SHA-256 of ``source``'s content, cached by mtime and size."""
+    return _cached_info(source, _sha256)
+
+
+def quality(fmt):
+    return _setting("IMAGE_QUALITY", {}).get(fmt, 80)
+
+
+def derivative_path(source, width, fmt):
+    """Return where the ``width``-pixel ``fmt`` variant of ``source`` is cached."""
+    parameters = f"{width}:{fmt}:{quality(fmt)}:{RENDER_VERSION}"
+    key = hashlib.sha256(f"{source_digest(source)}:{parameters}".encode()).hexdigest()
+    return cache_dir() / key[:2] / f"{key}.{FORMATS[fmt][1]}"
+
+
+def _read_size(source):
+    from PIL import Image
+
+    with Image.open(source) as image:
+        return image.size
+
+
+def image_size(source):
+    """Return ``(width, height)`` from the image header, or None without Pillow."""
+    if not pillow_available():
+        return None
+    return _cached_info(source, _read_size)
+
+
+def render(source, target, width, fmt, quality):
+    """
+    Write the ``width``-pixel ``fmt`` variant of ``source`` to ``target``.
+
+    Runs in pool processes, so it takes plain arguments and no settings.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+        if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        target = Path(target)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(f".{target.name}.{os.getpid()}")
+        image.save(partial, FORMATS[fmt][0], quality=quality)
+    os.replace(partial, target)
+    return str(target)
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+# Renders in flight in this process, so concurrent requests share one.
+_pending = {}
+
+
+def get_pool():
+    """Return this process's render pool, or None when rendering inline."""
+    global _pool, _pool_pid
+
+    workers = _setting("IMAGE_WORKERS", 2)
+    if not workers:
+        return None
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # Forking a threaded worker is unsafe; start clean interpreters.
+            _pool = ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def shutdown():
+    """Stop the render pool; called from gunicorn's ``worker_exit`` hook."""
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def submit(source, width, fmt):
+    """
+    Start rendering a derivative unless it is cached; return a future or None.
+
+    The future resolves to the derivative's path.
+    """
+    if not pillow_available():
+        raise ImproperlyConfigured("Image derivatives require Pillow")
+    target = derivative_path(source, width, fmt)
+    if target.exists():
+        return None
+
+    pool = get_pool()
+    if pool is None:
+        render(source, target, width, fmt, quality(fmt))
+        maybe_evict()
+        return None
+    with _pool_lock:
+        future = _pending.get(target)
+        if future is not None:
+            return future
+        future = pool.submit(render, str(source), str(target), width, fmt, quality(fmt))
+        _pending[target] = future
+
+    def done(future):
+        with _pool_lock:
+            _pending.pop(target, None)
+        if future.exception() is not None:
+            logger.warning("Rendering %s failed: %s", target, future.exception())
+        else:
+            maybe_evict()
+
+    future.add_done_callback(done)
+    return future
+
+
+def get_derivative(source, width, fmt, timeout=None):
+    """Return the path of the derivative, rendering it if needed."""
+    future = submit(source, width, fmt)
+    if future is not None:
+        future.result(timeout or _setting("IMAGE_RENDER_TIMEOUT", 30))
+    target = derivative_path(source, width, fmt)
+    try:
+        # The mtime doubles as the last-use time for LRU eviction.
+        os.utime(target)
+    except FileNotFoundError:
+        pass  # Evicted by another process in between; still open-able below.
+    return target
+
+
+def pregenerate(source):
+    """
+    Queue every configured width and format of ``source`` in the background.
+
+    Files that Pillow can't read, whatever their extension, get no derivatives.
+    """
+    if not pillow_available() or Path(source).suffix.lower() not in IMAGE_EXTENSIONS:
+        return []
+    try:
+        size = image_size(source)
+    except OSError as error:
+        logger.warning("Not pregenerating derivatives of %s: %s", source, error)
+        return []
+    futures = []
+    for width in widths_for(size):
+        for fmt in supported_formats():
+            future = submit(source, width, fmt)
+            if future is not None:
+                futures.append(future)
+    return futures
+
+
+def widths_for(size):
+    """Return the configured widths useful for an image of ``size``."""
+    widths = sorted(_setting("IMAGE_WIDTHS", [320, 640, 960, 1280, 1920]))
+    if size is None:
+        return widths
+    # Images are never upscaled: the first width at or above the original's
+    # renders it at full size.
+    smaller = [width for width in widths if width < size[0]]
+    return widths[: len(smaller) + 1]
+
+
+_last_eviction = 0.0
+
+
+def maybe_evict():
+    """Run :func:`evict` at most every ``IMAGE_CACHE_EVICT_INTERVAL`` seconds."""
+    global _last_eviction
+
+    now = time.monotonic()
+    if now - _last_eviction < _setting("IMAGE_CACHE_EVICT_INTERVAL", 60):
+        return
+    _last_eviction = now
+    evict()
+
+
+def evict(max_size=None):
+    """Delete the least recently used derivatives until the cache fits."""
+    max_size = (
+        _setting("IMAGE_CACHE_MAX_SIZE", 1024**3) if max_size is None else max_size
+    )
+    entries = []
+    total = 0
+    for path in cache_dir().glob("*/*"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+        total += stat.st_size
+
+    freed = 0
+    for _, size, path in sorted(entries):
+        if total - freed <= max_size:
+            break
+        path.unlink(missing_ok=True)
+        freed += size
+    if freed:
+        logger.info("Evicted %d bytes of image derivatives", freed)
+    return freed
@@ -0,0 +1,87 @@
+"""
+Django management command to bootstrap the database schema from a snapshot.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from app import schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the schema of an empty database from a checksummed snapshot of "
+        "all migrations, falling back to migrate when no valid snapshot exists"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to bootstrap",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Ignore any existing snapshot and record a new one",
+        )
+        parser.add_argument(
+            "--no-snapshot",
+            action="store_true",
+            help="Do not write a snapshot after migrating",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=10,
+            help="Number of slowest migrations to list",
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        digest = schema.migrations_hash()
+        path = schema.snapshot_path(connection, digest)
+        started = time.perf_counter()
+
+        if connection.introspection.table_names():
+            # Snapshots only describe a database built from scratch.
+            self.stdout.write("Database is not empty, running migrate...")
+            timings, _ = schema.migrate(connection, verbosity=options["verbosity"] - 1)
+            self.report(timings, options["top"], started)
+            return
+
+        statements = None if options["rebuild"] else schema.read_snapshot(path, digest)
+        if statements is not None:
+            schema.replay(connection, statements)
+            # Applies anything the snapshot does not cover (normally nothing)
+            # and runs the post_migrate handlers.
+            schema.migrate(connection)
+            self.stdout.write(
+                f"✅ Schema loaded from {path.name} ({len(statements)} statements) "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+            return
+
+        self.stdout.write(
+            f"No valid snapshot for migrations {digest}, running migrate..."
+        )
+        record = not options["no_snapshot"]
+        timings, statements = schema.migrate(
+            connection, record=record, verbosity=options["verbosity"] - 1
+        )
+        if record:
+            schema.write_snapshot(path, digest, statements)
+            self.stdout.write(f"✅ Snapshot written to {path}")
+        self.report(timings, options["top"], started)
+
+    def report(self, timings, top, started):
+        total = time.perf_counter() - started
+        self.stdout.write(f"Applied {len(timings)} migrations in {total:.2f}s")
+        if not timings:
+            return
+        self.stdout.write(f"Slowest {min(top, len(timings))} migrations:")
+        slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)
+        for name, elapsed in slowest[:top]:
+            self.stdout.write(f"  {elapsed * 1000:8.1f} ms  {name}")
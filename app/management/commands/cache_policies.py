@@ -0,0 +1,80 @@
+"""
+Django management command to list URL routes and their HTTP cache policies.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from app.cache_policy import get_policies
+
+
+def named_routes(patterns, prefix="", namespace=""):
+    """Yield ``(url_name, route)`` for every named pattern, with namespaces."""
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            inner = namespace
+            if pattern.namespace:
+                inner = f"{namespace}{pattern.namespace}:"
+            yield from named_routes(pattern.url_patterns, route, inner)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            yield f"{namespace}{pattern.name}", route
+
+
+class Command(BaseCommand):
+    help = "List named routes with their cache policies and flag uncached ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--exclude",
+            action="append",
+            metavar="NAMESPACE",
+            help="Skip routes in this namespace (default: admin; repeatable)",
+        )
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            help="Only list routes without a policy",
+        )
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help="Fail if any route has no policy or a policy names no route",
+        )
+
+    def handle(self, *args, **options):
+        excluded = tuple(f"{name}:" for name in options["exclude"] or ["admin"])
+        policies = get_policies()
+        routes = {
+            name: route
+            for name, route in named_routes(get_resolver().url_patterns)
+            if not name.startswith(excluded)
+        }
+
+        uncached = sorted(name for name in routes if name not in policies)
+        width = max(map(len, routes), default=0)
+        for name in sorted(routes):
+            policy = policies.get(name)
+            if policy is None:
+                self.stdout.write(f"⚠️  {name:<{width}}  /{routes[name]}  (no policy)")
+            elif not options["missing"]:
+                self.stdout.write(
+                    f"✅ {name:<{width}}  /{routes[name]}  {policy.cache_control()}"
+                )
+
+        unknown = sorted(
+            name
+            for name in policies
+            if name not in routes and not name.startswith(excluded)
+        )
+        for name in unknown:
+            self.stdout.write(f"❌ Policy for unknown URL name: {name}")
+
+        self.stdout.write(
+            f"\n{len(routes) - len(uncached)} of {len(routes)} routes have a policy"
+        )
+        if options["strict"] and (uncached or unknown):
+            raise CommandError(
+                f"{len(uncached)} routes without a policy, "
+                f"{len(unknown)} policies for unknown routes"
+            )
@@ -0,0 +1,129 @@
+"""
+Django management command to summarise worker memory snapshots.
+"""
+
+import json
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app.memory import SNAPSHOT_SUFFIX, STATS_SUFFIX
+
+
+def _format_size(size):
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+class Command(BaseCommand):
+    help = "Show top allocation sites and per-view RSS growth of profiled workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dir",
+            type=Path,
+            default=None,
+            help="Snapshot directory (defaults to MEMORY_PROFILING_DIR)",
+        )
+        parser.add_argument(
+            "--pid",
+            type=int,
+            help="Only report on this worker process",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=15,
+            help="Number of allocation sites to show",
+        )
+        parser.add_argument(
+            "--group-by",
+            choices=["lineno", "filename", "traceback"],
+            default="lineno",
+            help="How to group allocations",
+        )
+        parser.add_argument(
+            "--compare",
+            action="store_true",
+            help="Show growth between each worker's first and last snapshot",
+        )
+
+    def handle(self, *args, **options):
+        directory = options["dir"] or Path(settings.MEMORY_PROFILING_DIR)
+        if not directory.is_dir():
+            raise CommandError(f"No memory snapshots found in {directory}")
+
+        snapshots = self.collect_snapshots(directory, options["pid"])
+        stats_files = sorted(directory.glob(f"*{STATS_SUFFIX}"))
+        if options["pid"]:
+            stats_files = [
+                path
+                for path in stats_files
+                if path.name == f"{options['pid']}{STATS_SUFFIX}"
+            ]
+        if not snapshots and not stats_files:
+            raise CommandError(f"No memory snapshots found in {directory}")
+
+        for path in stats_files:
+            self.report_views(json.loads(path.read_text()))
+
+        for pid, paths in sorted(snapshots.items()):
+            self.report_snapshots(pid, paths, options)
+
+    def collect_snapshots(self, directory, only_pid):
+        """Return ``{pid: [snapshot paths, oldest first]}``."""
+        snapshots = {}
+        for path in directory.glob(f"*{SNAPSHOT_SUFFIX}"):
+            pid, _, taken_at = path.stem.partition("-")
+            if not pid.isdigit() or (only_pid and int(pid) != only_pid):
+                continue
+            snapshots.setdefault(int(pid), []).append((float(taken_at), path))
+        return {
+            pid: [path for _, path in sorted(entries)]
+            for pid, entries in snapshots.items()
+        }
+
+    def report_views(self, data):
+        growth = data["rss"] - data["baseline_rss"]
+        self.stdout.write(
+            f"\nWorker {data['pid']}: {data['requests']} sampled requests, "
+            f"RSS {_format_size(data['rss'])} ({_format_size(growth)} since start)"
+        )
+        views = sorted(
+            data["views"].items(),
+            key=lambda item: item[1]["total_delta"],
+            reverse=True,
+        )
+        for name, stats in views:
+            average = stats["total_delta"] / stats["requests"]
+            self.stdout.write(
+                f"  {name}: {stats['requests']} requests, "
+                f"total {_format_size(stats['total_delta'])}, "
+                f"avg {_format_size(average)}, "
+                f"max {_format_size(stats['max_delta'])}"
+            )
+
+    def report_snapshots(self, pid, paths, options):
+        latest = tracemalloc.Snapshot.load(str(paths[-1]))
+        group_by = options["group_by"]
+
+        if options["compare"] and len(paths) > 1:
+            first = tracemalloc.Snapshot.load(str(paths[0]))
+            self.stdout.write(
+                f"\nWorker {pid}: top {options['top']} growing allocation sites "
+                f"({paths[0].name} -> {paths[-1].name})"
+            )
+            for stat in latest.compare_to(first, group_by)[: options["top"]]:
+                self.stdout.write(f"  {stat}")
+            return
+
+        self.stdout.write(
+            f"\nWorker {pid}: top {options['top']} allocation sites ({paths[-1].name})"
+        )
+        for stat in latest.statistics(group_by)[: options["top"]]:
+            self.stdout.write(f"  {stat}")
@@ -0,0 +1,100 @@
+"""
+Django management command to merge request profiles per URL name.
+"""
+
+import json
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from app.profiling import (
+    EXTENSIONS,
+    parse_collapsed,
+    parse_speedscope,
+    to_collapsed,
+    to_speedscope,
+)
+
+
+class Command(BaseCommand):
+    help = "Merge sampled request profiles into one flamegraph-ready file per URL"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dir",
+            type=Path,
+            default=None,
+            help="Profile directory (defaults to PROFILING_DIR)",
+        )
+        parser.add_argument(
+            "--output",
+            type=Path,
+            default=None,
+            help="Where to write merged profiles (defaults to <dir>/merged)",
+        )
+        parser.add_argument(
+            "--url-name",
+            help="Only merge profiles of this URL name",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=10,
+            help="Number of hottest frames to list per URL name",
+        )
+        parser.add_argument(
+            "--speedscope",
+            action="store_true",
+            help="Also write speedscope JSON documents",
+        )
+
+    def handle(self, *args, **options):
+        directory = options["dir"] or Path(settings.PROFILING_DIR)
+        output = options["output"] or directory / "merged"
+
+        interval = getattr(settings, "PROFILING_INTERVAL", 0.005)
+        merged = self.load(directory, options["url_name"], interval)
+        if not merged:
+            raise CommandError(f"No profiles found in {directory}")
+
+        output.mkdir(parents=True, exist_ok=True)
+        for name, (count, stacks) in sorted(merged.items()):
+            (output / f"{name}.collapsed").write_text(to_collapsed(stacks))
+            if options["speedscope"]:
+                document = to_speedscope(name, stacks, interval)
+                (output / f"{name}.speedscope.json").write_text(json.dumps(document))
+            self.report(name, count, stacks, options["top"])
+
+        self.stdout.write(f"\n✅ Merged profiles written to {output}")
+
+    def load(self, directory, only_name, interval):
+        """Return ``{url_name: (profile count, Counter of stacks)}``."""
+        merged = {}
+        for path in sorted(directory.glob("*")):
+            if not path.is_file():
+                continue
+            name = path.name.split(".", 1)[0]
+            if only_name and name != only_name:
+                continue
+            if path.name.endswith(EXTENSIONS["speedscope"]):
+                stacks = parse_speedscope(json.loads(path.read_text()), interval)
+            elif path.name.endswith(EXTENSIONS["collapsed"]):
+                stacks = parse_collapsed(path.read_text())
+            else:
+                continue
+            count, total = merged.get(name, (0, Counter()))
+            total.update(stacks)
+            merged[name] = (count + 1, total)
+        return merged
+
+    def report(self, name, count, stacks, top):
+        samples = sum(stacks.values())
+        own = Counter()
+        for stack, hits in stacks.items():
+            own[stack[-1]] += hits
+
+        self.stdout.write(f"\n{name}: {count} profiles, {samples} samples")
+        for frame, hits in own.most_common(top):
+            self.stdout.write(f"  {hits / samples:6.1%}  {frame}")
@@ -0,0 +1,26 @@
+"""
+Django management command to run the local pub/sub broker.
+"""
+
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from app.pubsub import start_broker
+
+
+class Command(BaseCommand):
+    help = "Run the TCP pub/sub broker that fans messages out across workers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1", help="Address to bind")
+        parser.add_argument("--port", type=int, default=7379, help="Port to bind")
+
+    def handle(self, *args, **options):
+        asyncio.run(self.serve(options["host"], options["port"]))
+
+    async def serve(self, host, port):
+        server = await start_broker(host, port)
+        self.stdout.write(f"📡 Pub/sub broker listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
@@ -0,0 +1,59 @@
+"""
+Django management command to rebuild full-text search indexes in batches.
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from app import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search index of registered models"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "models",
+            nargs="*",
+            metavar="app_label.Model",
+            help="Models to reindex (default: all registered models)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Rows per batch (defaults to SEARCH_REBUILD_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--recreate",
+            action="store_true",
+            help="Drop and recreate the index tables (after changing fields)",
+        )
+
+    def handle(self, *args, **options):
+        registered = search.registered_models()
+        models = registered
+        if options["models"]:
+            try:
+                models = [apps.get_model(label) for label in options["models"]]
+            except (LookupError, ValueError) as exc:
+                raise CommandError(exc) from None
+            unknown = [model for model in models if model not in registered]
+            if unknown:
+                raise CommandError(
+                    f"Not registered for search: {unknown[0]._meta.label}"
+                )
+        if not models:
+            self.stdout.write("⚠️  No models are registered for search")
+            return
+
+        for model in models:
+            label = model._meta.label
+            self.stdout.write(f"🔎 Indexing {label}...")
+            total = search.rebuild(
+                model,
+                batch_size=options["batch_size"],
+                recreate=options["recreate"],
+                progress=lambda count: self.stdout.write(f"   {count} rows"),
+            )
+            self.stdout.write(f"✅ {label}: {total} rows indexed")
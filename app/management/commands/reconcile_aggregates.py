@@ -0,0 +1,49 @@
+"""
+Django management command to recompute materialized aggregates and fix drift.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from app import aggregates
+
+
+class Command(BaseCommand):
+    help = "Recompute materialized aggregates from their tables and fix drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "names",
+            nargs="*",
+            help="Aggregates to reconcile (default: all registered)",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report drift, and fail if there is any",
+        )
+
+    def handle(self, *args, **options):
+        names = options["names"] or aggregates.registered()
+        if not names:
+            self.stdout.write("⚠️  No materialized aggregates are registered")
+            return
+
+        drifted = 0
+        for name in names:
+            try:
+                drift = aggregates.reconcile(name, fix=not options["check"])
+            except ImproperlyConfigured as exc:
+                raise CommandError(exc) from None
+            if not drift:
+                self.stdout.write(f"✅ {name}")
+                continue
+            drifted += 1
+            self.stdout.write(f"❌ {name}: {len(drift)} groups drifted")
+            for group, stored, actual in drift[:10]:
+                self.stdout.write(f"   [{group}] stored {stored}, actual {actual}")
+
+        if drifted and options["check"]:
+            raise CommandError(f"{drifted} aggregates have drifted")
+        if drifted:
+            self.stdout.write(f"\n🔧 Fixed {drifted} aggregates")
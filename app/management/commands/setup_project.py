@@ -2,11 +2,15 @@
 Django management command to setup the project.
 """
 
+import time
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
+from app import seeding
+
 
 class Command(BaseCommand):
     help = "Setup the project with initial data and configuration"
@@ -27,6 +31,36 @@ class Command(BaseCommand):
             type=str,
             help="Email for superuser (non-interactive)",
         )
+        parser.add_argument(
+            "--seed",
+            action="store_true",
+            help="Bulk-load synthetic data from the SEEDERS setting",
+        )
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=1.0,
+            help="Seed data volume multiplier (1.0 = 1000 users)",
+        )
+        parser.add_argument(
+            "--seed-fixture",
+            action="append",
+            default=[],
+            metavar="PATH",
+            help="Bulk-load a fixture file (repeatable)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Rows per INSERT when seeding",
+        )
+        parser.add_argument(
+            "--random-seed",
+            type=int,
+            default=0,
+            help="Random seed for synthetic data",
+        )
 
     def handle(self, *args, **options):
         self.stdout.write("🚀 Setting up Django project...")
@@ -50,6 +84,9 @@ class Command(BaseCommand):
         if options["create_superuser"]:
             self.create_superuser(options)
 
+        if options["seed"] or options["seed_fixture"]:
+            self.seed(options)
+
         self.stdout.write("✅ Project setup completed!")
 
     @transaction.atomic
@@ -80,3 +117,23 @@ class Command(BaseCommand):
             from django.core.management import call_command
 
             call_command("createsuperuser")
+
+    def seed(self, options):
+        """Bulk-load fixtures and synthetic data."""
+        started = time.perf_counter()
+        for path in options["seed_fixture"]:
+            loaded = seeding.load_fixture(path, batch_size=options["batch_size"])
+            for label, count in loaded.items():
+                self.stdout.write(f"✅ {path}: {count} {label} objects")
+
+        if options["seed"]:
+            self.stdout.write(f"🌱 Seeding at scale {options['scale']}...")
+            created = seeding.seed(
+                scale=options["scale"],
+                batch_size=options["batch_size"],
+                random_seed=options["random_seed"],
+            )
+            for label, count in created.items():
+                note = "" if count else " (already seeded)"
+                self.stdout.write(f"✅ {label}: {count} rows created{note}")
+        self.stdout.write(f"⏱️  Seeding took {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,171 @@
+"""
+Memory instrumentation for long-running workers.
+
+When ``MEMORY_PROFILING`` is enabled each worker process:
+
+- samples its resident set size (RSS) before and after requests and keeps
+  per-view growth statistics (``MemoryProfilingMiddleware``);
+- traces allocations with ``tracemalloc`` and dumps a snapshot every
+  ``MEMORY_PROFILING_SNAPSHOT_INTERVAL`` seconds, on ``SIGUSR2`` and when the
+  worker exits (see ``app/gunicorn_conf.py``).
+
+Snapshots and per-view statistics are written to ``MEMORY_PROFILING_DIR`` and
+summarised by ``python manage.py memory_report``.
+"""
+
+import json
+import logging
+import os
+import resource
+import signal
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SUFFIX = ".tracemalloc"
+STATS_SUFFIX = "-views.json"
+
+# Allocations made by the profiler itself are noise in every report.
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss():
+    """
+    Return the current resident set size of this process in bytes.
+
+    Reads ``/proc/self/statm`` on Linux. Elsewhere falls back to the peak RSS
+    from ``getrusage``, which only ever grows but still exposes leaks.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+class MemoryProfiler:
+    """Per-process RSS statistics and tracemalloc snapshots."""
+
+    def __init__(self, directory, snapshot_interval=300, frames=5):
+        self.directory = Path(directory)
+        self.snapshot_interval = snapshot_interval
+        self.frames = frames
+        self.pid = os.getpid()
+        self.started_at = time.time()
+        self.baseline_rss = current_rss()
+        self.last_snapshot = time.monotonic()
+        self.requests = 0
+        self.views = {}
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Start tracing allocations, if not already tracing."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def record_request(self, view_name, rss_delta):
+        """Account ``rss_delta`` bytes of growth to ``view_name``."""
+        with self.lock:
+            self.requests += 1
+            stats = self.views.setdefault(
+                view_name, {"requests": 0, "total_delta": 0, "max_delta": 0}
+            )
+            stats["requests"] += 1
+            stats["total_delta"] += rss_delta
+            stats["max_delta"] = max(stats["max_delta"], rss_delta)
+            due = time.monotonic() - self.last_snapshot >= self.snapshot_interval
+            if due:
+                self.last_snapshot = time.monotonic()
+
+        if due:
+            self.take_snapshot()
+
+    def take_snapshot(self):
+        """Dump a tracemalloc snapshot and the view statistics to disk."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = None
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+            path = self.directory / f"{self.pid}-{time.time_ns()}{SNAPSHOT_SUFFIX}"
+            snapshot.dump(str(path))
+        self.write_stats()
+        logger.info("Memory snapshot written for worker %s: %s", self.pid, path)
+        return path
+
+    def write_stats(self):
+        with self.lock:
+            data = {
+                "pid": self.pid,
+                "started_at": self.started_at,
+                "written_at": time.time(),
+                "baseline_rss": self.baseline_rss,
+                "rss": current_rss(),
+                "requests": self.requests,
+                "views": dict(self.views),
+            }
+        path = self.directory / f"{self.pid}{STATS_SUFFIX}"
+        path.write_text(json.dumps(data, indent=2))
+        return path
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler():
+    """Return this process's profiler, creating it after a fork."""
+    global _profiler
+
+    with _profiler_lock:
+        if _profiler is None or _profiler.pid != os.getpid():
+            _profiler = MemoryProfiler(
+                settings.MEMORY_PROFILING_DIR,
+                snapshot_interval=settings.MEMORY_PROFILING_SNAPSHOT_INTERVAL,
+                frames=settings.MEMORY_PROFILING_TRACEMALLOC_FRAMES,
+            )
+        return _profiler
+
+
+_snapshot_requested = threading.Event()
+
+
+def _take_requested_snapshots():
+    while True:
+        _snapshot_requested.wait()
+        _snapshot_requested.clear()
+        try:
+            get_profiler().take_snapshot()
+        except Exception:
+            logger.exception("Memory snapshot failed")
+
+
+def install_signal_handler(signum=signal.SIGUSR2):
+    """
+    Dump a snapshot when the process receives ``signum``.
+
+    The signal interrupts the main thread, possibly while it holds one of the
+    profiler's locks, so the handler only sets an event and a helper thread
+    takes the snapshot.
+    """
+    threading.Thread(
+        target=_take_requested_snapshots, name="memory-snapshots", daemon=True
+    ).start()
+
+    def handle(received, frame):
+        _snapshot_requested.set()
+
+    return signal.signal(signum, handle)
@@ -0,0 +1,174 @@
+"""
+Middleware for the Django project.
+"""
+
+import logging
+import random
+
+from django.conf import settings
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import cache_policy, memory, preload, request_cache, template_profiler
+
+logger = logging.getLogger(__name__)
+
+
+class CachePolicyMiddleware:
+    """
+    Apply the cache policy declared for the matched URL name.
+
+    See ``app/cache_policy.py``. Place it before the session, CSRF and auth
+    middleware so it sees the ``Vary`` headers and cookies they add.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        match = getattr(request, "resolver_match", None)
+        policy = match and cache_policy.get_policy(match.view_name)
+        if policy:
+            cache_policy.apply(policy, request, response)
+        return response
+
+
+class RequestCacheMiddleware:
+    """
+    Give every request its own ``app.request_cache`` scope.
+
+    Works natively under both WSGI and ASGI, so async requests are not
+    pushed through a thread to open the scope.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with request_cache.request_scope():
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        with request_cache.request_scope():
+            return await self.get_response(request)
+
+
+class PreloadMiddleware:
+    """
+    Add ``Link: rel=preload`` headers for the static assets of HTML pages.
+
+    See ``app/preload.py``. Place it after ``RequestCacheMiddleware``, whose
+    scope collects the assets a view renders.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.add_links(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.add_links(request, await self.get_response(request))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        request.preload_view = (view_func, view_name)
+        preload.start(view_name)
+
+    def add_links(self, request, response):
+        view = getattr(request, "preload_view", None)
+        content_type = response.get("Content-Type", "")
+        if view is None or response.status_code != 200:
+            return response
+        if not content_type.startswith("text/html"):
+            return response
+        links = preload.links_for_view(*view)
+        if links:
+            existing = response.get("Link")
+            response["Link"] = ", ".join([existing, *links] if existing else links)
+        return response
+
+
+class TemplateProfilerMiddleware:
+    """
+    Report per-block template render times for each response.
+
+    Adds a ``Server-Timing`` header and logs the slowest blocks at DEBUG
+    level. Only installed when ``TEMPLATE_PROFILING`` is enabled.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        template_profiler.install()
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        timings = template_profiler.get_timings(request)
+        if timings:
+            response["Server-Timing"] = template_profiler.server_timing(timings)
+            slowest = sorted(
+                timings.items(), key=lambda item: item[1]["duration"], reverse=True
+            )
+            logger.debug(
+                "Template timings for %s: %s",
+                request.path,
+                ", ".join(
+                    f"{name}={entry['duration'] * 1000:.2f}ms"
+                    for name, entry in slowest
+                ),
+            )
+        return response
+
+
+class MemoryProfilingMiddleware:
+    """
+    Sample per-request RSS growth and keep per-view statistics.
+
+    Starts tracemalloc in the worker and lets the profiler dump periodic
+    snapshots. Only installed when ``MEMORY_PROFILING`` is enabled; place it
+    first so the whole middleware stack is measured.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.MEMORY_PROFILING_SAMPLE_RATE
+        self.log_threshold = settings.MEMORY_PROFILING_LOG_THRESHOLD_KB * 1024
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:  # nosec B311
+            return self.get_response(request)
+
+        profiler = memory.get_profiler()
+        profiler.start()
+        before = memory.current_rss()
+        response = self.get_response(request)
+        delta = memory.current_rss() - before
+
+        match = getattr(request, "resolver_match", None)
+        view_name = (match and match.view_name) or request.path
+        profiler.record_request(view_name, delta)
+        if delta >= self.log_threshold:
+            logger.warning(
+                "RSS grew by %d KiB while handling %s (%s)",
+                delta // 1024,
+                view_name,
+                request.path,
+            )
+        return response
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.3 on 2026-10-19 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="MaterializedAggregate",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("group", models.CharField(blank=True, default="", max_length=255)),
+                (
+                    "value",
+                    models.DecimalField(decimal_places=8, default=0, max_digits=32),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("name", "group"), name="unique_aggregate_group"
+                    )
+                ],
+            },
+        ),
+    ]
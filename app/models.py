@@ -0,0 +1,28 @@
+"""
+Models for the main Django application.
+"""
+
+from django.db import models
+
+
+class MaterializedAggregate(models.Model):
+    """
+    The stored value of one group of a materialized aggregate.
+
+    Maintained by ``app.aggregates``; not meant to be edited by hand.
+    """
+
+    name = models.CharField(max_length=100)
+    group = models.CharField(max_length=255, blank=True, default="")
+    value = models.DecimalField(max_digits=32, decimal_places=8, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["name", "group"], name="unique_aggregate_group"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.name}[{self.group}] = {self.value}"
@@ -0,0 +1,135 @@
+"""
+Preload ``Link`` headers and 103 Early Hints for static assets.
+
+Pages list their stylesheets and scripts in the HTML, so the browser only
+starts fetching them once it has parsed that far. This module announces them
+earlier:
+
+- ``app.middleware.PreloadMiddleware`` adds a ``Link: <...>; rel=preload``
+  header to HTML responses. The header lists the assets the view declares
+  with :func:`preload_static` and the CSS, JS and fonts it referenced through
+  ``{% static %}`` while rendering (learned per view, up to
+  ``PRELOAD_MAX_LINKS``);
+- :class:`EarlyHintsMiddleware` wraps the ASGI application and, when the
+  server supports the ``http.response.early_hint`` extension (e.g.
+  Hypercorn), sends the same links in a ``103 Early Hints`` response before
+  the view runs. The browser then fetches CSS and JS while the HTML is
+  still being generated. ``PRELOAD_EARLY_HINTS = False`` turns this off.
+
+Assets are learned from earlier renders, so the first request to a view
+after a worker starts only has its declared assets in the early hints::
+
+    @preload_static("css/main.css", "js/main.js")
+    def home(request): ...
+
+WSGI servers, gunicorn included, can't send 103 responses. There the
+``Link`` header still lets CDNs and proxies that turn it into early hints
+(e.g. Cloudflare) do so.
+"""
+
+import functools
+import posixpath
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.urls import Resolver404, resolve
+
+from . import request_cache
+
+AS_TYPES = {
+    ".css": "style",
+    ".js": "script",
+    ".mjs": "script",
+    ".woff2": "font",
+    ".woff": "font",
+}
+
+_VIEW_KEY = "preload:view"
+
+# view name -> {url: link}, in first-seen order
+_learned = {}
+
+
+def preload_static(*names):
+    """Declare static files (``{% static %}`` names) a view should preload."""
+
+    def decorator(view):
+        view.preload_static = names
+        return view
+
+    return decorator
+
+
+@functools.lru_cache(maxsize=1024)
+def link_for(url):
+    """Return the ``Link`` value preloading ``url``, or None if not preloadable."""
+    extension = posixpath.splitext(url.split("?", 1)[0].split("#", 1)[0])[1]
+    as_type = AS_TYPES.get(extension.lower())
+    if as_type is None:
+        return None
+    link = f"<{url}>; rel=preload; as={as_type}"
+    # Fonts are always fetched in CORS mode; the preload must match.
+    return f"{link}; crossorigin" if as_type == "font" else link
+
+
+def start(view_name):
+    """Collect the assets rendered for ``view_name`` in this request."""
+    request_cache.store(_VIEW_KEY, view_name)
+
+
+def collect(url):
+    """Record a static URL generated while rendering; called by the storage."""
+    view_name = request_cache.get(_VIEW_KEY)
+    if view_name is None:
+        return
+    links = _learned.setdefault(view_name, {})
+    if url not in links and len(links) < _max_links():
+        link = link_for(url)
+        if link is not None:
+            links[url] = link
+
+
+def _max_links():
+    return getattr(settings, "PRELOAD_MAX_LINKS", 8)
+
+
+def links_for_view(view_func, view_name):
+    """Return the ``Link`` values for a view: declared assets, then learned ones."""
+    links = {}
+    for name in getattr(view_func, "preload_static", ()):
+        url = staticfiles_storage.url(name)
+        links[url] = link_for(url) or f"<{url}>; rel=preload"
+    # A copy: other threads may be adding to it.
+    for url, link in _learned.get(view_name, {}).copy().items():
+        links.setdefault(url, link)
+    return list(links.values())[: _max_links()]
+
+
+class EarlyHintsMiddleware:
+    """ASGI wrapper sending ``103 Early Hints`` for the requested view."""
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] == "http"
+            and scope.get("method") in ("GET", "HEAD")
+            and "http.response.early_hint" in scope.get("extensions", {})
+            and getattr(settings, "PRELOAD_EARLY_HINTS", True)
+        ):
+            path = scope["path"].removeprefix(scope.get("root_path", ""))
+            try:
+                match = resolve(path or "/")
+            except Resolver404:
+                match = None
+            if match is not None:
+                links = links_for_view(match.func, match.view_name)
+                if links:
+                    await send(
+                        {
+                            "type": "http.response.early_hint",
+                            "links": [link.encode("latin-1") for link in links],
+                        }
+                    )
+        return await self.application(scope, receive, send)
@@ -0,0 +1,316 @@
+"""
+Sampling CPU profiler for production requests.
+
+The WSGI and ASGI entry points (``app/wsgi.py``, ``app/asgi.py``) are wrapped
+so that selected requests are profiled by a background thread that samples
+Python stacks every ``PROFILING_INTERVAL`` seconds. Sampling costs a few
+percent of one core while a profile is running and nothing otherwise.
+
+A request is profiled when either:
+
+- a random draw falls under ``PROFILING_SAMPLE_RATE`` (0.0 to 1.0), or
+- it carries the ``PROFILING_HEADER`` header (``X-Profile`` by default) set to
+  ``PROFILING_TOKEN``. The header trigger is disabled while no token is set.
+
+Each profile is written to ``PROFILING_DIR`` as ``<url_name>.<ns>.<pid>.<ext>``
+in collapsed-stack format (``collapsed``, for flamegraph.pl/inferno) or as a
+speedscope JSON document (``speedscope``), per ``PROFILING_FORMAT``.
+``python manage.py merge_profiles`` merges them per URL name.
+
+Under ASGI every thread is sampled, including the event loop, so concurrent
+requests on the same worker show up in each other's profiles.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger(__name__)
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+EXTENSIONS = {"collapsed": "collapsed", "speedscope": "speedscope.json"}
+
+
+_labels: dict = {}
+
+
+def _frame_label(code):
+    label = _labels.get(code)
+    if label is None:
+        filename = code.co_filename
+        for path in sorted(filter(None, sys.path), key=len, reverse=True):
+            if filename.startswith(path):
+                filename = filename[len(path) :].lstrip(os.sep)
+                break
+        # ';' separates frames in the collapsed format.
+        label = f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+        label = _labels[code] = label.replace(";", ":")
+    return label
+
+
+class Sampler:
+    """
+    Sample the Python stacks of some (or all) threads in the background.
+
+    ``thread_ids`` limits sampling to those threads; ``None`` samples every
+    thread except the sampler itself.
+    """
+
+    def __init__(self, thread_ids=None, interval=0.005):
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._started_at = 0.0
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, name="profiling-sampler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - self._started_at
+        return self
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+
+def to_collapsed(stacks):
+    """Render ``{stack: count}`` in flamegraph.pl's collapsed format."""
+    return "".join(
+        f"{';'.join(stack)} {count}\n" for stack, count in stacks.items() if stack
+    )
+
+
+def parse_collapsed(text):
+    """Parse collapsed-format ``text`` back into a ``Counter`` of stacks."""
+    stacks = Counter()
+    for line in text.splitlines():
+        stack, _, count = line.rpartition(" ")
+        if stack and count.isdigit():
+            stacks[tuple(stack.split(";"))] += int(count)
+    return stacks
+
+
+def to_speedscope(name, stacks, interval):
+    """Render ``{stack: count}`` as a speedscope "sampled" profile document."""
+    frames = []
+    index = {}
+    samples = []
+    weights = []
+    for stack, count in stacks.items():
+        sample = []
+        for label in stack:
+            if label not in index:
+                index[label] = len(frames)
+                frames.append({"name": label})
+            sample.append(index[label])
+        samples.append(sample)
+        weights.append(count * interval)
+
+    return {
+        "$schema": SPEEDSCOPE_SCHEMA,
+        "name": name,
+        "exporter": "app.profiling",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+    }
+
+
+def parse_speedscope(document, interval):
+    """
+    Return a ``Counter`` of stacks from a speedscope "sampled" document whose
+    weights are seconds sampled every ``interval`` seconds.
+    """
+    frames = [frame["name"] for frame in document["shared"]["frames"]]
+    stacks = Counter()
+    for profile in document["profiles"]:
+        for sample, weight in zip(profile["samples"], profile["weights"]):
+            stacks[tuple(frames[i] for i in sample)] += round(weight / interval)
+    return stacks
+
+
+def url_name_for(path):
+    """Return the URL name (or view name) that ``path`` resolves to."""
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return "unresolved"
+    return match.view_name or match.url_name or "unnamed"
+
+
+def safe_name(name):
+    return re.sub(r"[^A-Za-z0-9_-]", "_", name)
+
+
+class ProfileSettings:
+    """Profiling settings, read once per wrapped application."""
+
+    def __init__(self):
+        self.sample_rate = getattr(settings, "PROFILING_SAMPLE_RATE", 0.0)
+        self.header = getattr(settings, "PROFILING_HEADER", "X-Profile")
+        self.token = getattr(settings, "PROFILING_TOKEN", "")
+        self.interval = getattr(settings, "PROFILING_INTERVAL", 0.005)
+        self.directory = Path(getattr(settings, "PROFILING_DIR", "logs/profiles"))
+        self.format = getattr(settings, "PROFILING_FORMAT", "collapsed")
+
+    @property
+    def active(self):
+        return self.sample_rate > 0 or bool(self.token)
+
+    def wants(self, header_value):
+        if self.token and header_value is not None:
+            if secrets.compare_digest(header_value.encode(), self.token.encode()):
+                return True
+        return random.random() < self.sample_rate  # nosec B311
+
+    def write(self, path_info, sampler):
+        """Write ``sampler``'s profile for the request to ``path_info``."""
+        if not sampler.stacks:
+            return None
+
+        name = url_name_for(path_info)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        filename = f"{safe_name(name)}.{time.time_ns()}.{os.getpid()}"
+        path = self.directory / f"{filename}.{EXTENSIONS[self.format]}"
+        if self.format == "speedscope":
+            document = to_speedscope(name, sampler.stacks, sampler.interval)
+            path.write_text(json.dumps(document))
+        else:
+            path.write_text(to_collapsed(sampler.stacks))
+
+        logger.info(
+            "Profiled %s (%s): %d samples in %.1f ms -> %s",
+            path_info,
+            name,
+            sampler.samples,
+            sampler.duration * 1000,
+            path.name,
+        )
+        return path
+
+
+class ProfilingWSGIMiddleware:
+    """WSGI wrapper profiling the request thread of selected requests."""
+
+    def __init__(self, application):
+        self.application = application
+        self.profile_settings = ProfileSettings()
+        self.environ_key = "HTTP_" + self.profile_settings.header.upper().replace(
+            "-", "_"
+        )
+
+    def __call__(self, environ, start_response):
+        config = self.profile_settings
+        if not config.active or not config.wants(environ.get(self.environ_key)):
+            return self.application(environ, start_response)
+
+        sampler = Sampler([threading.get_ident()], config.interval).start()
+
+        def finish():
+            sampler.stop()
+            try:
+                config.write(environ.get("PATH_INFO", "/"), sampler)
+            except Exception:
+                logger.exception("Could not write request profile")
+
+        try:
+            response = self.application(environ, start_response)
+        except BaseException:
+            finish()
+            raise
+        # Streamed bodies render while the server iterates the response.
+        return ProfiledResponse(response, finish)
+
+
+class ProfiledResponse:
+    """A WSGI response calling ``finish()`` once the server has closed it."""
+
+    def __init__(self, iterable, finish):
+        self.iterable = iterable
+        self.finish = finish
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def close(self):
+        try:
+            if hasattr(self.iterable, "close"):
+                self.iterable.close()
+        finally:
+            self.finish()
+
+
+class ProfilingASGIMiddleware:
+    """ASGI wrapper profiling selected HTTP requests."""
+
+    def __init__(self, application):
+        self.application = application
+        self.profile_settings = ProfileSettings()
+        self.header = self.profile_settings.header.lower().encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        config = self.profile_settings
+        if scope["type"] != "http" or not config.active:
+            return await self.application(scope, receive, send)
+
+        header_value = None
+        for name, value in scope.get("headers", []):
+            if name == self.header:
+                header_value = value.decode("latin-1")
+        if not config.wants(header_value):
+            return await self.application(scope, receive, send)
+
+        sampler = Sampler(None, config.interval).start()
+        try:
+            return await self.application(scope, receive, send)
+        finally:
+            await asyncio.to_thread(sampler.stop)
+            try:
+                await asyncio.to_thread(config.write, scope["path"], sampler)
+            except Exception:
+                logger.exception("Could not write request profile")
@@ -0,0 +1,174 @@
+"""
+Access-controlled file serving delegated to the front-end server.
+
+Views decide whether a request may see a file; :func:`serve` then answers
+without streaming the bytes through Python when it can:
+
+- ``PROTECTED_MEDIA_BACKEND = "nginx"``: an empty response with
+  ``X-Accel-Redirect: {PROTECTED_MEDIA_INTERNAL_URL}<path>``; nginx serves
+  the file from an ``internal`` location, including range requests;
+- ``"sendfile"``: ``X-Sendfile: <absolute path>`` for Apache
+  (mod_xsendfile), lighttpd and Caddy plugins;
+- ``"python"`` (default, e.g. behind no proxy in development): a
+  :class:`FileResponse` with ``Range`` and conditional-request support.
+  Under gunicorn the open file is handed to ``wsgi.file_wrapper``, which
+  copies it with ``os.sendfile()`` from the range start for exactly
+  ``Content-Length`` bytes, so the worker never reads it either.
+
+Files live under ``PROTECTED_MEDIA_ROOT``, which must not be exposed by a
+public ``location``.
+"""
+
+import mimetypes
+import os
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date, quote_etag
+from django.views.static import was_modified_since
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def protected_root():
+    return Path(getattr(settings, "PROTECTED_MEDIA_ROOT", settings.MEDIA_ROOT))
+
+
+def resolve(path):
+    """Return the absolute path of ``path`` under the root, or raise Http404."""
+    try:
+        full_path = Path(safe_join(protected_root(), path))
+    except SuspiciousFileOperation:
+        raise Http404("Invalid path") from None
+    if not full_path.is_file():
+        raise Http404("File not found")
+    return full_path
+
+
+class RangeFile:
+    """
+    Read-only view of ``length`` bytes of an open file from its position.
+
+    Exposes ``fileno()`` so WSGI servers can ``sendfile()`` the range, and
+    no ``tell()`` so :class:`FileResponse` leaves ``Content-Length`` alone.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+        file.seek(start)
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Return ``(start, end)`` (inclusive) for a single-range ``Range`` header.
+
+    Return None to serve the whole file (no or unsupported header) and raise
+    ``ValueError`` for an unsatisfiable range.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes.
+        length = int(last)
+        if not length:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end
+
+
+def file_response(request, full_path, filename=None, as_attachment=False):
+    """Serve ``full_path`` from Python with range and 304 support."""
+    stat = full_path.stat()
+    last_modified = http_date(stat.st_mtime)
+    etag = quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+    if request.headers.get("If-None-Match") == etag or (
+        "If-None-Match" not in request.headers
+        and not was_modified_since(
+            request.headers.get("If-Modified-Since"), stat.st_mtime
+        )
+    ):
+        return HttpResponseNotModified()
+
+    size = stat.st_size
+    if_range = request.headers.get("If-Range")
+    byte_range = None
+    if request.method == "GET" and (
+        if_range is None or if_range in (etag, last_modified)
+    ):
+        try:
+            byte_range = parse_range(request.headers.get("Range"), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    file = open(full_path, "rb")
+    start, end = byte_range or (0, size - 1)
+    response = FileResponse(
+        RangeFile(file, start, end - start + 1),
+        as_attachment=as_attachment,
+        filename=filename or full_path.name,
+    )
+    response["Content-Length"] = str(end - start + 1)
+    if byte_range:
+        response.status_code = 206
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Accept-Ranges"] = "bytes"
+    response["Last-Modified"] = last_modified
+    response["ETag"] = etag
+    return response
+
+
+def serve(request, path, filename=None, as_attachment=False):
+    """
+    Answer with the protected file at ``path`` using the configured backend.
+
+    Call it from a view after authorizing the request.
+    """
+    full_path = resolve(path)
+    backend = getattr(settings, "PROTECTED_MEDIA_BACKEND", "python")
+    if backend == "python":
+        return file_response(request, full_path, filename, as_attachment)
+
+    content_type, _ = mimetypes.guess_type(full_path.name)
+    response = HttpResponse(content_type=content_type or "application/octet-stream")
+    if backend == "nginx":
+        relative = full_path.relative_to(os.path.abspath(protected_root()))
+        internal = getattr(settings, "PROTECTED_MEDIA_INTERNAL_URL", "/_protected/")
+        response["X-Accel-Redirect"] = internal + quote(relative.as_posix())
+    elif backend == "sendfile":
+        response["X-Sendfile"] = str(full_path)
+    else:
+        raise ValueError(f"Unknown PROTECTED_MEDIA_BACKEND: {backend!r}")
+
+    disposition = "attachment" if as_attachment else "inline"
+    response["Content-Disposition"] = (
+        f"{disposition}; filename*=UTF-8''{quote(filename or full_path.name)}"
+    )
+    return response
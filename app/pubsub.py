@@ -0,0 +1,301 @@
+"""
+Publish/subscribe fan-out for live updates (SSE and WebSockets).
+
+:func:`publish` may be called from any thread (sync views, signals, tasks);
+:func:`subscribe` is used by async consumers (see ``app/realtime.py``):
+
+    with get_hub().subscribe("orders") as subscription:
+        message = await subscription.get()
+
+Without ``PUBSUB_BROKER_URL`` messages only reach subscribers in the same
+process. With it (``tcp://127.0.0.1:7379``) every worker publishes to and
+listens on a small TCP broker, ``python manage.py pubsub_broker``, so a
+message published by one worker reaches the subscribers of all of them. The
+broker is a stand-in for Redis pub/sub with the same fan-out semantics and no
+persistence.
+
+Each subscription has a bounded queue (``REALTIME_QUEUE_SIZE``). When a slow
+consumer lets it fill up, the oldest message is dropped rather than letting
+memory grow; consumers check :attr:`Subscription.overflowed` to disconnect
+clients that fall too far behind.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Broker connections buffering more than this are too slow and dropped.
+BROKER_WRITE_LIMIT = 1024 * 1024
+
+
+class Subscription:
+    """A bounded queue of messages for one consumer on one channel."""
+
+    def __init__(self, hub, channel, maxsize):
+        self.hub = hub
+        self.channel = channel
+        self.maxsize = maxsize
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+    @property
+    def overflowed(self):
+        """True once a full queue's worth of messages has been dropped."""
+        return self.dropped >= self.maxsize
+
+    def deliver(self, message):
+        """Queue ``message``; must run on the subscription's event loop."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout=None):
+        """Return the next message; raise ``TimeoutError`` after ``timeout``."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class Hub:
+    """Process-wide registry of subscriptions, optionally bridged to a broker."""
+
+    def __init__(self, broker_url=None):
+        self.pid = os.getpid()
+        self.subscriptions = {}
+        self.lock = threading.Lock()
+        self.broker = BrokerClient(self, broker_url) if broker_url else None
+
+    def subscribe(self, channel, maxsize=None):
+        """Return a :class:`Subscription`; call from a running event loop."""
+        if maxsize is None:
+            maxsize = getattr(settings, "REALTIME_QUEUE_SIZE", 100)
+        subscription = Subscription(self, channel, maxsize)
+        with self.lock:
+            self.subscriptions.setdefault(channel, set()).add(subscription)
+        if self.broker is not None:
+            self.broker.listen(channel)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscriptions.get(subscription.channel, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self.subscriptions.pop(subscription.channel, None)
+
+    def subscriber_count(self, channel=None):
+        with self.lock:
+            if channel is not None:
+                return len(self.subscriptions.get(channel, ()))
+            return sum(len(subscribers) for subscribers in self.subscriptions.values())
+
+    def publish(self, channel, data, event=None):
+        """Send ``data`` (JSON-serialisable) to every subscriber of ``channel``."""
+        message = {"event": event, "data": data}
+        if self.broker is not None:
+            # The broker echoes the message back to this worker as well.
+            self.broker.publish(channel, message)
+        else:
+            self.deliver(channel, message)
+
+    def close(self):
+        """Close the broker connections, if any."""
+        if self.broker is not None:
+            self.broker.close()
+
+    def deliver(self, channel, message):
+        """Hand ``message`` to local subscribers, on their own event loops."""
+        with self.lock:
+            subscribers = list(self.subscriptions.get(channel, ()))
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for subscription in subscribers:
+            if subscription.loop is running:
+                subscription.deliver(message)
+                continue
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # The subscriber's loop has been closed.
+                self.unsubscribe(subscription)
+
+
+class BrokerClient:
+    """
+    Connection from one worker to the TCP broker.
+
+    Publishing writes a JSON line on a blocking socket shared by all threads.
+    A daemon thread keeps a second connection subscribed to every channel
+    with local subscribers and hands incoming messages to the hub.
+    """
+
+    def __init__(self, hub, url):
+        parts = urlsplit(url)
+        self.hub = hub
+        self.address = (parts.hostname or "127.0.0.1", parts.port or 7379)
+        self.channels = set()
+        self.lock = threading.Lock()
+        self.publisher = None
+        self.listener = None
+        self.listening_socket = None
+        self.stopped = threading.Event()
+
+    def publish(self, channel, message):
+        line = _encode({"op": "pub", "channel": channel, "message": message})
+        with self.lock:
+            for attempt in range(2):
+                try:
+                    if self.publisher is None:
+                        self.publisher = socket.create_connection(self.address, 5)
+                    self.publisher.sendall(line)
+                    return
+                except OSError:
+                    self._close_publisher()
+                    if attempt:
+                        raise
+
+    def _close_publisher(self):
+        if self.publisher is not None:
+            self.publisher.close()
+            self.publisher = None
+
+    def close(self):
+        """Close both broker connections and stop the listener thread."""
+        self.stopped.set()
+        with self.lock:
+            self._close_publisher()
+            listening_socket, self.listening_socket = self.listening_socket, None
+            listener = self.listener
+        if listening_socket is not None:
+            # shutdown() wakes the listener thread blocked on reading.
+            try:
+                listening_socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if listener is not None and listener is not threading.current_thread():
+            listener.join(timeout=5)
+
+    def listen(self, channel):
+        with self.lock:
+            if self.stopped.is_set() or channel in self.channels:
+                return
+            self.channels.add(channel)
+            if self.listener is None:
+                self.listener = threading.Thread(
+                    target=self._listen_forever, name="pubsub-listener", daemon=True
+                )
+                self.listener.start()
+            elif self.listening_socket is not None:
+                try:
+                    self.listening_socket.sendall(
+                        _encode({"op": "sub", "channel": channel})
+                    )
+                except OSError:
+                    pass  # The listener reconnects and resubscribes.
+
+    def _listen_forever(self):
+        while not self.stopped.is_set():
+            try:
+                self._listen()
+            except (OSError, ValueError) as error:
+                if self.stopped.is_set():
+                    return
+                logger.warning("Pub/sub broker connection lost: %s", error)
+            with self.lock:
+                self.listening_socket = None
+            self.stopped.wait(1)
+
+    def _listen(self):
+        connection = socket.create_connection(self.address, 5)
+        connection.settimeout(None)
+        with connection, connection.makefile("rb") as lines:
+            with self.lock:
+                if self.stopped.is_set():
+                    return
+                self.listening_socket = connection
+                for channel in self.channels:
+                    connection.sendall(_encode({"op": "sub", "channel": channel}))
+            for line in lines:
+                payload = json.loads(line)
+                self.hub.deliver(payload["channel"], payload["message"])
+        raise OSError("broker closed the connection")
+
+
+def _encode(payload):
+    return json.dumps(payload, separators=(",", ":")).encode() + b"\n"
+
+
+async def start_broker(host="127.0.0.1", port=7379):
+    """Start the TCP broker and return the ``asyncio`` server."""
+    subscribers = {}
+
+    async def handle(reader, writer):
+        channels = set()
+        try:
+            async for line in reader:
+                payload = json.loads(line)
+                channel = payload["channel"]
+                if payload["op"] == "sub":
+                    channels.add(channel)
+                    subscribers.setdefault(channel, set()).add(writer)
+                elif payload["op"] == "pub":
+                    line = _encode({"channel": channel, "message": payload["message"]})
+                    for subscriber in list(subscribers.get(channel, ())):
+                        transport = subscriber.transport
+                        if transport.get_write_buffer_size() > BROKER_WRITE_LIMIT:
+                            logger.warning("Dropping slow pub/sub subscriber")
+                            transport.abort()
+                            continue
+                        subscriber.write(line)
+        except (ConnectionError, ValueError, KeyError):
+            pass
+        finally:
+            for channel in channels:
+                subscribers.get(channel, set()).discard(writer)
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    """Return this process's hub, creating it after a fork."""
+    global _hub
+
+    with _hub_lock:
+        if _hub is None or _hub.pid != os.getpid():
+            _hub = Hub(getattr(settings, "PUBSUB_BROKER_URL", "") or None)
+        return _hub
+
+
+def publish(channel, data, event=None):
+    """Publish ``data`` on ``channel`` through this process's hub."""
+    get_hub().publish(channel, data, event)
@@ -0,0 +1,201 @@
+"""
+Server-Sent Events and WebSocket endpoints on the ASGI application.
+
+:class:`ProtocolRouter` wraps Django's ASGI handler (see ``app/asgi.py``):
+
+- ``GET {REALTIME_SSE_PREFIX}<channel>/`` streams the channel's messages as
+  Server-Sent Events (``text/event-stream``);
+- WebSocket connections to ``{REALTIME_WS_PREFIX}<channel>/`` receive them as
+  JSON text frames;
+- everything else, including lifespan events, goes to Django as before.
+
+Messages come from :func:`app.pubsub.publish`, from any process when a
+broker is configured. Idle connections get a heartbeat every
+``REALTIME_HEARTBEAT`` seconds, which keeps proxies from closing them and
+detects dead clients. Clients that fall more than ``REALTIME_QUEUE_SIZE``
+messages behind are disconnected (EventSource reconnects automatically) and
+each worker accepts at most ``REALTIME_MAX_CONNECTIONS`` streams.
+
+WebSocket frames sent by clients are ignored; updates are published
+server-side. ``REALTIME_AUTHORIZE`` may name a ``callable(scope, channel)``
+that returns whether the connection may subscribe.
+"""
+
+import asyncio
+import json
+import re
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from app.pubsub import get_hub
+
+CHANNEL_RE = re.compile(r"^[\w.-]{1,100}$")
+
+SSE_HEADERS = [
+    (b"content-type", b"text/event-stream; charset=utf-8"),
+    (b"cache-control", b"no-cache"),
+    # Stop nginx from buffering the stream.
+    (b"x-accel-buffering", b"no"),
+]
+
+
+def format_event(message):
+    """Encode a pub/sub message as one Server-Sent Event."""
+    data = message["data"]
+    if not isinstance(data, str):
+        data = json.dumps(data, separators=(",", ":"))
+    lines = [f"event: {message['event']}"] if message.get("event") else []
+    lines += [f"data: {line}" for line in data.splitlines() or [""]]
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+async def wait_for_disconnect(receive, disconnect_type):
+    while (await receive())["type"] != disconnect_type:
+        pass
+
+
+class ProtocolRouter:
+    """Route SSE and WebSocket connections to pub/sub channels."""
+
+    def __init__(self, application):
+        self.application = application
+        self.sse_prefix = getattr(settings, "REALTIME_SSE_PREFIX", "/events/")
+        self.ws_prefix = getattr(settings, "REALTIME_WS_PREFIX", "/ws/")
+        self.heartbeat = getattr(settings, "REALTIME_HEARTBEAT", 15.0)
+        self.queue_size = getattr(settings, "REALTIME_QUEUE_SIZE", 100)
+        self.max_connections = getattr(settings, "REALTIME_MAX_CONNECTIONS", 1000)
+        authorize = getattr(settings, "REALTIME_AUTHORIZE", None)
+        self.authorize = import_string(authorize) if authorize else None
+        self.connections = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(self.sse_prefix):
+            return await self.serve_sse(scope, receive, send)
+        if scope["type"] == "websocket":
+            return await self.serve_websocket(scope, receive, send)
+        if scope["type"] == "lifespan":
+            return await self.serve_lifespan(receive, send)
+        return await self.application(scope, receive, send)
+
+    def channel_for(self, scope, prefix):
+        """Return the channel named by the path, or None if not allowed."""
+        if not scope["path"].startswith(prefix):
+            return None
+        channel = scope["path"][len(prefix) :].strip("/")
+        if not CHANNEL_RE.match(channel):
+            return None
+        if self.authorize is not None and not self.authorize(scope, channel):
+            return None
+        return channel
+
+    async def serve_lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def reject(self, send, status, text):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"text/plain; charset=utf-8")],
+            }
+        )
+        await send({"type": "http.response.body", "body": text.encode()})
+
+    async def serve_sse(self, scope, receive, send):
+        channel = self.channel_for(scope, self.sse_prefix)
+        if channel is None:
+            return await self.reject(send, 404, "Unknown channel")
+        if scope["method"] != "GET":
+            return await self.reject(send, 405, "Method not allowed")
+        if self.connections >= self.max_connections:
+            return await self.reject(send, 503, "Too many connections")
+
+        await send(
+            {"type": "http.response.start", "status": 200, "headers": SSE_HEADERS}
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": b"retry: 3000\n\n",
+                "more_body": True,
+            }
+        )
+
+        async def send_chunk(chunk):
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+        await self.stream(
+            channel,
+            wait_for_disconnect(receive, "http.disconnect"),
+            lambda message: send_chunk(format_event(message)),
+            lambda: send_chunk(b": heartbeat\n\n"),
+        )
+
+    async def serve_websocket(self, scope, receive, send):
+        if (await receive())["type"] != "websocket.connect":
+            return
+        channel = self.channel_for(scope, self.ws_prefix)
+        if channel is None:
+            return await send({"type": "websocket.close", "code": 4404})
+        if self.connections >= self.max_connections:
+            # 1013: try again later.
+            return await send({"type": "websocket.close", "code": 1013})
+
+        await send({"type": "websocket.accept"})
+
+        async def send_json(payload):
+            text = json.dumps(payload, separators=(",", ":"))
+            await send({"type": "websocket.send", "text": text})
+
+        disconnected = await self.stream(
+            channel,
+            wait_for_disconnect(receive, "websocket.disconnect"),
+            send_json,
+            lambda: send_json({"event": "heartbeat"}),
+        )
+        if not disconnected:
+            # 1008: policy violation (the client could not keep up).
+            await send({"type": "websocket.close", "code": 1008})
+
+    async def stream(self, channel, disconnect, send_message, send_heartbeat):
+        """
+        Forward ``channel`` until the client disconnects or falls behind.
+
+        Return True if the client disconnected.
+        """
+        self.connections += 1
+        disconnected = asyncio.ensure_future(disconnect)
+        next_message = None
+        try:
+            with get_hub().subscribe(channel, self.queue_size) as subscription:
+                while not subscription.overflowed:
+                    if next_message is None:
+                        next_message = asyncio.ensure_future(subscription.get())
+                    done, _ = await asyncio.wait(
+                        {next_message, disconnected},
+                        timeout=self.heartbeat,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    if disconnected in done:
+                        return True
+                    if next_message in done:
+                        message, next_message = next_message.result(), None
+                        await send_message(message)
+                    else:
+                        await send_heartbeat()
+                return False
+        except OSError:
+            # The server failed to write to a client that has gone away.
+            return True
+        finally:
+            self.connections -= 1
+            for task in (next_message, disconnected):
+                if task is not None:
+                    task.cancel()
@@ -0,0 +1,161 @@
+"""
+Request-scoped memoization and batched lookups.
+
+``app.middleware.RequestCacheMiddleware`` opens a scope for every request.
+Code running inside it, in views, templates, template tags or context
+processors, can share results without passing them around::
+
+    @request_cache.memoize
+    def site_settings():
+        return SiteSettings.objects.get()
+
+    authors = request_cache.DataLoader.for_model(User)
+    rows = [(entry, authors.load(entry.user_id)) for entry in entries]
+    # The first access to any author runs one in_bulk() for all of them.
+
+The scope is a ``ContextVar``, so WSGI threads and ASGI tasks each see only
+their own request's values, and nothing outlives the request. Outside a
+scope (management commands, shells) memoized functions are simply called
+and every :meth:`DataLoader.for_model` call returns a fresh loader; wrap
+such code in :func:`request_scope` to get the same sharing.
+"""
+
+import contextlib
+import functools
+from contextvars import ContextVar
+
+from django.utils.functional import SimpleLazyObject
+
+_scope = ContextVar("request_cache", default=None)
+
+_MISSING = object()
+
+
+@contextlib.contextmanager
+def request_scope():
+    """Run the block with a fresh request cache."""
+    token = _scope.set({})
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def active():
+    return _scope.get() is not None
+
+
+def get(key, default=None):
+    scope = _scope.get()
+    return default if scope is None else scope.get(key, default)
+
+
+def store(key, value):
+    scope = _scope.get()
+    if scope is not None:
+        scope[key] = value
+
+
+def get_or_set(key, compute):
+    """Return the cached value of ``key``, calling ``compute()`` on a miss."""
+    scope = _scope.get()
+    if scope is None:
+        return compute()
+    value = scope.get(key, _MISSING)
+    if value is _MISSING:
+        value = scope[key] = compute()
+    return value
+
+
+def memoize(func):
+    """
+    Cache ``func``'s results per request, keyed by its (hashable) arguments.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (func, args, frozenset(kwargs.items()))
+        return get_or_set(key, lambda: func(*args, **kwargs))
+
+    return wrapper
+
+
+class DataLoader:
+    """
+    Collect lookups of one model by ``field`` and resolve them in one query.
+
+    :meth:`load` queues a key and returns a lazy object; the first time any
+    queued object is used, every pending key is fetched with a single
+    ``in_bulk()``, so ``field`` must be unique. Loaded objects are cached
+    for the loader's lifetime, which for :meth:`for_model` loaders is the
+    request. Missing keys resolve to ``None``.
+    """
+
+    def __init__(self, queryset, field="pk"):
+        self.queryset = queryset
+        self.field = field
+        self._cache = {}
+        self._pending = set()
+
+    @classmethod
+    def for_model(cls, model, field="pk"):
+        """Return the request's shared loader for ``model`` by ``field``."""
+        return get_or_set(
+            ("dataloader", model, field),
+            lambda: cls(model._default_manager.all(), field),
+        )
+
+    def load(self, key):
+        """Queue ``key`` and return a lazy proxy of its object."""
+        if key not in self._cache:
+            self._pending.add(key)
+        return SimpleLazyObject(lambda: self.get(key))
+
+    def load_many(self, keys):
+        return [self.load(key) for key in keys]
+
+    def prime(self, key, obj):
+        """Cache an object that is already loaded."""
+        self._cache[key] = obj
+        self._pending.discard(key)
+
+    def get(self, key, default=None):
+        """Return the object for ``key``, dispatching pending lookups."""
+        if key not in self._cache:
+            self._pending.add(key)
+            self.dispatch()
+        value = self._cache[key]
+        return default if value is None else value
+
+    def get_many(self, keys):
+        keys = list(keys)
+        self._pending.update(key for key in keys if key not in self._cache)
+        self.dispatch()
+        return {key: self._cache[key] for key in keys}
+
+    def _take_pending(self):
+        keys, self._pending = self._pending - self._cache.keys(), set()
+        return keys
+
+    def _store(self, keys, found):
+        for key in keys:
+            self._cache[key] = found.get(key)
+
+    def dispatch(self):
+        """Fetch every pending key with one query."""
+        keys = self._take_pending()
+        if keys:
+            self._store(keys, self.queryset.in_bulk(keys, field_name=self.field))
+
+    async def adispatch(self):
+        keys = self._take_pending()
+        if keys:
+            found = await self.queryset.ain_bulk(keys, field_name=self.field)
+            self._store(keys, found)
+
+    async def aget(self, key, default=None):
+        if key not in self._cache:
+            self._pending.add(key)
+            await self.adispatch()
+        value = self._cache[key]
+        return default if value is None else value
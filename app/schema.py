@@ -0,0 +1,147 @@
+"""
+Checksummed schema snapshots for fast database bootstrap.
+
+Applying every migration one by one dominates the first start of a fresh
+container or CI database. ``python manage.py bootstrap_schema`` instead
+records the SQL that a full ``migrate`` executes, keyed by a hash of every
+migration file (:func:`migrations_hash`), and replays it in one transaction
+on the next empty database. The replayed statements include the
+``django_migrations`` rows, so the migrations are marked as applied.
+
+Snapshots live in ``SCHEMA_SNAPSHOT_DIR`` as ``<vendor>-<hash>.json``. Each
+one carries a checksum of its statements. A missing, corrupt or stale
+snapshot falls back to a normal ``migrate`` that records a new one.
+"""
+
+import hashlib
+import json
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.commands.migrate import Command as MigrateCommand
+from django.db import transaction
+from django.db.migrations.loader import MigrationLoader
+
+SNAPSHOT_FORMAT = 1
+
+# Transaction control is replayed by a single atomic block instead, and
+# SELECTs only inspect state.
+SKIPPED_STATEMENTS = ("SELECT", "SAVEPOINT", "RELEASE", "ROLLBACK", "BEGIN", "COMMIT")
+
+
+def migrations_hash():
+    """Return a short hash of every migration file of the installed apps."""
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    digest = hashlib.sha256(django.get_version().encode())
+    for key in sorted(loader.disk_migrations):
+        migration = loader.disk_migrations[key]
+        digest.update(repr(key).encode())
+        digest.update(Path(sys.modules[migration.__module__].__file__).read_bytes())
+    return digest.hexdigest()[:12]
+
+
+def snapshot_path(connection, digest):
+    directory = Path(getattr(settings, "SCHEMA_SNAPSHOT_DIR", ".schema_cache"))
+    return directory / f"{connection.vendor}-{digest}.json"
+
+
+def statements_checksum(statements):
+    return hashlib.sha256(json.dumps(statements).encode()).hexdigest()
+
+
+def read_snapshot(path, digest):
+    """Return the statements stored at ``path``, or None if unusable."""
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    if data.get("format") != SNAPSHOT_FORMAT or data.get("migrations") != digest:
+        return None
+    statements = data.get("statements")
+    if statements is None or data.get("checksum") != statements_checksum(statements):
+        return None
+    return statements
+
+
+def write_snapshot(path, digest, statements):
+    data = {
+        "format": SNAPSHOT_FORMAT,
+        "migrations": digest,
+        "checksum": statements_checksum(statements),
+        "statements": statements,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_suffix(".tmp")
+    partial.write_text(json.dumps(data))
+    partial.replace(path)
+    return path
+
+
+class StatementRecorder:
+    """``execute_wrapper`` recording the statements that change the database."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        if not sql.lstrip().upper().startswith(SKIPPED_STATEMENTS):
+            if many:
+                params = [list(row) for row in params]
+            elif params is not None:
+                params = list(params)
+            # JSON round trip: datetimes and decimals become strings that
+            # every backend accepts back as parameters.
+            self.statements.append(
+                json.loads(json.dumps([sql, params, many], default=str))
+            )
+        return result
+
+
+class TimedMigrate(MigrateCommand):
+    """``migrate`` remembering how long each migration took to apply."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timings = {}
+        self.started = {}
+
+    def migration_progress_callback(self, action, migration=None, fake=False):
+        if action == "apply_start":
+            self.started[migration] = time.perf_counter()
+        elif action == "apply_success":
+            elapsed = time.perf_counter() - self.started.pop(migration)
+            self.timings[f"{migration.app_label}.{migration.name}"] = elapsed
+        super().migration_progress_callback(action, migration, fake)
+
+
+def migrate(connection, record=False, verbosity=0):
+    """
+    Run ``migrate`` on ``connection``.
+
+    Return ``(timings, statements)``: the seconds spent per applied
+    migration and, if ``record``, the statements that were executed.
+    """
+    command = TimedMigrate()
+    recorder = StatementRecorder()
+    wrapper = connection.execute_wrapper(recorder) if record else nullcontext()
+    with wrapper:
+        call_command(
+            command, database=connection.alias, interactive=False, verbosity=verbosity
+        )
+    return command.timings, recorder.statements
+
+
+def replay(connection, statements):
+    """Execute recorded ``statements`` on ``connection`` in one transaction."""
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        for sql, params, many in statements:
+            if many:
+                cursor.executemany(sql, params)
+            else:
+                cursor.execute(sql, params)
@@ -0,0 +1,422 @@
+"""
+Full-text search over registered models.
+
+Models are registered from ``SEARCH_INDEXES`` at startup, or by apps
+themselves from ``AppConfig.ready()``::
+
+    from app import search
+
+    search.register(Article, ["title", "body"], weights=[2.0, 1.0])
+
+    for result in search.search(Article, "fast queries", limit=20):
+        result.object, result.rank, result.highlights["body"]
+
+Each registered model gets its own index table on the default database:
+
+- SQLite: an FTS5 virtual table (``porter unicode61`` tokenizer) ranked with
+  ``bm25()`` and highlighted with ``snippet()``;
+- PostgreSQL: a ``tsvector`` column with a GIN index, with fields weighted
+  A-D in registration order, ranked with ``ts_rank_cd()`` and highlighted
+  with ``ts_headline()``;
+- other databases fall back to ``icontains`` filters without ranking.
+
+``post_save``/``post_delete`` signals keep the index current one row at a
+time, in the same transaction as the change.
+``python manage.py rebuild_search_index`` rebuilds it in batches. Index
+tables are created after ``migrate`` or on first use outside a transaction.
+Models need integer primary keys.
+"""
+
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, models
+from django.db.models.signals import post_delete, post_save
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+# Highlight markers: private-use characters that survive HTML escaping and
+# are never in indexed text, swapped for <mark> tags after escaping.
+START, STOP = "\ue000", "\ue001"
+
+INTEGER_PKS = (models.AutoField, models.BigAutoField, models.IntegerField)
+
+
+class SearchResult:
+    """One hit: the model instance, its rank and highlighted fragments."""
+
+    def __init__(self, obj, rank, highlights):
+        self.object = obj
+        self.rank = rank
+        self.highlights = highlights
+
+    def __repr__(self):
+        return f"<SearchResult {self.object!r} rank={self.rank:.3f}>"
+
+
+class SearchIndex:
+    """The indexed fields of one model."""
+
+    def __init__(self, model, fields, weights=None, config="english", using=None):
+        pk = model._meta.pk
+        if not isinstance(pk, INTEGER_PKS):
+            raise ImproperlyConfigured(f"{model._meta.label} needs an integer pk")
+        self.model = model
+        self.fields = list(fields)
+        self.weights = list(weights or [1.0] * len(self.fields))
+        self.config = config
+        self.using = using or "default"
+        self.table = f"search_{model._meta.db_table}"
+        self.ready = set()
+
+    @property
+    def backend(self):
+        return BACKENDS.get(connections[self.using].vendor, IcontainsBackend)
+
+    def ensure_table(self):
+        """Create the index table once per process and connection alias."""
+        if self.using in self.ready:
+            return
+        connection = connections[self.using]
+        backend = self.backend
+        if connection.in_atomic_block and not backend.transactional_ddl:
+            # Rolling back a CREATE VIRTUAL TABLE leaves SQLite connections
+            # unable to open savepoints, so only create tables in autocommit.
+            if not backend.exists(self):
+                raise ImproperlyConfigured(
+                    f"Search index {self.table} does not exist; run "
+                    "'python manage.py rebuild_search_index'"
+                )
+        else:
+            backend.create(self)
+        if not (connection.in_atomic_block and backend.transactional_ddl):
+            self.ready.add(self.using)
+
+    def rows(self, queryset):
+        """Yield ``(pk, [field values])`` with ``None`` replaced by ``""``."""
+        for pk, *values in queryset.values_list("pk", *self.fields):
+            yield pk, ["" if value is None else str(value) for value in values]
+
+
+class SQLiteBackend:
+    """FTS5 virtual tables."""
+
+    transactional_ddl = False
+
+    @staticmethod
+    def exists(index):
+        with connections[index.using].cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+                [index.table],
+            )
+            return cursor.fetchone() is not None
+
+    @staticmethod
+    def create(index):
+        columns = ", ".join(_quote(field) for field in index.fields)
+        with connections[index.using].cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {_quote(index.table)} "
+                f"USING fts5({columns}, "
+                "tokenize = 'porter unicode61 remove_diacritics 2')"
+            )
+
+    @staticmethod
+    def drop(index):
+        with connections[index.using].cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {_quote(index.table)}")
+
+    @staticmethod
+    def clear(index):
+        with connections[index.using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {_quote(index.table)}")
+
+    @staticmethod
+    def upsert(index, rows, replace=True):
+        rows = list(rows)
+        table = _quote(index.table)
+        columns = ", ".join(_quote(field) for field in index.fields)
+        placeholders = ", ".join(["%s"] * (len(index.fields) + 1))
+        with connections[index.using].cursor() as cursor:
+            if replace:
+                cursor.executemany(
+                    f"DELETE FROM {table} WHERE rowid = %s", [(pk,) for pk, _ in rows]
+                )
+            cursor.executemany(
+                f"INSERT INTO {table} (rowid, {columns}) VALUES ({placeholders})",
+                [(pk, *values) for pk, values in rows],
+            )
+
+    @staticmethod
+    def delete(index, pks):
+        with connections[index.using].cursor() as cursor:
+            cursor.executemany(
+                f"DELETE FROM {_quote(index.table)} WHERE rowid = %s",
+                [(pk,) for pk in pks],
+            )
+
+    @staticmethod
+    def optimize(index):
+        table = _quote(index.table)
+        with connections[index.using].cursor() as cursor:
+            cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+
+    @staticmethod
+    def query(index, text, limit, offset):
+        terms = re.findall(r"\w+", text)
+        if not terms:
+            return []
+        # Quoted terms cannot be parsed as FTS5 operators; the last one is a
+        # prefix so results appear while the user is still typing.
+        match = " ".join(f'"{term}"' for term in terms) + "*"
+        table = _quote(index.table)
+        weights = ", ".join(str(float(weight)) for weight in index.weights)
+        snippets = ", ".join(
+            f"snippet({table}, {column}, %s, %s, '…', 16)"
+            for column in range(len(index.fields))
+        )
+        with connections[index.using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, bm25({table}, {weights}) AS score, {snippets} "
+                f"FROM {table} WHERE {table} MATCH %s "
+                "ORDER BY score LIMIT %s OFFSET %s",
+                [START, STOP] * len(index.fields) + [match, limit, offset],
+            )
+            # bm25() is lower-is-better; report higher-is-better ranks.
+            return [(pk, -score, fragments) for pk, score, *fragments in cursor]
+
+
+class PostgresBackend:
+    """``tsvector`` tables with a GIN index."""
+
+    transactional_ddl = True
+
+    @staticmethod
+    def create(index):
+        table = _quote(index.table)
+        with connections[index.using].cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(id bigint PRIMARY KEY, document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {_quote(index.table + '_document')} "
+                f"ON {table} USING gin (document)"
+            )
+
+    drop = staticmethod(SQLiteBackend.drop)
+
+    @staticmethod
+    def clear(index):
+        with connections[index.using].cursor() as cursor:
+            cursor.execute(f"TRUNCATE {_quote(index.table)}")
+
+    @staticmethod
+    def _document(index):
+        weights = "ABCD"
+        return " || ".join(
+            f"setweight(to_tsvector(%s::regconfig, %s), '{weights[min(i, 3)]}')"
+            for i in range(len(index.fields))
+        )
+
+    @classmethod
+    def upsert(cls, index, rows, replace=True):
+        table = _quote(index.table)
+        with connections[index.using].cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {table} (id, document) "
+                f"VALUES (%s, {cls._document(index)}) "
+                "ON CONFLICT (id) DO UPDATE SET document = EXCLUDED.document",
+                [
+                    (pk, *[part for value in values for part in (index.config, value)])
+                    for pk, values in rows
+                ],
+            )
+
+    @staticmethod
+    def delete(index, pks):
+        with connections[index.using].cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {_quote(index.table)} WHERE id = ANY(%s)", [list(pks)]
+            )
+
+    @staticmethod
+    def optimize(index):
+        with connections[index.using].cursor() as cursor:
+            cursor.execute(f"VACUUM ANALYZE {_quote(index.table)}")
+
+    @staticmethod
+    def query(index, text, limit, offset):
+        meta = index.model._meta
+        options = f"StartSel={START}, StopSel={STOP}, MaxFragments=2, MaxWords=24"
+        headlines = ", ".join(
+            f"ts_headline(%s::regconfig, coalesce(m.{_quote(meta.get_field(field).column)}::text, ''), q, %s)"  # noqa: E501
+            for field in index.fields
+        )
+        with connections[index.using].cursor() as cursor:
+            cursor.execute(
+                f"SELECT s.id, ts_rank_cd(s.document, q) AS rank, {headlines} "
+                f"FROM {_quote(index.table)} s "
+                f"JOIN {_quote(meta.db_table)} m ON m.{_quote(meta.pk.column)} = s.id "
+                ", websearch_to_tsquery(%s::regconfig, %s) q "
+                "WHERE s.document @@ q ORDER BY rank DESC LIMIT %s OFFSET %s",
+                [index.config, options] * len(index.fields)
+                + [index.config, text, limit, offset],
+            )
+            return [(pk, rank, fragments) for pk, rank, *fragments in cursor]
+
+
+class IcontainsBackend:
+    """Unindexed fallback for databases without full-text support."""
+
+    transactional_ddl = True
+
+    @staticmethod
+    def create(index):
+        pass
+
+    drop = clear = optimize = create
+
+    @staticmethod
+    def upsert(index, rows, replace=True):
+        pass
+
+    @staticmethod
+    def delete(index, pks):
+        pass
+
+    @staticmethod
+    def query(index, text, limit, offset):
+        condition = models.Q()
+        for field in index.fields:
+            condition |= models.Q(**{f"{field}__icontains": text})
+        queryset = index.model._default_manager.using(index.using).filter(condition)
+        return [
+            (pk, 0.0, [""] * len(index.fields))
+            for pk in queryset.values_list("pk", flat=True)[offset : offset + limit]
+        ]
+
+
+BACKENDS = {"sqlite": SQLiteBackend, "postgresql": PostgresBackend}
+
+_registry = {}
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def register(model, fields, weights=None, config="english", using=None):
+    """Index ``fields`` of ``model`` and keep the index current via signals."""
+    index = SearchIndex(model, fields, weights, config, using)
+    _registry[model] = index
+    post_save.connect(_saved, sender=model, dispatch_uid="search")
+    post_delete.connect(_deleted, sender=model, dispatch_uid="search")
+    return index
+
+
+def unregister(model):
+    _registry.pop(model, None)
+    post_save.disconnect(sender=model, dispatch_uid="search")
+    post_delete.disconnect(sender=model, dispatch_uid="search")
+
+
+def register_from_settings():
+    """Register the models listed in ``SEARCH_INDEXES``."""
+    for label, options in getattr(settings, "SEARCH_INDEXES", {}).items():
+        register(apps.get_model(label), **options)
+
+
+def create_tables(using="default", **kwargs):
+    """Create missing index tables; connected to ``post_migrate``."""
+    for index in _registry.values():
+        if index.using == using:
+            index.ensure_table()
+
+
+def get_index(model):
+    try:
+        return _registry[model]
+    except KeyError:
+        raise ImproperlyConfigured(f"{model._meta.label} is not registered") from None
+
+
+def registered_models():
+    return list(_registry)
+
+
+def _saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return  # Fixture loading; rebuild the index afterwards.
+    index = _registry[sender]
+    index.ensure_table()
+    queryset = sender._default_manager.using(index.using).filter(pk=instance.pk)
+    index.backend.upsert(index, index.rows(queryset))
+
+
+def _deleted(sender, instance, **kwargs):
+    index = _registry[sender]
+    index.ensure_table()
+    index.backend.delete(index, [instance.pk])
+
+
+def rebuild(model, batch_size=None, recreate=False, progress=None):
+    """
+    Reindex every row of ``model`` in batches; return the rows indexed.
+
+    ``recreate`` drops the index table first, which is needed after the
+    registered fields change; on SQLite it must run outside a transaction
+    (see :meth:`SearchIndex.ensure_table`). Otherwise the rows are cleared.
+    """
+    index = get_index(model)
+    batch_size = batch_size or getattr(settings, "SEARCH_REBUILD_BATCH_SIZE", 1000)
+    backend = index.backend
+    if recreate:
+        backend.drop(index)
+        index.ready.discard(index.using)
+    index.ensure_table()
+    backend.clear(index)
+
+    queryset = model._default_manager.using(index.using).order_by("pk")
+    last_pk, total = None, 0
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(index.rows(batch[:batch_size]))
+        if not rows:
+            break
+        backend.upsert(index, rows, replace=False)
+        last_pk = rows[-1][0]
+        total += len(rows)
+        if progress:
+            progress(total)
+    backend.optimize(index)
+    return total
+
+
+def _highlight(fragment):
+    return mark_safe(escape(fragment).replace(START, "<mark>").replace(STOP, "</mark>"))
+
+
+def search(model, text, limit=20, offset=0):
+    """Return ranked :class:`SearchResult` objects for ``text``."""
+    index = get_index(model)
+    index.ensure_table()
+    hits = index.backend.query(index, text, limit, offset)
+    objects = model._default_manager.using(index.using).in_bulk(
+        [pk for pk, _, _ in hits]
+    )
+    return [
+        SearchResult(
+            objects[pk],
+            rank,
+            {
+                field: _highlight(fragment or "")
+                for field, fragment in zip(index.fields, fragments)
+            },
+        )
+        for pk, rank, fragments in hits
+        if pk in objects
+    ]
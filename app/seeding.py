@@ -0,0 +1,220 @@
+"""
+Bulk seed data for development and benchmarks.
+
+``python manage.py setup_project --seed --scale 10`` runs every seeder in
+``SEEDERS`` in one transaction. Apps add their own by subclassing
+:class:`Seeder`::
+
+    class ArticleSeeder(Seeder):
+        model = "blog.Article"
+        rows_per_scale = 5000
+
+        def prepare(self, rng):
+            self.authors = list(User.objects.values_list("pk", flat=True))
+
+        def build(self, index, rng):
+            return Article(
+                title=f"Seed article {index}", author_id=rng.choice(self.authors)
+            )
+
+Seeding is idempotent: each seeder counts the rows it created before
+(:meth:`Seeder.existing`) and only builds the missing ones, so re-running is
+a no-op and a larger ``--scale`` tops the data up. Rows come from a fixed
+random seed (``--random-seed``), so fresh databases get the same data.
+
+Fixtures (``--seed-fixture data.json``) are read with Django's serializers
+but inserted with ``bulk_create()`` instead of one ``save()`` per object.
+
+On SQLite, inserts run with foreign key checks deferred to the commit and
+the target tables' secondary indexes dropped, then rebuilt once at the end.
+"""
+
+import contextlib
+import random
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core import serializers
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+
+class Seeder:
+    """Synthetic rows of one model, ``rows_per_scale`` per unit of scale."""
+
+    model = None
+    rows_per_scale = 1000
+
+    def __init__(self):
+        if isinstance(self.model, str):
+            self.model = apps.get_model(self.model)
+
+    def existing(self):
+        """Return the rows this seeder created earlier."""
+        return self.model._default_manager.none()
+
+    def prepare(self, rng):
+        """Set up anything :meth:`build` shares across rows."""
+
+    def build(self, index, rng):
+        """Return the unsaved instance number ``index``."""
+        raise NotImplementedError
+
+    def target(self, scale):
+        return max(1, round(self.rows_per_scale * scale))
+
+
+class UserSeeder(Seeder):
+    """Active users named ``seed-user-<n>``, all with the password "seed"."""
+
+    model = "auth.User"
+    rows_per_scale = 1000
+
+    def existing(self):
+        return self.model._default_manager.filter(username__startswith="seed-user-")
+
+    def prepare(self, rng):
+        from django.contrib.auth.hashers import make_password
+
+        # One PBKDF2 hash for every row instead of one per user.
+        self.password = make_password("seed")
+
+    def build(self, index, rng):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        return self.model(
+            username=f"seed-user-{index}",
+            email=f"{first}.{last}.{index}@example.com".lower(),
+            first_name=first,
+            last_name=last,
+            password=self.password,
+        )
+
+
+class LogEntrySeeder(Seeder):
+    """Admin history entries on seeded users, for the admin and search."""
+
+    model = "admin.LogEntry"
+    rows_per_scale = 5000
+
+    def existing(self):
+        return self.model._default_manager.filter(object_repr__startswith="seed ")
+
+    def prepare(self, rng):
+        from django.contrib.contenttypes.models import ContentType
+
+        users = UserSeeder().existing()
+        self.user_ids = list(users.values_list("pk", flat=True)[:1000])
+        self.content_type = ContentType.objects.get_for_model(users.model)
+
+    def build(self, index, rng):
+        from django.contrib.admin.models import CHANGE
+
+        return self.model(
+            user_id=rng.choice(self.user_ids),
+            content_type=self.content_type,
+            object_id=str(rng.choice(self.user_ids)),
+            object_repr=f"seed {index}",
+            action_flag=CHANGE,
+            change_message=" ".join(rng.choices(WORDS, k=rng.randint(5, 40))),
+        )
+
+
+FIRST_NAMES = (
+    "Ada Alan Barbara Dennis Edsger Frances Grace Guido Ken Linus Margaret".split()
+)
+LAST_NAMES = (
+    "Lovelace Turing Liskov Ritchie Dijkstra Allen Hopper Rossum Thompson".split()
+)
+WORDS = (
+    "changed email password name groups permissions active staff status "
+    "profile address phone settings language timezone avatar bio notes"
+).split()
+
+
+def get_seeders():
+    return [import_string(path)() for path in getattr(settings, "SEEDERS", [])]
+
+
+@contextlib.contextmanager
+def fast_inserts(models):
+    """
+    Speed up bulk inserts into ``models``' tables inside a transaction.
+
+    On SQLite: defer foreign key checks to the commit and drop the tables'
+    non-unique indexes until the block ends. Must run inside ``atomic()``.
+    Other databases already defer Django's foreign keys.
+    """
+    if connection.vendor != "sqlite":
+        yield
+        return
+    tables = [model._meta.db_table for model in models]
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA defer_foreign_keys = ON")
+        placeholders = ", ".join(["%s"] * len(tables))
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+            "AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%%' "
+            f"AND tbl_name IN ({placeholders})",
+            tables,
+        )
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX "{name}"')
+    yield
+    # On errors the transaction's rollback restores the indexes.
+    with connection.cursor() as cursor:
+        for _, sql in indexes:
+            cursor.execute(sql)
+
+
+def seed(seeders=None, scale=1.0, batch_size=2000, random_seed=0, progress=None):
+    """Run ``seeders`` (default: ``SEEDERS``); return ``{label: rows created}``."""
+    seeders = get_seeders() if seeders is None else seeders
+    created = {}
+    with transaction.atomic(), fast_inserts([seeder.model for seeder in seeders]):
+        for seeder in seeders:
+            label = seeder.model._meta.label
+            rng = random.Random(f"{random_seed}:{label}")
+            start, stop = seeder.existing().count(), seeder.target(scale)
+            created[label] = 0
+            if start >= stop:
+                continue
+            seeder.prepare(rng)
+            for offset in range(start, stop, batch_size):
+                objs = [
+                    seeder.build(index, rng)
+                    for index in range(offset, min(offset + batch_size, stop))
+                ]
+                seeder.model._default_manager.bulk_create(objs)
+                created[label] += len(objs)
+                if progress:
+                    progress(label, created[label], stop - start)
+    return created
+
+
+def load_fixture(path, batch_size=2000):
+    """
+    Insert the objects of a fixture file with ``bulk_create()``.
+
+    Rows whose primary key already exists are skipped, so loading a fixture
+    twice is harmless. Returns ``{label: objects in the fixture}``.
+    """
+    fmt = str(path).rsplit(".", 1)[-1]
+    by_model = defaultdict(list)
+    many_to_many = []
+    with open(path) as stream:
+        for deserialized in serializers.deserialize(fmt, stream):
+            by_model[type(deserialized.object)].append(deserialized.object)
+            if deserialized.m2m_data:
+                many_to_many.append(deserialized)
+
+    with transaction.atomic(), fast_inserts(list(by_model)):
+        for model, objs in by_model.items():
+            model._default_manager.bulk_create(
+                objs, batch_size=batch_size, ignore_conflicts=True
+            )
+        for deserialized in many_to_many:
+            for field, values in deserialized.m2m_data.items():
+                getattr(deserialized.object, field).set(values)
+    return {model._meta.label: len(objs) for model, objs in by_model.items()}
@@ -73,6 +73,9 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "app.middleware.CachePolicyMiddleware",
+    "app.middleware.RequestCacheMiddleware",
+    "app.middleware.PreloadMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -136,6 +139,38 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Users and permission sets are cached (see app/auth.py)
+AUTHENTICATION_BACKENDS = ["app.auth.CachedModelBackend"]
+AUTH_CACHE_ALIAS = "default"
+AUTH_CACHE_TIMEOUT = 300  # seconds; bounds staleness after QuerySet.update()
+
+# Password hashing (see app/hashers.py). The first hasher of the profile hashes
+# new passwords; the others verify existing hashes until they are upgraded.
+_PASSWORD_VERIFIERS = [
+    "app.hashers.Argon2PasswordHasher",
+    "app.hashers.ScryptPasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+]
+PASSWORD_HASHER_PROFILES = {
+    # Needs argon2-cffi (requirements/production.txt)
+    "argon2": _PASSWORD_VERIFIERS,
+    "scrypt": [_PASSWORD_VERIFIERS[1], *_PASSWORD_VERIFIERS],
+    "pbkdf2": [_PASSWORD_VERIFIERS[2], *_PASSWORD_VERIFIERS],
+    # Tests and throwaway seed data only: a single MD5 round is not secure
+    "fast": ["django.contrib.auth.hashers.MD5PasswordHasher", *_PASSWORD_VERIFIERS],
+}
+PASSWORD_HASHER_PROFILE = os.getenv("PASSWORD_HASHER_PROFILE", "pbkdf2")
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]
+PASSWORD_ARGON2_TIME_COST = 2
+PASSWORD_ARGON2_MEMORY_COST = 65536  # KiB per hash
+PASSWORD_ARGON2_PARALLELISM = 1  # one core per hash; workers hash concurrently
+PASSWORD_SCRYPT_WORK_FACTOR = 2**15
+PASSWORD_SCRYPT_BLOCK_SIZE = 8
+PASSWORD_SCRYPT_PARALLELISM = 1
+PASSWORD_HASH_WORKERS = None  # threads for async logins; None = CPU count
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -162,8 +197,14 @@ STATICFILES_DIRS = [
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
-# WhiteNoise configuration
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# Static file storage: WhiteNoise's compressed manifest storage with hashed
+# URLs resolved from memory (see app/static.py)
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "app.static.ManifestStaticFilesStorage"},
+}
+STATIC_CDN_URL = os.getenv("STATIC_CDN_URL", "")  # e.g. https://cdn.example.com/static/
+STATIC_MANIFEST_REQUIRED = False  # refuse to boot workers without staticfiles.json
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -174,6 +215,9 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 LOGS_DIR = BASE_DIR / "logs"
 LOGS_DIR.mkdir(exist_ok=True)
 
+# Checksummed schema snapshots used by `manage.py bootstrap_schema`
+SCHEMA_SNAPSHOT_DIR = BASE_DIR / ".schema_cache"
+
 # Logging configuration
 LOGGING = {
     "version": 1,
@@ -234,6 +278,161 @@ CACHES = {
     }
 }
 
+# Stampede protection for app.caching helpers
+CACHE_LOCK_TIMEOUT = 30  # seconds a recompute lock is held at most
+CACHE_LOCK_WAIT = 1.0  # seconds to wait for another worker's recompute
+CACHE_EARLY_EXPIRATION_BETA = 1.0  # 0 disables probabilistic early refresh
+
+# Streaming and resumable uploads (see app/uploads.py)
+UPLOAD_ROOT = MEDIA_ROOT / "uploads"
+UPLOAD_MAX_SIZE = int(os.getenv("UPLOAD_MAX_SIZE", str(5 * 1024**3)))  # bytes
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # bytes read and hashed at a time
+UPLOAD_EXPIRY = 86400  # seconds before abandoned partial uploads are removed
+UPLOAD_REQUIRE_AUTH = True
+
+# Access-controlled files (see app/protected_media.py)
+PROTECTED_MEDIA_ROOT = BASE_DIR / "protected"
+# "python" (FileResponse + sendfile), "nginx" (X-Accel-Redirect) or "sendfile"
+PROTECTED_MEDIA_BACKEND = os.getenv("PROTECTED_MEDIA_BACKEND", "python")
+PROTECTED_MEDIA_INTERNAL_URL = "/_protected/"  # nginx internal location
+PROTECTED_MEDIA_AUTHORIZE = None  # dotted path to callable(request, path) -> bool
+
+# Image derivatives and responsive image tags (see app/images.py, needs Pillow)
+IMAGE_CACHE_DIR = MEDIA_ROOT / "derivatives"
+IMAGE_CACHE_MAX_SIZE = int(os.getenv("IMAGE_CACHE_MAX_SIZE", str(1024**3)))  # bytes
+IMAGE_CACHE_EVICT_INTERVAL = 60  # seconds between LRU sweeps per process
+IMAGE_WIDTHS = [320, 640, 960, 1280, 1920]
+IMAGE_FORMATS = ["avif", "webp"]  # AVIF is skipped if Pillow lacks libavif
+IMAGE_QUALITY = {"avif": 60, "webp": 80, "jpeg": 82}
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))  # render processes; 0 = inline
+IMAGE_RENDER_TIMEOUT = 30  # seconds a request waits for a render
+IMAGE_PREGENERATE_ON_UPLOAD = True
+
+# HTTP caching headers per URL name (see app/cache_policy.py)
+CACHE_POLICIES = {
+    "home": {
+        "max_age": 60,
+        "s_maxage": 300,
+        "stale_while_revalidate": 60,
+        "stale_if_error": 86400,
+        "vary": ["Accept-Language"],
+        "tags": ["pages"],
+    },
+    "upload-create": {"no_store": True},
+    "upload-file": {"no_store": True},
+    "upload-detail": {"no_store": True},
+    "protected-file": {"private": True, "max_age": 0},
+    # Derivative URLs carry a digest of the source, so they never change.
+    "image-derivative": {"max_age": 31536000, "s_maxage": 31536000},
+}
+CACHE_POLICY_TAG_HEADER = "Cache-Tag"  # "Surrogate-Key" for Fastly
+# Receivers of app.cache_policy.purge_requested, e.g. "app.cache_policy.http_purge"
+CACHE_PURGE_BACKENDS = ["app.cache_policy.log_purge"]
+CACHE_PURGE_ORIGIN = os.getenv("CACHE_PURGE_ORIGIN", "")  # proxy receiving PURGE
+
+# Admin performance mode (see app/admin.py)
+# Unfiltered changelists on tables larger than this use planner estimates
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(
+    os.getenv("ADMIN_ESTIMATED_COUNT_THRESHOLD", "100000")
+)
+ADMIN_COUNT_CACHE_TIMEOUT = int(os.getenv("ADMIN_COUNT_CACHE_TIMEOUT", "60"))
+
+# Template fragment caching (see app/templatetags/fragment_cache.py)
+FRAGMENT_CACHE_ALIAS = "default"
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv("FRAGMENT_CACHE_TIMEOUT", "300"))
+FRAGMENT_CACHE_LOCK_WAIT = 0.5  # seconds to wait for a concurrent render
+# Bump on deploy (e.g. to the git SHA) to invalidate cached page chrome
+FRAGMENT_CACHE_VERSION = os.getenv("FRAGMENT_CACHE_VERSION", "")
+
+# Template profiler: per-block render times in a Server-Timing header
+TEMPLATE_PROFILING = os.getenv("TEMPLATE_PROFILING", "false").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+if TEMPLATE_PROFILING:
+    MIDDLEWARE += ["app.middleware.TemplateProfilerMiddleware"]
+
+# Memory profiling for long-running workers (see app/memory.py)
+MEMORY_PROFILING = os.getenv("MEMORY_PROFILING", "false").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+MEMORY_PROFILING_DIR = LOGS_DIR / "memory"
+MEMORY_PROFILING_SNAPSHOT_INTERVAL = int(
+    os.getenv("MEMORY_PROFILING_SNAPSHOT_INTERVAL", "300")
+)
+MEMORY_PROFILING_SAMPLE_RATE = float(os.getenv("MEMORY_PROFILING_SAMPLE_RATE", "1.0"))
+MEMORY_PROFILING_TRACEMALLOC_FRAMES = 5
+MEMORY_PROFILING_LOG_THRESHOLD_KB = 1024  # warn when one request grows RSS this much
+if MEMORY_PROFILING:
+    MIDDLEWARE = ["app.middleware.MemoryProfilingMiddleware"] + MIDDLEWARE
+
+# Sampling CPU profiler (see app/profiling.py), wrapped around the WSGI/ASGI app
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0.0"))
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILING_HEADER = "X-Profile"
+PROFILING_INTERVAL = 0.005
+PROFILING_DIR = LOGS_DIR / "profiles"
+PROFILING_FORMAT = os.getenv("PROFILING_FORMAT", "collapsed")  # or "speedscope"
+
+# Outbound HTTP client (see app/http_client.py)
+HTTP_CLIENT_TIMEOUT = float(os.getenv("HTTP_CLIENT_TIMEOUT", "5.0"))
+HTTP_CLIENT_RETRIES = 2  # extra attempts for idempotent requests
+HTTP_CLIENT_BACKOFF = 0.1  # seconds, doubled per attempt with full jitter
+HTTP_CLIENT_POOL_SIZE = 10  # concurrent connections per host
+HTTP_CLIENT_BREAKER_THRESHOLD = 5  # consecutive failures before failing fast
+HTTP_CLIENT_BREAKER_RESET = 30.0  # seconds before a trial call is let through
+HTTP_CLIENT_MAX_WORKERS = 32  # threads for gather()/async calls
+
+# Live updates over SSE/WebSockets on the ASGI app (see app/realtime.py)
+REALTIME_SSE_PREFIX = "/events/"
+REALTIME_WS_PREFIX = "/ws/"
+REALTIME_HEARTBEAT = 15.0  # seconds between keep-alives on idle connections
+REALTIME_QUEUE_SIZE = 100  # buffered messages per client before dropping
+REALTIME_MAX_CONNECTIONS = int(os.getenv("REALTIME_MAX_CONNECTIONS", "1000"))
+REALTIME_AUTHORIZE = None  # dotted path to callable(scope, channel) -> bool
+# Share messages between workers, e.g. tcp://127.0.0.1:7379
+# (python manage.py pubsub_broker); empty keeps them in-process
+PUBSUB_BROKER_URL = os.getenv("PUBSUB_BROKER_URL", "")
+
+# Full-text search (see app/search.py): "app_label.Model" -> register() kwargs,
+# e.g. {"blog.Post": {"fields": ["title", "body"], "weights": [2.0, 1.0]}}
+SEARCH_INDEXES = {}
+SEARCH_REBUILD_BATCH_SIZE = 1000
+
+# Materialized counters and sums (see app/aggregates.py), e.g.
+# {"users.active": {"model": "auth.User", "filter": {"is_active": True}}}
+MATERIALIZED_AGGREGATES = {}
+
+# Write-behind buffer for counters and timestamps (see app/write_buffer.py)
+WRITE_BUFFER_FLUSH_INTERVAL = float(os.getenv("WRITE_BUFFER_FLUSH_INTERVAL", "5.0"))
+WRITE_BUFFER_MAX_PENDING = 1000  # flush early once this many writes wait
+WRITE_BUFFER_BATCH_SIZE = 500  # rows per UPDATE/INSERT statement
+# "memory" (per worker) or "cache" (increments shared through the cache)
+WRITE_BUFFER_BACKEND = os.getenv("WRITE_BUFFER_BACKEND", "memory")
+WRITE_BUFFER_CACHE_ALIAS = "default"
+
+# Seed data for `setup_project --seed` (see app/seeding.py), in dependency order
+SEEDERS = ["app.seeding.UserSeeder", "app.seeding.LogEntrySeeder"]
+
+# Streamed page rendering (see app/streaming.py); off in development, where the
+# debug toolbar needs complete responses
+STREAMING_RENDER = os.getenv("STREAMING_RENDER", "false").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+
+# Preload Link headers and 103 Early Hints for static assets (see app/preload.py)
+PRELOAD_MAX_LINKS = 8  # declared plus learned assets announced per page
+PRELOAD_EARLY_HINTS = True  # on ASGI servers with the early hint extension
+
+# JSON API layer (see app/api.py); orjson is used when installed
+API_STREAM_CHUNK_SIZE = 2000  # rows fetched and encoded per streamed chunk
+API_STREAM_GZIP = True  # compress ?stream=1 responses for gzip-capable clients
+
 # Session configuration
 SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
 SESSION_CACHE_ALIAS = "default"
@@ -1,5 +1,7 @@
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 from .settings import *  # noqa: F403
 
 # Production settings
@@ -68,3 +70,19 @@ LOGGING = {
 
 # Secret key from environment
 SECRET_KEY = os.environ.get("SECRET_KEY", SECRET_KEY)  # noqa: F405
+
+# Password hashing: Argon2 unless overridden; "fast" is for tests only
+PASSWORD_HASHER_PROFILE = os.environ.get("PASSWORD_HASHER_PROFILE", "argon2")
+if PASSWORD_HASHER_PROFILE == "fast":
+    raise ImproperlyConfigured("PASSWORD_HASHER_PROFILE=fast is not for production")
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]  # noqa: F405
+
+# Static files: workers refuse to start without collectstatic's manifest
+STATIC_MANIFEST_REQUIRED = True
+
+# Stream pages so the <head> reaches the browser first (see app/streaming.py)
+STREAMING_RENDER = os.environ.get("STREAMING_RENDER", "true").lower() in (
+    "true",
+    "1",
+    "yes",
+)
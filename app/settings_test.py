@@ -0,0 +1,9 @@
+"""
+Settings for the test suite: development settings with cheap password hashing.
+"""
+
+from .settings import *  # noqa: F403
+
+# Every create_user()/login in a test would otherwise cost a full PBKDF2 hash.
+PASSWORD_HASHER_PROFILE = "fast"
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES["fast"]  # noqa: F405
@@ -0,0 +1,96 @@
+"""
+Static file URLs resolved from an in-memory manifest.
+
+``{% static %}`` calls ``staticfiles_storage.url()`` for every tag on every
+render. Django's manifest storage then unquotes, splits and rejoins the name,
+looks it up in the manifest and joins it to ``STATIC_URL`` each time.
+:class:`ManifestStaticFilesStorage` (``STORAGES["staticfiles"]``) keeps the
+final URL of every name in a dict instead:
+
+- :func:`preload` fills it from ``staticfiles.json`` when a WSGI/ASGI worker
+  boots, so in production each ``{% static %}`` is a single dict lookup;
+- other names (with ``#fragment`` or ``?#`` suffixes) are resolved
+  by WhiteNoise's storage once and memoized;
+- ``STATIC_CDN_URL`` replaces ``STATIC_URL`` as the prefix of generated URLs,
+  while WhiteNoise keeps serving ``STATIC_URL`` to the CDN;
+- with ``STATIC_MANIFEST_REQUIRED`` (production settings), a worker without
+  a manifest refuses to start, and a name missing from the manifest raises
+  ``ValueError`` at render time as with Django's storage.
+
+Every URL handed out is also reported to :func:`app.preload.collect`, which
+turns the page's stylesheets and scripts into preload hints.
+
+Without a manifest (development, tests), URLs point at the unhashed files.
+"""
+
+import logging
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import FileSystemStorage
+
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from . import preload as preload_links
+
+logger = logging.getLogger(__name__)
+
+
+class ManifestStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """WhiteNoise's manifest storage with memoized URLs and a CDN prefix."""
+
+    def __init__(self, location=None, base_url=None, *args, **kwargs):
+        if base_url is None:
+            base_url = getattr(settings, "STATIC_CDN_URL", "") or None
+        super().__init__(location, base_url, *args, **kwargs)
+        self._urls = {}
+
+    def preload(self):
+        """Resolve every manifest entry now; return how many there are."""
+        required = getattr(settings, "STATIC_MANIFEST_REQUIRED", False)
+        if not self.hashed_files and required:
+            raise ImproperlyConfigured(
+                f"No {self.manifest_name} in {self.location}; "
+                "run `python manage.py collectstatic` before starting."
+            )
+        if not settings.DEBUG:
+            self._urls.update(
+                # What HashedFilesMixin.url() returns for a manifest name.
+                (name, unquote(self._file_url(hashed)))
+                for name, hashed in self.hashed_files.items()
+            )
+        return len(self.hashed_files)
+
+    def url(self, name, force=False):
+        if force:
+            # collectstatic rewriting references inside CSS; not memoized.
+            return super().url(name, force)
+        url = self._urls.get(name)
+        if url is None:
+            if self.hashed_files or settings.DEBUG:
+                url = super().url(name)
+            else:
+                # No manifest yet: serve the unhashed file.
+                url = self._file_url(name)
+            self._urls[name] = url
+        preload_links.collect(url)
+        return url
+
+    def _file_url(self, name):
+        return FileSystemStorage.url(self, name)
+
+    def post_process(self, *args, **kwargs):
+        self._urls.clear()
+        yield from super().post_process(*args, **kwargs)
+
+
+def preload():
+    """Load the static manifest into memory; called when a worker boots."""
+    preload = getattr(staticfiles_storage, "preload", None)
+    if preload is None:
+        return 0
+    count = preload()
+    logger.debug("Preloaded %d static file URLs", count)
+    return count
@@ -0,0 +1,190 @@
+"""
+Streamed template rendering.
+
+``django.shortcuts.render()`` sends nothing until the whole page is rendered,
+so the browser can't fetch ``main.css`` while the slow part of the page is
+still being computed. With ``STREAMING_RENDER`` on, :func:`render` returns a
+``StreamingHttpResponse`` instead: the page is rendered top to bottom and
+sent in chunks at the ``{% flush %}`` tags of ``base/base.html`` (see
+``app/templatetags/streaming.py``), so the ``<head>`` with its stylesheet
+and preload links goes out first::
+
+    from app import streaming
+
+    def home(request):
+        return streaming.render(request, "home.html", {"page_title": "Home"})
+
+Under WSGI the server pulls the chunks from a generator. Under ASGI each
+chunk is rendered in the sync thread (templates may query the database) and
+sent as soon as it is ready, instead of Django collecting the whole
+iterator first. Chunks render in the request's context, so
+``app.request_cache`` keeps working after the middleware has returned.
+
+Middleware runs before the body is rendered, which limits what streamed
+templates can do. The session middleware can't see a template read
+``{{ user }}``, so streamed responses get ``Vary: Cookie`` and cache
+policies treat them as per-visitor (``private, no-cache``); views whose
+page is the same for every visitor pass ``shared=True`` to keep their
+shared caching. ``{% csrf_token %}`` needs ``get_token(request)`` to be
+called in the view so the cookie is set, messages shown while streaming are
+not marked as read, and session changes are not saved. Errors after the
+first chunk cut the response short rather than producing an error page.
+Views with such templates should pass ``stream=False``. ``STREAMING_RENDER``
+is off in development, where the debug toolbar needs complete responses.
+"""
+
+import contextvars
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.shortcuts import render as render_response
+from django.template import loader
+from django.template.base import TextNode
+from django.template.context import make_context
+from django.template.loader_tags import (
+    BLOCK_CONTEXT_KEY,
+    BlockContext,
+    BlockNode,
+    ExtendsNode,
+)
+from django.utils.cache import patch_vary_headers
+
+from asgiref.sync import sync_to_async
+
+from .templatetags.streaming import FlushNode
+
+
+def render(
+    request,
+    template_name,
+    context=None,
+    content_type=None,
+    status=None,
+    using=None,
+    stream=None,
+    shared=False,
+):
+    """
+    Like ``django.shortcuts.render()``, streamed when ``STREAMING_RENDER`` is on.
+
+    ``stream`` overrides the setting for one view; ``shared=True`` declares
+    that the streamed page does not depend on the visitor.
+    """
+    if stream is None:
+        stream = getattr(settings, "STREAMING_RENDER", False)
+    if not stream:
+        return render_response(
+            request, template_name, context, content_type, status, using
+        )
+    return streaming_response(
+        request, template_name, context, content_type, status, using, shared
+    )
+
+
+def streaming_response(
+    request,
+    template_name,
+    context=None,
+    content_type=None,
+    status=None,
+    using=None,
+    shared=False,
+):
+    """Return a ``StreamingHttpResponse`` rendering ``template_name`` in chunks."""
+    if isinstance(template_name, (list, tuple)):
+        template = loader.select_template(template_name, using=using)
+    else:
+        template = loader.get_template(template_name, using=using)
+    chunks = render_chunks(template, context, request)
+
+    # Render each chunk in a copy of the request's context.
+    run = contextvars.copy_context().run
+    if isinstance(request, ASGIRequest):
+        content = _async_chunks(run, chunks)
+    else:
+        content = _sync_chunks(run, chunks)
+
+    response = StreamingHttpResponse(content, content_type=content_type, status=status)
+    # Stop nginx from buffering the response until it is complete.
+    response["X-Accel-Buffering"] = "no"
+    if not shared:
+        # The template may read the user or session after SessionMiddleware
+        # has decided the response doesn't vary on them.
+        patch_vary_headers(response, ("Cookie",))
+    return response
+
+
+def _sync_chunks(run, chunks):
+    try:
+        while (chunk := run(next, chunks, None)) is not None:
+            yield chunk
+    finally:
+        chunks.close()
+
+
+async def _async_chunks(run, chunks):
+    render_next = sync_to_async(run, thread_sensitive=True)
+    try:
+        while (chunk := await render_next(next, chunks, None)) is not None:
+            yield chunk
+    finally:
+        chunks.close()
+
+
+def render_chunks(template, context=None, request=None):
+    """
+    Yield the output of a backend ``template`` split at top-level ``{% flush %}``.
+
+    Templates of other backends than Django's are yielded in one chunk.
+    """
+    origin = getattr(template, "template", None)
+    if origin is None:
+        yield template.render(context, request)
+        return
+    context = make_context(
+        context, request, autoescape=template.backend.engine.autoescape
+    )
+    buffer = []
+    with context.render_context.push_state(origin):
+        with context.bind_template(origin):
+            context.template_name = origin.name
+            for node in _top_level_nodes(origin, context):
+                if isinstance(node, FlushNode):
+                    if buffer:
+                        yield "".join(buffer)
+                        buffer = []
+                else:
+                    buffer.append(node.render_annotated(context))
+    if buffer:
+        yield "".join(buffer)
+
+
+def _top_level_nodes(template, context):
+    """
+    Yield the nodes of the root template ``template`` extends, in order.
+
+    Follows ``{% extends %}`` the way ``ExtendsNode.render()`` does, so
+    blocks render with the same overrides and ``{{ block.super }}``.
+    """
+    extends = next(
+        (node for node in template.nodelist if not isinstance(node, TextNode)), None
+    )
+    if not isinstance(extends, ExtendsNode):
+        yield from template.nodelist
+        return
+
+    parent = extends.get_parent(context)
+    if BLOCK_CONTEXT_KEY not in context.render_context:
+        context.render_context[BLOCK_CONTEXT_KEY] = BlockContext()
+    block_context = context.render_context[BLOCK_CONTEXT_KEY]
+    block_context.add_blocks(extends.blocks)
+    first = next(
+        (node for node in parent.nodelist if not isinstance(node, TextNode)), None
+    )
+    if not isinstance(first, ExtendsNode):
+        block_context.add_blocks(
+            {node.name: node for node in parent.nodelist.get_nodes_by_type(BlockNode)}
+        )
+    with context.render_context.push_state(parent, isolated_context=False):
+        yield from _top_level_nodes(parent, context)
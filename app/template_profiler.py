@@ -0,0 +1,82 @@
+"""
+Template-level profiler.
+
+Collects render time per ``{% block %}`` and per ``{% fragmentcache %}``
+fragment for the current request. ``TemplateProfilerMiddleware`` reports the
+timings in a ``Server-Timing`` header (visible in the browser's network panel)
+and in the ``app.template_profiler`` log.
+
+Enable with ``TEMPLATE_PROFILING=true``.
+"""
+
+import logging
+import re
+import time
+
+from django.template.loader_tags import BlockNode
+
+logger = logging.getLogger(__name__)
+
+TIMINGS_ATTR = "_template_timings"
+
+_original_block_render = None
+
+
+def record(context, name, duration, **info):
+    """Add a timing for ``name`` to the request rendering ``context``."""
+    request = getattr(context, "request", None)
+    if request is None:
+        return
+
+    timings = getattr(request, TIMINGS_ATTR, None)
+    if timings is None:
+        timings = {}
+        setattr(request, TIMINGS_ATTR, timings)
+
+    entry = timings.setdefault(name, {"duration": 0.0, "count": 0})
+    entry["duration"] += duration
+    entry["count"] += 1
+    entry.update(info)
+
+
+def get_timings(request):
+    """Return ``{name: {"duration": seconds, "count": n, ...}}`` for a request."""
+    return getattr(request, TIMINGS_ATTR, {})
+
+
+def _profiled_block_render(self, context):
+    start = time.perf_counter()
+    try:
+        return _original_block_render(self, context)
+    finally:
+        record(context, f"block.{self.name}", time.perf_counter() - start)
+
+
+def install():
+    """Time every ``{% block %}`` render. Safe to call more than once."""
+    global _original_block_render
+
+    if _original_block_render is None:
+        _original_block_render = BlockNode.render
+        BlockNode.render = _profiled_block_render
+
+
+def uninstall():
+    """Restore the original ``BlockNode.render``."""
+    global _original_block_render
+
+    if _original_block_render is not None:
+        BlockNode.render = _original_block_render
+        _original_block_render = None
+
+
+def server_timing(timings):
+    """Format ``timings`` as a ``Server-Timing`` header value."""
+    metrics = []
+    for name, entry in timings.items():
+        token = re.sub(r"[^A-Za-z0-9._-]", "_", name)
+        metric = f"{token};dur={entry['duration'] * 1000:.2f}"
+        if "cache" in entry:
+            metric += f';desc="{entry["cache"]}"'
+        metrics.append(metric)
+    return ", ".join(metrics)
@@ -0,0 +1,167 @@
+"""
+Fragment caching keyed by explicit dependencies.
+
+Usage::
+
+    {% load fragment_cache %}
+    {% fragmentcache "navbar" language user %}
+        ... shared page chrome ...
+    {% endfragmentcache %}
+
+The first argument names the fragment. The remaining arguments are the
+dependencies that make up the cache key:
+
+- ``language``: the active language;
+- ``user``: the authenticated user's id (anonymous users share one entry);
+- any other template variable, e.g. ``page_obj.number``.
+
+The settings fingerprint (see :func:`settings_fingerprint`) is always part of
+the key, so a deploy that changes settings or ``FRAGMENT_CACHE_VERSION``
+never serves fragments rendered under the previous configuration. Pass
+``timeout=<seconds>`` to override ``FRAGMENT_CACHE_TIMEOUT``.
+
+Entries are stored through :func:`app.caching.get_or_compute`, so they are
+refreshed early under load and, on a miss, only one renderer per key fills the
+cache while concurrent requests wait up to ``FRAGMENT_CACHE_LOCK_WAIT``
+seconds for it before rendering uncached.
+
+A hit still costs a key build and a cache round trip, so only wrap fragments
+that query the database or loop over data; static markup renders faster than
+it can be fetched.
+"""
+
+import functools
+import hashlib
+import time
+
+from django import template
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import translation
+
+from app import template_profiler
+from app.caching import get_or_compute
+
+register = template.Library()
+
+# Settings that change the output of the shared page chrome.
+FINGERPRINT_SETTINGS = (
+    "PROJECT_NAME",
+    "PROJECT_DESCRIPTION",
+    "DEBUG",
+    "STATIC_URL",
+    "LANGUAGE_CODE",
+    "FRAGMENT_CACHE_VERSION",
+)
+
+BUILTIN_DEPENDENCIES = ("language", "user")
+
+
+@functools.cache
+def settings_fingerprint():
+    """Return a short hash of the settings listed in FINGERPRINT_SETTINGS."""
+    values = [repr(getattr(settings, name, None)) for name in FINGERPRINT_SETTINGS]
+    return hashlib.sha256("|".join(values).encode()).hexdigest()[:12]
+
+
+@receiver(setting_changed)
+def _reset_fingerprint(setting, **kwargs):
+    if setting in FINGERPRINT_SETTINGS:
+        settings_fingerprint.cache_clear()
+
+
+def make_fragment_key(name, dependencies):
+    """Build the cache key for fragment ``name`` and its resolved dependencies."""
+    parts = [settings_fingerprint(), *(str(value) for value in dependencies)]
+    digest = hashlib.sha256("|".join(parts).encode()).hexdigest()
+    return f"fragment:{name}:{digest}"
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, name, dependencies, timeout):
+        self.nodelist = nodelist
+        self.name = name
+        self.dependencies = dependencies
+        self.timeout = timeout
+
+    def resolve_dependency(self, dependency, context):
+        if dependency == "language":
+            return translation.get_language()
+        if dependency == "user":
+            request = getattr(context, "request", None)
+            user = getattr(request, "user", None) or context.get("user")
+            if user is None or not user.is_authenticated:
+                return "anonymous"
+            return user.pk
+        return dependency.resolve(context)
+
+    def render(self, context):
+        start = time.perf_counter()
+        name = self.name.resolve(context)
+        if self.timeout is not None:
+            timeout = int(self.timeout.resolve(context))
+        else:
+            timeout = getattr(settings, "FRAGMENT_CACHE_TIMEOUT", 300)
+
+        key = make_fragment_key(
+            name,
+            [self.resolve_dependency(dep, context) for dep in self.dependencies],
+        )
+        rendered = False
+
+        def render_fragment():
+            nonlocal rendered
+            rendered = True
+            return self.nodelist.render(context)
+
+        value = get_or_compute(
+            key,
+            render_fragment,
+            timeout,
+            lock_wait=getattr(settings, "FRAGMENT_CACHE_LOCK_WAIT", 0.5),
+            using=getattr(settings, "FRAGMENT_CACHE_ALIAS", "default"),
+        )
+
+        template_profiler.record(
+            context,
+            f"fragment.{name}",
+            time.perf_counter() - start,
+            cache="miss" if rendered else "hit",
+        )
+        return value
+
+
+@register.tag("fragmentcache")
+def do_fragmentcache(parser, token):
+    """
+    Cache the enclosed template fragment by name and explicit dependencies.
+
+    Usage::
+
+        {% fragmentcache "name" [language] [user] [var ...] [timeout=300] %}
+            ...
+        {% endfragmentcache %}
+    """
+    nodelist = parser.parse(("endfragmentcache",))
+    parser.delete_first_token()
+
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least a fragment name."
+        )
+
+    dependencies = []
+    timeout = None
+    for bit in bits[2:]:
+        if bit.startswith("timeout="):
+            timeout = parser.compile_filter(bit[len("timeout=") :])
+        elif bit in BUILTIN_DEPENDENCIES:
+            dependencies.append(bit)
+        else:
+            dependencies.append(parser.compile_filter(bit))
+
+    return FragmentCacheNode(
+        nodelist, parser.compile_filter(bits[1]), dependencies, timeout
+    )
@@ -0,0 +1,90 @@
+"""
+Responsive image tags backed by ``app.images`` derivatives.
+
+Usage::
+
+    {% load images %}
+    <img src="/media/photos/cat.jpg" alt="A cat" sizes="50vw"
+         srcset="{% srcset "photos/cat.jpg" "webp" %}">
+
+    {% picture "photos/cat.jpg" alt="A cat" sizes="100vw" %}
+
+Paths are relative to ``MEDIA_ROOT``. ``{% picture %}`` emits one
+``<source>`` per format in ``IMAGE_FORMATS`` the installed Pillow can write,
+then the original as the ``<img>`` fallback. Only widths up to the
+original's are listed, and each URL carries a digest of the source so
+caches can keep derivatives for a year.
+"""
+
+from pathlib import Path
+
+from django import template
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.urls import reverse
+from django.utils._os import safe_join
+from django.utils.html import format_html, format_html_join
+
+from app import images
+
+register = template.Library()
+
+
+def _source(path):
+    try:
+        source = Path(safe_join(settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation:
+        return None
+    return source if source.is_file() else None
+
+
+def _candidates(path, fmt):
+    """Return ``[(url, width)]`` for the derivatives of ``path`` in ``fmt``."""
+    source = _source(path)
+    if source is None or fmt not in images.supported_formats():
+        return []
+    try:
+        size = images.image_size(source)
+    except OSError:
+        return []  # Not a readable image; only the original is linked.
+    version = images.source_digest(source)[:12]
+    return [
+        (
+            reverse("image-derivative", args=[width, fmt, path]) + f"?v={version}",
+            min(width, size[0]),
+        )
+        for width in images.widths_for(size)
+    ]
+
+
+def _srcset(candidates):
+    return ", ".join(f"{url} {width}w" for url, width in candidates)
+
+
+@register.simple_tag
+def srcset(path, fmt="webp"):
+    """Return a ``srcset`` value listing the ``fmt`` derivatives of ``path``."""
+    return _srcset(_candidates(path, fmt))
+
+
+@register.simple_tag
+def picture(path, alt="", sizes="100vw", css_class=""):
+    """Render a ``<picture>`` with modern formats and the original as fallback."""
+    candidates = {fmt: _candidates(path, fmt) for fmt in images.supported_formats()}
+    sources = format_html_join(
+        "",
+        '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (images.FORMATS[fmt][2], _srcset(found), sizes)
+            for fmt, found in candidates.items()
+            if found
+        ),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" alt="{}" class="{}" loading="lazy"'
+        ' decoding="async"></picture>',
+        sources,
+        settings.MEDIA_URL + path,
+        alt,
+        css_class,
+    )
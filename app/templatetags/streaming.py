@@ -0,0 +1,32 @@
+"""
+Flush points for streamed pages.
+
+Usage::
+
+    {% load streaming %}
+    </head>
+    {% flush %}
+
+When a page is rendered with ``app.streaming.render`` and
+``STREAMING_RENDER`` is on, everything before a top-level ``{% flush %}`` is
+sent to the browser before anything after it is rendered. Only tags at the
+top level of the root template (usually ``base/base.html``, outside any
+``{% block %}``) are flush points. In a regular render the tag outputs
+nothing.
+"""
+
+from django import template
+
+register = template.Library()
+
+
+class FlushNode(template.Node):
+    def render(self, context):
+        return ""
+
+
+@register.tag
+def flush(parser, token):
+    if len(token.split_contents()) != 1:
+        raise template.TemplateSyntaxError("'flush' takes no arguments")
+    return FlushNode()
@@ -0,0 +1,354 @@
+"""
+Streaming and resumable file uploads.
+
+Uploads are written straight to ``UPLOAD_ROOT`` (under ``MEDIA_ROOT``) in
+``UPLOAD_CHUNK_SIZE`` pieces while a SHA-256 is computed, so worker memory
+stays flat regardless of file size and nothing is copied out of a temporary
+file afterwards: a finished upload is renamed into place on the same
+filesystem.
+
+Two entry points use :class:`PartialUpload`:
+
+- :class:`StreamingUploadHandler` for ordinary ``multipart/form-data`` posts
+  (see ``app.views.upload_file``). It rejects requests whose
+  ``Content-Length`` exceeds ``UPLOAD_MAX_SIZE`` before reading the body,
+  and :meth:`StreamingUploadHandler.discard` removes what it stored when a
+  request fails part way.
+- A resumable protocol modelled on tus (see ``app.views.create_upload`` and
+  ``app.views.upload_detail``): ``POST`` declares the file name, size and
+  optional checksum; each ``PATCH`` appends a chunk at ``Upload-Offset``;
+  ``HEAD`` tells an interrupted client where to resume. The upload is
+  finished when the declared size has arrived.
+
+Abandoned partial uploads older than ``UPLOAD_EXPIRY`` seconds are removed
+when new uploads are created.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.utils.text import get_valid_filename
+
+logger = logging.getLogger(__name__)
+
+PART_SUFFIX = ".part"
+META_SUFFIX = ".json"
+
+
+class UploadError(Exception):
+    """An upload was rejected; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def upload_root():
+    return Path(getattr(settings, "UPLOAD_ROOT", Path(settings.MEDIA_ROOT) / "uploads"))
+
+
+def max_upload_size():
+    return getattr(settings, "UPLOAD_MAX_SIZE", 5 * 1024**3)
+
+
+def chunk_size():
+    return getattr(settings, "UPLOAD_CHUNK_SIZE", 1024 * 1024)
+
+
+def media_url(path):
+    """Return the public URL of ``path``, or None if it is outside MEDIA_ROOT."""
+    try:
+        relative = Path(path).relative_to(settings.MEDIA_ROOT)
+    except ValueError:
+        return None
+    return settings.MEDIA_URL + relative.as_posix()
+
+
+# Running hashes by upload id, valid while the part file has the recorded
+# length. A resumed upload served by another worker rehashes what it has.
+_hashers = {}
+_hashers_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+class PartialUpload:
+    """An upload being written to ``UPLOAD_ROOT/partial/<id>.part``."""
+
+    def __init__(self, upload_id, meta):
+        self.id = upload_id
+        self.meta = meta
+
+    @staticmethod
+    def directory():
+        return upload_root() / "partial"
+
+    @property
+    def part_path(self):
+        return self.directory() / f"{self.id}{PART_SUFFIX}"
+
+    @property
+    def meta_path(self):
+        return self.directory() / f"{self.id}{META_SUFFIX}"
+
+    @property
+    def filename(self):
+        return self.meta["filename"]
+
+    @property
+    def size(self):
+        """The declared size, or None for multipart uploads."""
+        return self.meta.get("size")
+
+    @property
+    def offset(self):
+        try:
+            return self.part_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    @classmethod
+    def create(cls, filename, size=None, sha256=None):
+        limit = max_upload_size()
+        if size is not None and size > limit:
+            raise UploadError(413, f"Uploads are limited to {limit} bytes")
+        remove_expired()
+
+        upload = cls(
+            uuid.uuid4().hex,
+            {
+                "filename": get_valid_filename(Path(filename).name) or "upload",
+                "size": size,
+                "sha256": sha256.lower() if sha256 else None,
+                "created": time.time(),
+            },
+        )
+        upload.directory().mkdir(parents=True, exist_ok=True)
+        upload.part_path.touch()
+        upload.meta_path.write_text(json.dumps(upload.meta))
+        return upload
+
+    @classmethod
+    def load(cls, upload_id):
+        try:
+            uuid.UUID(hex=upload_id)
+            path = cls.directory() / f"{upload_id}{META_SUFFIX}"
+            return cls(upload_id, json.loads(path.read_text()))
+        except (ValueError, OSError):
+            raise UploadError(404, "Unknown upload") from None
+
+    def _hasher(self, offset):
+        with _hashers_lock:
+            cached = _hashers.get(self.id)
+        if cached is not None and cached[0] == offset:
+            return cached[1]
+        hasher = hashlib.sha256()
+        with open(self.part_path, "rb") as file:
+            while chunk := file.read(chunk_size()):
+                hasher.update(chunk)
+        return hasher
+
+    def open(self, offset=None):
+        """
+        Lock the upload and return an :class:`Appender` for it.
+
+        Raises :class:`UploadError` if ``offset`` is not where the upload
+        currently ends.
+        """
+        file = open(self.part_path, "ab")
+        # Concurrent PATCHes to one upload would interleave their bytes.
+        fcntl.flock(file, fcntl.LOCK_EX)
+        if offset is not None and offset != file.tell():
+            file.close()
+            raise UploadError(409, f"Upload is not at offset {offset}")
+        return Appender(self, file, self._hasher(file.tell()))
+
+    def append_stream(self, stream, length, offset):
+        """Append ``length`` bytes read from ``stream`` at ``offset``."""
+        if self.size is not None and offset + length > self.size:
+            raise UploadError(413, "Chunk extends past the declared upload size")
+        with self.open(offset) as appender:
+            remaining = length
+            while remaining:
+                chunk = stream.read(min(chunk_size(), remaining))
+                if not chunk:
+                    break
+                appender.write(chunk)
+                remaining -= len(chunk)
+
+    @property
+    def complete(self):
+        return self.size is not None and self.offset == self.size
+
+    def finish(self):
+        """Verify the checksum and move the file into place; return its path."""
+        sha256 = self._hasher(self.offset).hexdigest()
+        expected = self.meta.get("sha256")
+        if expected and expected != sha256:
+            self.delete()
+            raise UploadError(400, "Checksum mismatch")
+
+        target = upload_root() / time.strftime("%Y/%m/%d") / self.id / self.filename
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self.part_path, target)
+        self.meta_path.unlink(missing_ok=True)
+        with _hashers_lock:
+            _hashers.pop(self.id, None)
+        return target, sha256
+
+    def delete(self):
+        self.part_path.unlink(missing_ok=True)
+        self.meta_path.unlink(missing_ok=True)
+        with _hashers_lock:
+            _hashers.pop(self.id, None)
+
+
+class Appender:
+    """Appends chunks to a locked upload while hashing them."""
+
+    def __init__(self, upload, file, hasher):
+        self.upload = upload
+        self.file = file
+        self.hasher = hasher
+        self.written = file.tell()
+        self.limit = upload.size if upload.size is not None else max_upload_size()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, chunk):
+        if self.written + len(chunk) > self.limit:
+            raise UploadError(413, f"Upload exceeds {self.limit} bytes")
+        self.file.write(chunk)
+        self.hasher.update(chunk)
+        self.written += len(chunk)
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.close()
+        with _hashers_lock:
+            _hashers[self.upload.id] = (self.written, self.hasher)
+
+
+def remove_expired(max_age=None):
+    """Delete partial uploads untouched for ``max_age`` seconds."""
+    global _last_sweep
+
+    max_age = getattr(settings, "UPLOAD_EXPIRY", 86400) if max_age is None else max_age
+    now = time.time()
+    if now - _last_sweep < min(max_age, 3600):
+        return
+    _last_sweep = now
+    directory = PartialUpload.directory()
+    if not directory.is_dir():
+        return
+    removed = 0
+    for path in directory.glob(f"*{PART_SUFFIX}"):
+        try:
+            if now - path.stat().st_mtime > max_age:
+                PartialUpload(path.name[: -len(PART_SUFFIX)], {}).delete()
+                removed += 1
+        except FileNotFoundError:
+            pass
+    if removed:
+        logger.info("Removed %d expired partial uploads", removed)
+
+
+class StreamedUploadedFile(UploadedFile):
+    """A multipart upload already stored at its final ``path``."""
+
+    def __init__(self, path, name, content_type, size, charset, extra, sha256):
+        super().__init__(open(path, "rb"), name, content_type, size, charset, extra)
+        self.path = path
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        # Lets FileSystemStorage move the file instead of copying it.
+        return str(self.path)
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            pass
+
+
+class StreamingUploadHandler(FileUploadHandler):
+    """
+    Write multipart file fields straight into ``UPLOAD_ROOT``.
+
+    Install it on one view before the request body is read::
+
+        request.upload_handlers = [StreamingUploadHandler(request)]
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.chunk_size = chunk_size()
+        self.upload = None
+        self.appender = None
+        self.stored = []
+
+    def handle_raw_input(
+        self, input_data, META, content_length, boundary, encoding=None
+    ):
+        limit = max_upload_size()
+        if content_length > limit:
+            raise UploadError(413, f"Uploads are limited to {limit} bytes")
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.upload = PartialUpload.create(self.file_name)
+        self.appender = self.upload.open()
+
+    def receive_data_chunk(self, raw_data, start):
+        try:
+            self.appender.write(raw_data)
+        except UploadError:
+            self.upload_interrupted()
+            raise
+
+    def file_complete(self, file_size):
+        self.appender.close()
+        path, sha256 = self.upload.finish()
+        self.upload = None
+        self.stored.append(path)
+        return StreamedUploadedFile(
+            path,
+            self.file_name,
+            self.content_type,
+            file_size,
+            self.charset,
+            self.content_type_extra,
+            sha256,
+        )
+
+    def upload_interrupted(self):
+        if self.upload is not None:
+            self.appender.close()
+            self.upload.delete()
+            self.upload = None
+
+    def discard(self):
+        """Delete the files of a rejected request, finished or not."""
+        self.upload_interrupted()
+        for path in self.stored:
+            path.unlink(missing_ok=True)
+            try:
+                path.parent.rmdir()
+            except OSError:
+                pass
+        self.stored = []
@@ -24,6 +24,15 @@ from . import views
 
 urlpatterns = [
     path("", views.home, name="home"),
+    path("uploads/", views.create_upload, name="upload-create"),
+    path("uploads/form/", views.upload_file, name="upload-file"),
+    path("uploads/<str:upload_id>/", views.upload_detail, name="upload-detail"),
+    path("protected/<path:path>", views.protected_file, name="protected-file"),
+    path(
+        "img/<int:width>/<str:fmt>/<path:path>",
+        views.image_derivative,
+        name="image-derivative",
+    ),
     path("admin/", admin.site.urls),
 ]
 
@@ -2,16 +2,233 @@
 Views for the main Django application.
 """
 
-from django.shortcuts import render
+import json
+from pathlib import Path
 
+from django.conf import settings
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.http import Http404, HttpResponse, JsonResponse, QueryDict
+from django.middleware.csrf import CsrfViewMiddleware
+from django.urls import reverse
+from django.utils._os import safe_join
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods, require_POST
 
+from . import images, preload, protected_media, streaming
+from .uploads import PartialUpload, StreamingUploadHandler, UploadError, media_url
+
+
+@preload.preload_static("css/main.css", "js/main.js")
 def home(request):
     """
     Home page view.
 
-    Renders the home template with project context.
+    Renders the home template with project context, streamed when
+    ``STREAMING_RENDER`` is on. The page is the same for every visitor, so
+    it keeps its shared cache policy when streamed.
     """
     context = {
         "page_title": "Home",
     }
-    return render(request, "home.html", context)
+    return streaming.render(request, "home.html", context, shared=True)
+
+
+def _upload_error(error):
+    return JsonResponse({"error": str(error)}, status=error.status)
+
+
+def _may_upload(request):
+    if not getattr(settings, "UPLOAD_REQUIRE_AUTH", True):
+        return True
+    return request.user.is_authenticated
+
+
+@csrf_exempt
+@require_POST
+def upload_file(request):
+    """
+    Multipart upload view streaming files straight into ``UPLOAD_ROOT``.
+
+    The upload handler has to be installed before anything reads the body,
+    and nothing may be stored before the request is known to be allowed. So
+    the user and the CSRF token are checked first, with the token taken from
+    the ``X-CSRFToken`` header: reading it from the form would store the
+    whole upload before the check.
+    """
+    if not _may_upload(request):
+        return JsonResponse({"error": "Authentication required"}, status=403)
+    rejected = _check_csrf_header(request)
+    if rejected is not None:
+        return rejected
+
+    handler = StreamingUploadHandler(request)
+    request.upload_handlers = [handler]
+    try:
+        files = [
+            {
+                "field": field,
+                "name": upload.name,
+                "size": upload.size,
+                "sha256": upload.sha256,
+                "url": media_url(upload.path),
+            }
+            for field, upload in request.FILES.items()
+        ]
+    except UploadError as error:
+        handler.discard()
+        return _upload_error(error)
+    except Exception:
+        handler.discard()
+        raise
+    for upload in request.FILES.values():
+        _uploaded(upload.path)
+    return JsonResponse({"files": files}, status=201)
+
+
+def _check_csrf_header(request):
+    """
+    Run the CSRF checks without reading the body; return the 403 or None.
+
+    ``CsrfViewMiddleware`` looks for the token in ``request.POST`` first.
+    An empty ``POST`` makes it fall back to the header, and is removed again
+    so the upload handler parses the real body.
+    """
+    csrf = CsrfViewMiddleware(upload_file)
+    csrf.process_request(request)
+    request.POST = QueryDict()
+    try:
+        return csrf.process_view(request, None, (), {})
+    finally:
+        del request._post
+
+
+@require_POST
+def create_upload(request):
+    """
+    Start a resumable upload.
+
+    Expects ``{"filename": ..., "size": ..., "sha256": ...}`` (checksum
+    optional) and answers with the upload's URL in ``Location``.
+    """
+    if not _may_upload(request):
+        return JsonResponse({"error": "Authentication required"}, status=403)
+    try:
+        payload = json.loads(request.body)
+        size = int(payload["size"])
+        if size < 0:
+            raise ValueError(size)
+        upload = PartialUpload.create(payload["filename"], size, payload.get("sha256"))
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": "Expected filename and size"}, status=400)
+    except UploadError as error:
+        return _upload_error(error)
+
+    response = JsonResponse({"id": upload.id, "offset": 0}, status=201)
+    response["Location"] = reverse("upload-detail", args=[upload.id])
+    response["Upload-Offset"] = "0"
+    return response
+
+
+@require_http_methods(["HEAD", "PATCH", "DELETE"])
+def upload_detail(request, upload_id):
+    """
+    Resume (``HEAD``), append to (``PATCH``) or abort (``DELETE``) an upload.
+
+    ``PATCH`` bodies are appended at the ``Upload-Offset`` header, which must
+    match the current offset. The response to the final chunk describes the
+    stored file.
+    """
+    if not _may_upload(request):
+        return JsonResponse({"error": "Authentication required"}, status=403)
+    try:
+        upload = PartialUpload.load(upload_id)
+        if request.method == "DELETE":
+            upload.delete()
+            return HttpResponse(status=204)
+        if request.method == "PATCH":
+            try:
+                offset = int(request.headers["Upload-Offset"])
+                length = int(request.headers["Content-Length"])
+            except (KeyError, ValueError):
+                return JsonResponse(
+                    {"error": "Upload-Offset and Content-Length are required"},
+                    status=400,
+                )
+            upload.append_stream(request, length, offset)
+            if upload.complete:
+                return _finished_upload(upload)
+    except UploadError as error:
+        return _upload_error(error)
+
+    response = HttpResponse(status=204 if request.method == "PATCH" else 200)
+    response["Upload-Offset"] = str(upload.offset)
+    response["Upload-Length"] = str(upload.size)
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+def _uploaded(path):
+    if getattr(settings, "IMAGE_PREGENERATE_ON_UPLOAD", False):
+        images.pregenerate(path)
+
+
+def _finished_upload(upload):
+    size = upload.size
+    path, sha256 = upload.finish()
+    _uploaded(path)
+    response = JsonResponse(
+        {"name": path.name, "size": size, "sha256": sha256, "url": media_url(path)}
+    )
+    response["Upload-Offset"] = str(size)
+    return response
+
+
+@require_http_methods(["GET", "HEAD"])
+def protected_file(request, path):
+    """
+    Serve a file from ``PROTECTED_MEDIA_ROOT`` to authorized users.
+
+    ``PROTECTED_MEDIA_AUTHORIZE`` may name a ``callable(request, path)``;
+    by default any logged-in user may download. The bytes are sent by the
+    front-end server or ``sendfile()`` (see ``app/protected_media.py``).
+    """
+    authorize = getattr(settings, "PROTECTED_MEDIA_AUTHORIZE", None)
+    if authorize:
+        allowed = import_string(authorize)(request, path)
+    else:
+        allowed = request.user.is_authenticated
+    if not allowed:
+        raise PermissionDenied
+    return protected_media.serve(request, path, as_attachment="download" in request.GET)
+
+
+@require_http_methods(["GET", "HEAD"])
+def image_derivative(request, width, fmt, path):
+    """
+    Serve a resized ``fmt`` variant of an image under ``MEDIA_ROOT``.
+
+    Only ``IMAGE_WIDTHS`` and ``IMAGE_FORMATS`` are accepted, so clients
+    cannot make the server render arbitrary sizes. The first request renders
+    the variant in the image process pool; later ones are cache hits.
+    """
+    if width not in settings.IMAGE_WIDTHS or fmt not in images.supported_formats():
+        raise Http404("Unknown image variant")
+    try:
+        source = Path(safe_join(settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404("Invalid path") from None
+    if not source.is_file() or source.suffix.lower() not in images.IMAGE_EXTENSIONS:
+        raise Http404("Image not found")
+    if source.resolve().is_relative_to(images.cache_dir().resolve()):
+        raise Http404("Derivatives have no derivatives")
+
+    try:
+        derivative = images.get_derivative(source, width, fmt)
+    except TimeoutError:
+        response = HttpResponse("Image is still rendering", status=503)
+        response["Retry-After"] = "1"
+        return response
+    except OSError:
+        raise Http404("Not a readable image") from None
+    return protected_media.file_response(request, derivative)
@@ -0,0 +1,308 @@
+"""
+Write-behind buffering for frequent, loss-tolerant writes.
+
+Hit counters and "last seen" timestamps don't need to reach the database on
+the request path. Code records them here instead::
+
+    from app import write_buffer
+
+    write_buffer.increment(Article, article.pk, "views")
+    write_buffer.update(Profile, profile.pk, last_seen=timezone.now())
+    write_buffer.upsert(DailyStat, ["day", "path"], day=today, path=path, hits=n)
+
+Writes to the same row are coalesced in memory and flushed in one
+transaction every ``WRITE_BUFFER_FLUSH_INTERVAL`` seconds by a background
+thread. The thread also flushes early once ``WRITE_BUFFER_MAX_PENDING`` writes
+are waiting:
+
+- increments become one ``UPDATE ... SET f = f + CASE pk WHEN ... END`` per
+  model and field;
+- updates become ``bulk_update()`` batches (the last value wins);
+- upserts become ``bulk_create(update_conflicts=True)`` (``INSERT ... ON
+  CONFLICT DO UPDATE``).
+
+With ``WRITE_BUFFER_BACKEND = "cache"``, increments are added to the shared
+cache with atomic ``incr`` instead. Hits from all workers on one row then
+become a single ``UPDATE`` from whichever worker flushes first. Flushing
+workers claim counts with an atomic ``decr`` and hand back what a concurrent
+flush already took, which needs a cache whose counters can go negative
+(Redis, locmem); memcached stops at zero, so there two workers flushing the
+same key at once may count its hits twice.
+
+Pending writes are flushed from gunicorn's ``worker_exit`` hook and at
+interpreter exit. A ``SIGKILL`` or crash loses at most one interval of writes,
+which is the trade-off this module is for. ``WRITE_BUFFER_FLUSH_INTERVAL = 0``
+writes through immediately.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, Value, When
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class WriteBuffer:
+    """Coalesced pending writes of one process."""
+
+    def __init__(self, flush_interval=5.0, max_pending=1000, batch_size=500):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        # (model, field) -> {pk: amount}
+        self.increments = defaultdict(lambda: defaultdict(int))
+        # model -> {pk: {field: value}}
+        self.updates = defaultdict(dict)
+        # (model, unique_fields) -> {unique values: row}
+        self.upserts = defaultdict(dict)
+        self.pending = 0
+        self._wake = threading.Event()
+        self._thread = None
+
+    def increment(self, model, pk, field, amount=1):
+        with self.lock:
+            self.increments[model, field][pk] += amount
+        self._added()
+
+    def update(self, model, pk, **values):
+        with self.lock:
+            self.updates[model].setdefault(pk, {}).update(values)
+        self._added()
+
+    def upsert(self, model, unique_fields, **values):
+        unique_fields = tuple(unique_fields)
+        key = tuple(values[field] for field in unique_fields)
+        with self.lock:
+            self.upserts[model, unique_fields].setdefault(key, {}).update(values)
+        self._added()
+
+    def _added(self):
+        if not self.flush_interval:
+            self.flush()
+            return
+        with self.lock:
+            self.pending += 1
+            full = self.pending >= self.max_pending
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="write-buffer", daemon=True
+                )
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Write buffer flush failed")
+            finally:
+                close_old_connections()
+
+    def take(self):
+        """Remove and return everything pending."""
+        with self.lock:
+            taken = (self.increments, self.updates, self.upserts)
+            self.increments = defaultdict(lambda: defaultdict(int))
+            self.updates = defaultdict(dict)
+            self.upserts = defaultdict(dict)
+            self.pending = 0
+        return taken
+
+    def restore(self, taken):
+        """Put writes that failed to flush back, behind newer ones."""
+        increments, updates, upserts = taken
+        with self.lock:
+            for key, amounts in increments.items():
+                for pk, amount in amounts.items():
+                    self.increments[key][pk] += amount
+            for model, rows in updates.items():
+                for pk, values in rows.items():
+                    self.updates[model][pk] = {
+                        **values,
+                        **self.updates[model].get(pk, {}),
+                    }
+            for key, rows in upserts.items():
+                for unique, values in rows.items():
+                    self.upserts[key][unique] = {
+                        **values,
+                        **self.upserts[key].get(unique, {}),
+                    }
+
+    def flush(self):
+        """Write everything pending in one transaction; return the rows written."""
+        taken = self.take()
+        try:
+            with transaction.atomic():
+                return self._write(*taken)
+        except Exception:
+            self.restore(taken)
+            raise
+
+    def _write(self, increments, updates, upserts):
+        written = 0
+        for (model, field), amounts in increments.items():
+            items = [(pk, amount) for pk, amount in amounts.items() if amount]
+            output_field = model._meta.get_field(field)
+            for start in range(0, len(items), self.batch_size):
+                batch = items[start : start + self.batch_size]
+                delta = Case(
+                    *[When(pk=pk, then=Value(amount)) for pk, amount in batch],
+                    default=Value(0),
+                    output_field=output_field,
+                )
+                written += model._default_manager.filter(
+                    pk__in=[pk for pk, _ in batch]
+                ).update(**{field: F(field) + delta})
+
+        for model, rows in updates.items():
+            by_fields = defaultdict(list)
+            for pk, values in rows.items():
+                by_fields[tuple(sorted(values))].append(model(pk=pk, **values))
+            for fields, objs in by_fields.items():
+                written += model._default_manager.bulk_update(
+                    objs, fields, batch_size=self.batch_size
+                )
+
+        for (model, unique_fields), rows in upserts.items():
+            by_fields = defaultdict(list)
+            for values in rows.values():
+                by_fields[tuple(sorted(values))].append(model(**values))
+            for fields, objs in by_fields.items():
+                update_fields = [f for f in fields if f not in unique_fields]
+                conflicts = (
+                    {
+                        "update_conflicts": True,
+                        "unique_fields": unique_fields,
+                        "update_fields": update_fields,
+                    }
+                    if update_fields
+                    else {"ignore_conflicts": True}
+                )
+                model._default_manager.bulk_create(
+                    objs, batch_size=self.batch_size, **conflicts
+                )
+                written += len(objs)
+        return written
+
+
+class CacheWriteBuffer(WriteBuffer):
+    """A buffer whose increments are shared by all workers through the cache."""
+
+    def __init__(self, cache_alias="default", **kwargs):
+        super().__init__(**kwargs)
+        self.cache = caches[cache_alias]
+        # Keys this worker has touched; any worker may flush them.
+        self.keys = {}
+
+    def increment(self, model, pk, field, amount=1):
+        key = f"write_buffer:{model._meta.label_lower}:{field}:{pk}"
+        if not self.cache.add(key, amount):
+            try:
+                self.cache.incr(key, amount)
+            except ValueError:
+                # Expired or flushed since add(); count it locally instead.
+                super().increment(model, pk, field, amount)
+                return
+        with self.lock:
+            self.keys[key] = (model, field, pk)
+        self._added()
+
+    def take(self):
+        increments, updates, upserts = super().take()
+        with self.lock:
+            keys, self.keys = self.keys, {}
+        for key, amount in self.cache.get_many(list(keys)).items():
+            if amount <= 0:
+                continue
+            # Subtract what is flushed so concurrent increments survive.
+            try:
+                remaining = self.cache.decr(key, amount)
+            except ValueError:
+                continue  # Expired since get_many().
+            if remaining < 0:
+                # Another worker flushed part of ``amount`` in between.
+                taken = min(amount, -remaining)
+                self.cache.incr(key, taken)
+                amount -= taken
+            if amount:
+                model, field, pk = keys[key]
+                increments[model, field][pk] += amount
+        return increments, updates, upserts
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """Return this process's buffer, creating it after a fork."""
+    global _buffer
+
+    with _buffer_lock:
+        if _buffer is None or _buffer.pid != os.getpid():
+            options = {
+                "flush_interval": _setting("WRITE_BUFFER_FLUSH_INTERVAL", 5.0),
+                "max_pending": _setting("WRITE_BUFFER_MAX_PENDING", 1000),
+                "batch_size": _setting("WRITE_BUFFER_BATCH_SIZE", 500),
+            }
+            if _setting("WRITE_BUFFER_BACKEND", "memory") == "cache":
+                _buffer = CacheWriteBuffer(
+                    _setting("WRITE_BUFFER_CACHE_ALIAS", "default"), **options
+                )
+            else:
+                _buffer = WriteBuffer(**options)
+        return _buffer
+
+
+def increment(model, pk, field, amount=1):
+    """Add ``amount`` to ``field`` of the row ``pk``, eventually."""
+    get_buffer().increment(model, pk, field, amount)
+
+
+def update(model, pk, **values):
+    """Set fields of the row ``pk``, eventually; later values win."""
+    get_buffer().update(model, pk, **values)
+
+
+def upsert(model, unique_fields, **values):
+    """Insert a row or update the one with the same ``unique_fields``, eventually."""
+    get_buffer().upsert(model, unique_fields, **values)
+
+
+def flush():
+    """Write this process's pending writes now; called on worker shutdown."""
+    with _buffer_lock:
+        buffer = _buffer if _buffer is not None and _buffer.pid == os.getpid() else None
+    if buffer is None:
+        return 0
+    written = buffer.flush()
+    if written:
+        logger.info("Flushed %d buffered writes", written)
+    return written
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        logger.exception("Write buffer flush at exit failed")
+
+
+atexit.register(_flush_at_exit)
@@ -11,6 +11,10 @@ import os
 
 from django.core.wsgi import get_wsgi_application
 
+from app import static
+from app.profiling import ProfilingWSGIMiddleware
+
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
 
-application = get_wsgi_application()
+application = ProfilingWSGIMiddleware(get_wsgi_application())
+static.preload()
@@ -0,0 +1,72 @@
+"""
+Benchmarks for performance-sensitive parts of the project.
+
+Run one with ``python -m benchmarks <name>``; ``python -m benchmarks --list``
+shows what is available. Benchmarks that need a database run against a
+throwaway test database, never against ``db.sqlite3``.
+"""
+
+import contextlib
+import logging
+import os
+import statistics
+import time
+
+
+def setup_django(settings_module="app.settings"):
+    """Configure Django for a standalone benchmark script."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+
+    import django
+
+    django.setup()
+
+    # Query capture turns on SQL debug logging; keep the report readable.
+    logging.getLogger("django.db.backends").setLevel(logging.INFO)
+
+
+@contextlib.contextmanager
+def test_database(verbosity=0):
+    """Create the test databases for the duration of the block."""
+    from django.test.utils import (
+        setup_databases,
+        setup_test_environment,
+        teardown_databases,
+        teardown_test_environment,
+    )
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity=verbosity, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=verbosity)
+        teardown_test_environment()
+
+
+def measure(func, repeat=5):
+    """Call ``func`` ``repeat`` times and return the timings in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def median_ms(timings):
+    """Return the median of ``timings`` in milliseconds."""
+    return statistics.median(timings) * 1000
+
+
+def report(title, headers, rows):
+    """Print ``rows`` as an aligned plain-text table."""
+    table = [tuple(str(cell) for cell in row) for row in [headers, *rows]]
+    widths = [max(len(row[i]) for row in table) for i in range(len(headers))]
+
+    print(f"\n{title}")
+    print("=" * len(title))
+    for index, row in enumerate(table):
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)))
+        if index == 0:
+            print("  ".join("-" * width for width in widths))
@@ -0,0 +1,40 @@
+"""
+Entry point for ``python -m benchmarks <name> [options]``.
+"""
+
+import argparse
+import importlib
+import pkgutil
+import sys
+from pathlib import Path
+
+
+def available():
+    """Return the names of the benchmark modules in this package."""
+    path = [str(Path(__file__).parent)]
+    return sorted(
+        module.name
+        for module in pkgutil.iter_modules(path)
+        if not module.name.startswith("_")
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("name", nargs="?", help="Benchmark to run")
+    parser.add_argument("--list", action="store_true", help="List benchmarks")
+    args, remaining = parser.parse_known_args(argv)
+
+    if args.list or not args.name:
+        print("\n".join(available()))
+        return 0
+
+    if args.name not in available():
+        parser.error(f"unknown benchmark {args.name!r}")
+
+    module = importlib.import_module(f"benchmarks.{args.name}")
+    return module.main(remaining) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Admin changelist cost on a large table: stock ``ModelAdmin`` vs
+``app.admin.PerformanceModelAdmin``.
+
+Seeds ``auth.User`` with ``--rows`` users and times the first page and a deep
+page (90% into the table) of both changelists, counting the SQL queries each
+one runs.
+
+    python -m benchmarks admin_changelist --rows 200000
+"""
+
+import argparse
+
+from benchmarks import measure, median_ms, report, setup_django, test_database
+
+
+def seed_users(rows, batch_size=5000):
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+
+    # Hash once: the benchmark is about reads, not PBKDF2.
+    password = make_password("benchmark")
+    for start in range(0, rows, batch_size):
+        User.objects.bulk_create(
+            User(username=f"user{i}", email=f"user{i}@example.com", password=password)
+            for i in range(start, min(start + batch_size, rows))
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks admin_changelist")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    setup_django()
+
+    from django.contrib.admin import AdminSite
+    from django.contrib.auth.admin import UserAdmin
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test import RequestFactory
+    from django.test.utils import CaptureQueriesContext
+
+    from app.admin import CURSOR_VAR, PerformanceModelAdmin
+
+    class StockUserAdmin(UserAdmin):
+        ordering = ("-pk",)
+
+    class FastUserAdmin(PerformanceModelAdmin, UserAdmin):
+        ordering = ("-pk",)
+
+    with test_database():
+        seed_users(args.rows)
+        superuser = User.objects.create_superuser("bench", "bench@example.com", "x")
+
+        site = AdminSite(name="bench")
+        admins = {
+            "stock": StockUserAdmin(User, site),
+            "performance": FastUserAdmin(User, site),
+        }
+
+        per_page = StockUserAdmin.list_per_page
+        deep_page = int(args.rows * 0.9) // per_page
+        deep_cursor = (
+            User.objects.order_by("-pk")
+            .values_list("pk", flat=True)[
+                deep_page * per_page - 1 : deep_page * per_page
+            ]
+            .get()
+        )
+        scenarios = {
+            "first page": ({}, {}),
+            f"page {deep_page + 1}": ({"p": deep_page + 1}, {CURSOR_VAR: deep_cursor}),
+        }
+
+        rows = []
+        for scenario, (page_params, cursor_params) in scenarios.items():
+            for name, model_admin in admins.items():
+                params = page_params if name == "stock" else cursor_params
+                request = RequestFactory().get("/admin/auth/user/", params)
+                request.user = superuser
+
+                def run():
+                    changelist = model_admin.get_changelist_instance(request)
+                    list(changelist.result_list)
+
+                with CaptureQueriesContext(connection) as queries:
+                    run()
+                timings = measure(run, args.repeat)
+                rows.append((scenario, name, f"{median_ms(timings):.2f}", len(queries)))
+
+    report(
+        f"Admin changelist, {args.rows} users",
+        ("scenario", "admin", "median ms", "queries"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+JSON list serialization throughput: ``JsonResponse`` over model instances vs
+``app.api``'s ``values_list()`` rows and encoder.
+
+Seeds ``auth.User`` with ``--rows`` users and serializes all of them as a
+list of five-field objects each way, reporting rows per second. ``app.api``
+uses orjson when it is installed, so run it with and without orjson to see
+the encoder's share.
+
+    python -m benchmarks api_serialization --rows 50000
+"""
+
+import argparse
+
+from benchmarks import measure, median_ms, report, setup_django, test_database
+from benchmarks.admin_changelist import seed_users
+
+FIELDS = ["id", "username", "email", "is_active", "date_joined"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks api_serialization")
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    setup_django()
+
+    from django.contrib.auth.models import User
+    from django.forms.models import model_to_dict
+    from django.http import JsonResponse
+    from django.test import RequestFactory
+
+    from app import api
+
+    class UserResource(api.Resource):
+        model = User
+        fields = {name: name for name in FIELDS}
+
+    def instances():
+        return JsonResponse(
+            [model_to_dict(user, fields=FIELDS) for user in User.objects.all()],
+            safe=False,
+        ).content
+
+    def values():
+        return JsonResponse(list(User.objects.values(*FIELDS)), safe=False).content
+
+    def api_list():
+        rows = User.objects.values_list(*FIELDS)
+        return api.JSONResponse([dict(zip(FIELDS, row)) for row in rows]).content
+
+    def api_stream():
+        request = RequestFactory().get("/", {"stream": "1"})
+        response = UserResource.as_view()(request)
+        return b"".join(response.streaming_content)
+
+    encoder = "orjson" if api.orjson is not None else "json"
+    with test_database():
+        seed_users(args.rows)
+        rows = []
+        for name, func in (
+            ("JsonResponse(model_to_dict)", instances),
+            ("JsonResponse(values())", values),
+            (f"api.dumps(values_list) [{encoder}]", api_list),
+            (f"api stream [{encoder}]", api_stream),
+        ):
+            size = len(func())
+            timings = measure(func, args.repeat)
+            ms = median_ms(timings)
+            rows.append((name, f"{ms:.1f}", f"{args.rows / ms * 1000:,.0f}", size))
+
+    report(
+        f"JSON serialization, {args.rows} users",
+        ("method", "median ms", "rows/s", "bytes"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Password verification throughput per hasher profile, and async logins.
+
+For each profile's preferred hasher, verifies one password ``--logins``
+times on one thread and on one thread per core, and reports logins per
+second per core: the login capacity one CPU of a worker gives you. Then
+runs ``--concurrency`` simultaneous ``aauthenticate()`` calls on one event
+loop with Django's backend (hashing on the loop) and ``app.auth`` (hashing
+in the pool).
+
+    python -m benchmarks login --logins 50
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import report, setup_django, test_database
+
+
+def load_hasher(path):
+    from django.utils.module_loading import import_string
+
+    hasher = import_string(path)()
+    try:
+        return hasher, hasher.encode("correct horse", hasher.salt())
+    except ValueError:  # argon2-cffi or bcrypt missing
+        return None, None
+
+
+def logins_per_second(hasher, encoded, logins, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(lambda _: hasher.verify("correct horse", encoded), range(logins)))
+    return logins / (time.perf_counter() - start)
+
+
+def concurrent_logins(backend, username, concurrency):
+    async def run():
+        logins = [
+            backend.aauthenticate(None, username=username, password="correct horse")
+            for _ in range(concurrency)
+        ]
+        start = time.perf_counter()
+        users = await asyncio.gather(*logins)
+        assert all(users)
+        return concurrency / (time.perf_counter() - start)
+
+    return asyncio.run(run())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks login")
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args(argv)
+
+    setup_django()
+
+    from django.conf import settings
+    from django.contrib.auth import backends
+    from django.contrib.auth.models import User
+
+    from app import auth
+
+    cores = os.cpu_count() or 1
+    rows = []
+    for profile, paths in settings.PASSWORD_HASHER_PROFILES.items():
+        hasher, encoded = load_hasher(paths[0])
+        if hasher is None:
+            rows.append((profile, "not installed", "", "", ""))
+            continue
+        single = logins_per_second(hasher, encoded, args.logins, 1)
+        parallel = logins_per_second(hasher, encoded, args.logins * cores, cores)
+        rows.append(
+            (
+                profile,
+                hasher.algorithm,
+                f"{1000 / single:.1f}",
+                f"{parallel:.0f}",
+                f"{parallel / cores:.0f}",
+            )
+        )
+    report(
+        f"Password verification, {cores} cores",
+        ("profile", "hasher", "ms/login", "logins/s", "logins/s/core"),
+        rows,
+    )
+
+    with test_database():
+        User.objects.create_user("bench", password="correct horse")
+        rows = [
+            (
+                name,
+                f"{concurrent_logins(backend, 'bench', args.concurrency):.0f}",
+            )
+            for name, backend in (
+                ("django ModelBackend", backends.ModelBackend()),
+                ("app.auth.ModelBackend", auth.ModelBackend()),
+            )
+        ]
+    report(
+        f"{args.concurrency} concurrent aauthenticate() calls, "
+        f"{settings.PASSWORD_HASHER_PROFILE} profile",
+        ("backend", "logins/s"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Idle SSE and WebSocket connections held by one worker.
+
+Opens ``--connections`` idle streams per protocol on one
+``app.realtime.ProtocolRouter`` event loop (driven in-process, without a
+server or sockets) and reports the Python memory each idle connection costs
+and how long one publish takes to reach all of them.
+
+    python -m benchmarks realtime_connections --connections 5000
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from benchmarks import measure, median_ms, report, setup_django
+
+
+class IdleClient:
+    """An ASGI client that connects, then waits until told to disconnect."""
+
+    def __init__(self, router, scope, connect_message, disconnect_message):
+        self.router = router
+        self.scope = scope
+        self.incoming = asyncio.Queue()
+        self.received = asyncio.Event()
+        self.messages = 0
+        self.disconnect_message = disconnect_message
+        if connect_message:
+            self.incoming.put_nowait(connect_message)
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send(self, message):
+        if message.get("text") or message.get("body", b"").startswith(b"data:"):
+            self.messages += 1
+            self.received.set()
+
+    def start(self):
+        self.task = asyncio.create_task(
+            self.router(self.scope, self.receive, self.send)
+        )
+
+    async def stop(self):
+        self.incoming.put_nowait({"type": self.disconnect_message})
+        await self.task
+
+
+def make_client(router, protocol):
+    channel = "bench"
+    if protocol == "sse":
+        scope = {"type": "http", "method": "GET", "path": f"/events/{channel}/"}
+        return IdleClient(router, scope, None, "http.disconnect")
+    scope = {"type": "websocket", "path": f"/ws/{channel}/"}
+    return IdleClient(
+        router, scope, {"type": "websocket.connect"}, "websocket.disconnect"
+    )
+
+
+async def run(protocol, connections, repeat):
+    from app.pubsub import get_hub, publish
+    from app.realtime import ProtocolRouter
+
+    router = ProtocolRouter(None)
+    router.max_connections = connections
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    clients = [make_client(router, protocol) for _ in range(connections)]
+    for client in clients:
+        client.start()
+    while get_hub().subscriber_count("bench") < connections:
+        await asyncio.sleep(0.01)
+    per_connection = (tracemalloc.get_traced_memory()[0] - before) / connections
+    tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        for client in clients:
+            client.received.clear()
+        start = time.perf_counter()
+        publish("bench", {"ping": True})
+        await asyncio.gather(*(client.received.wait() for client in clients))
+        timings.append(time.perf_counter() - start)
+
+    # Cost of the publish() call itself: queueing on every subscription.
+    publish_timings = measure(lambda: publish("bench", {"ping": True}), repeat)
+
+    for client in clients:
+        await client.stop()
+    return per_connection, timings, publish_timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks realtime_connections")
+    parser.add_argument("--connections", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    setup_django()
+
+    rows = []
+    for protocol in ("sse", "websocket"):
+        per_connection, timings, publish_timings = asyncio.run(
+            run(protocol, args.connections, args.repeat)
+        )
+        rows.append(
+            (
+                protocol,
+                args.connections,
+                f"{per_connection / 1024:.1f}",
+                f"{median_ms(publish_timings):.1f}",
+                f"{median_ms(timings):.1f}",
+            )
+        )
+
+    report(
+        f"{args.connections} idle connections per worker",
+        (
+            "protocol",
+            "connections",
+            "KiB/connection",
+            "publish() ms",
+            "delivered to all ms",
+        ),
+        rows,
+    )
@@ -0,0 +1,96 @@
+"""
+Full-text search with ``app.search`` vs ``icontains`` filters.
+
+Seeds ``admin.LogEntry`` with ``--rows`` entries of random prose in
+``object_repr`` and ``change_message``, indexes them, and times the first
+page of results for common, rare and multi-word queries both ways.
+
+    python -m benchmarks search --rows 100000
+"""
+
+import argparse
+import random
+
+from benchmarks import measure, median_ms, report, setup_django, test_database
+
+WORDS = (
+    "cache query index worker request latency template session upload image "
+    "thumbnail search ranking profile memory signal batch stream header proxy "
+    "cursor page admin static manifest deploy rollback connection timeout"
+).split()
+
+
+def seed_entries(rows, batch_size=5000, seed=0):
+    from django.contrib.admin.models import CHANGE, LogEntry
+    from django.contrib.auth.models import User
+    from django.contrib.contenttypes.models import ContentType
+
+    rng = random.Random(seed)
+    user = User.objects.create_user("bench")
+    content_type = ContentType.objects.get_for_model(User)
+    # A long tail of rare words makes selective queries realistic.
+    vocabulary = WORDS + [f"term{i}" for i in range(5000)]
+    for start in range(0, rows, batch_size):
+        LogEntry.objects.bulk_create(
+            LogEntry(
+                user=user,
+                content_type=content_type,
+                object_id=str(i),
+                object_repr=" ".join(rng.choices(WORDS, k=3)),
+                action_flag=CHANGE,
+                change_message=" ".join(rng.choices(vocabulary, k=40)),
+            )
+            for i in range(start, min(start + batch_size, rows))
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks search")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    setup_django()
+
+    from django.contrib.admin.models import LogEntry
+    from django.db.models import Q
+
+    from app import search
+
+    fields = ["object_repr", "change_message"]
+    queries = ["cache", "term4242", "memory timeout", "nosuchword"]
+
+    with test_database():
+        seed_entries(args.rows)
+        search.register(LogEntry, fields, weights=[2.0, 1.0])
+        build = measure(lambda: search.rebuild(LogEntry), 1)
+
+        def icontains(text):
+            condition = Q()
+            for word in text.split():
+                condition &= Q(object_repr__icontains=word) | Q(
+                    change_message__icontains=word
+                )
+            return list(LogEntry.objects.filter(condition)[: args.limit])
+
+        rows = []
+        for text in queries:
+            hits = len(search.search(LogEntry, text, limit=args.limit))
+            for name, func in (
+                ("icontains", lambda: icontains(text)),
+                ("fts", lambda: search.search(LogEntry, text, limit=args.limit)),
+            ):
+                timings = measure(func, args.repeat)
+                rows.append((text, name, f"{median_ms(timings):.2f}", hits))
+        search.unregister(LogEntry)
+
+    report(
+        f"Search, {args.rows} log entries (index built in {build[0]:.1f}s)",
+        ("query", "method", "median ms", "fts hits"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Container startup: time from ``docker run`` (or a local server command) to
+the first ``200`` response.
+
+Each run starts a fresh container, polls ``--path`` until it answers 200 and
+removes the container again. Pass ``--image`` several times to compare
+builds, e.g. with and without precompiled bytecode:
+
+    docker build -t app:bytecode .
+    docker build -t app:stripped --build-arg KEEP_BYTECODE=0 .
+    python -m benchmarks startup --image app:bytecode --image app:stripped
+
+Without ``--image`` the benchmark starts gunicorn locally instead, which
+measures import and app-loading time without the container runtime.
+"""
+
+import argparse
+import os
+import socket
+import subprocess  # nosec B404
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks import median_ms, report
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_200(url, timeout):
+    """Poll ``url`` until it returns 200; return False on timeout."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:  # nosec B310
+                if response.status == 200:
+                    return True
+        except (OSError, urllib.error.URLError):
+            pass
+        time.sleep(0.01)
+    return False
+
+
+def docker_run(image, port, env):
+    command = ["docker", "run", "-d", "--rm", "-p", f"127.0.0.1:{port}:8000"]
+    for item in env:
+        command += ["-e", item]
+    container = subprocess.run(  # nosec B603
+        [*command, image], check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+    def stop():
+        subprocess.run(  # nosec B603 B607
+            ["docker", "rm", "-f", container], check=False, capture_output=True
+        )
+
+    return stop
+
+
+def local_run(port, env):
+    environment = dict(os.environ, **dict(item.split("=", 1) for item in env))
+    process = subprocess.Popen(  # nosec B603
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "app.wsgi:application",
+            "--config",
+            "python:app.gunicorn_conf",
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--workers",
+            "2",
+            "--preload",
+        ],
+        env=environment,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    def stop():
+        process.terminate()
+        process.wait()
+
+    return stop
+
+
+def time_to_first_200(target, path, env, timeout):
+    port = free_port()
+    started = time.perf_counter()
+    if target == "local":
+        stop = local_run(port, env)
+    else:
+        stop = docker_run(target, port, env)
+    try:
+        if not wait_for_200(f"http://127.0.0.1:{port}{path}", timeout):
+            raise SystemExit(f"{target} did not answer 200 within {timeout}s")
+        return time.perf_counter() - started
+    finally:
+        stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks startup")
+    parser.add_argument(
+        "--image",
+        action="append",
+        default=[],
+        help="Docker image to start (repeat to compare images)",
+    )
+    parser.add_argument("--path", default="/", help="URL path that must answer 200")
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="Environment variable for the server (repeatable)",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args(argv)
+
+    rows = []
+    for target in args.image or ["local"]:
+        timings = [
+            time_to_first_200(target, args.path, args.env, args.timeout)
+            for _ in range(args.repeat)
+        ]
+        rows.append(
+            (
+                target,
+                f"{median_ms(timings):.0f}",
+                f"{min(timings) * 1000:.0f}",
+                f"{max(timings) * 1000:.0f}",
+            )
+        )
+
+    report(
+        f"Time to first 200 on {args.path} ({args.repeat} runs)",
+        ("target", "median ms", "min ms", "max ms"),
+        rows,
+    )
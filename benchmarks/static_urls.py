@@ -0,0 +1,79 @@
+"""
+Cost of ``{% static %}`` per render with and without the in-memory manifest.
+
+Writes a ``staticfiles.json`` with ``--assets`` entries to a temporary
+``STATIC_ROOT`` and renders a template with ``--tags`` ``{% static %}``
+tags through WhiteNoise's manifest storage and through
+``app.static.ManifestStaticFilesStorage``.
+
+    python -m benchmarks static_urls --tags 20
+"""
+
+import argparse
+import json
+import tempfile
+from pathlib import Path
+
+from benchmarks import measure, report, setup_django
+
+STORAGES = {
+    "whitenoise": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    "app.static": "app.static.ManifestStaticFilesStorage",
+}
+
+
+def write_manifest(root, assets):
+    paths = {
+        f"app/module{i}.{ext}": f"app/module{i}.{i:012x}.{ext}"
+        for i in range(assets)
+        for ext in ("css", "js")
+    }
+    manifest = {"version": "1.1", "paths": paths, "hash": "bench"}
+    (Path(root) / "staticfiles.json").write_text(json.dumps(manifest))
+    return list(paths)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks static_urls")
+    parser.add_argument("--assets", type=int, default=500)
+    parser.add_argument("--tags", type=int, default=20)
+    parser.add_argument("--renders", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    setup_django()
+
+    from django.conf import settings
+    from django.template import Context, Template
+    from django.test import override_settings
+
+    from app import static
+
+    rows = []
+    with tempfile.TemporaryDirectory() as root:
+        names = write_manifest(root, args.assets)[: args.tags]
+        source = "{% load static %}" + "".join(
+            f"<link href=\"{{% static '{name}' %}}\">" for name in names
+        )
+        template = Template(source)
+        for label, backend in STORAGES.items():
+            storages = {**settings.STORAGES, "staticfiles": {"BACKEND": backend}}
+            with override_settings(STORAGES=storages, STATIC_ROOT=root):
+                static.preload()
+
+                def render():
+                    for _ in range(args.renders):
+                        template.render(Context())
+
+                best = min(measure(render, args.repeat)) / args.renders
+            rows.append((label, f"{best * 1e6:.1f}", f"{best * 1e6 / args.tags:.2f}"))
+
+    report(
+        f"{{% static %}}, {args.tags} tags per render, {args.assets * 2} assets",
+        ("storage", "us/render", "us/tag"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
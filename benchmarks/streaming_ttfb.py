@@ -0,0 +1,73 @@
+"""
+Time to first byte of ``base/base.html`` pages, rendered whole or streamed.
+
+Renders a page whose content block takes ``--delay`` milliseconds (standing
+in for slow queries) with ``render()`` and with ``app.streaming``, and
+reports when the first byte, and with it the ``<head>``, is available.
+
+    python -m benchmarks streaming_ttfb --delay 200
+"""
+
+import argparse
+import time
+
+from benchmarks import report, setup_django
+
+
+class SlowValue:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def __str__(self):
+        time.sleep(self.delay)
+        return "content"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks streaming_ttfb")
+    parser.add_argument("--delay", type=float, default=200.0, help="milliseconds")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    setup_django()
+
+    from django.template import engines
+    from django.test import RequestFactory
+
+    from app import streaming
+
+    source = '{% extends "base/base.html" %}{% block content %}{{ slow }}{% endblock %}'
+    template = engines["django"].from_string(source)
+    request = RequestFactory().get("/")
+    context = {"slow": SlowValue(args.delay / 1000)}
+
+    def whole():
+        # What render() does: build the complete body before responding.
+        start = time.perf_counter()
+        template.render(context, request)
+        elapsed = time.perf_counter() - start
+        return elapsed, elapsed
+
+    def streamed():
+        start = time.perf_counter()
+        chunks = streaming.render_chunks(template, context, request)
+        next(chunks)
+        first = time.perf_counter() - start
+        list(chunks)
+        return first, time.perf_counter() - start
+
+    rows = []
+    for name, func in (("render()", whole), ("streaming", streamed)):
+        timings = sorted(func() for _ in range(args.repeat))
+        first, total = timings[len(timings) // 2]
+        rows.append((name, f"{first * 1000:.2f}", f"{total * 1000:.2f}"))
+
+    report(
+        f"base.html page with a {args.delay:.0f} ms content block",
+        ("mode", "first byte ms", "complete ms"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
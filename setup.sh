@@ -32,7 +32,7 @@ fi
 # Setup Django project structure and database
 echo "🗄️  Setting up Django project..."
 uv run python manage.py setup_project
-uv run python manage.py migrate
+uv run python manage.py bootstrap_schema
 
 # Only collect static files in production
 if [ "${DJANGO_SETTINGS_MODULE}" = "app.settings_prod" ] || [ "${DEBUG}" = "false" ]; then
@@ -0,0 +1,97 @@
+"""
+Test database setup for fast, parallel test runs.
+
+- Test databases are kept between runs (``--create-db`` forces a rebuild) and
+  named after a hash of every migration file, so adding or editing a
+  migration transparently gives a fresh database.
+- Each pytest-xdist worker (``pytest -n auto``) gets its own database,
+  suffixed with the worker id (``gw0``, ``gw1``, ...).
+- With SQLite, the first run dumps the migrated database to a SQL snapshot.
+  Later workers load that snapshot instead of running every migration.
+"""
+
+import os
+import sqlite3
+from pathlib import Path
+
+from django.conf import settings
+
+import pytest
+
+from app.schema import migrations_hash
+
+TEST_DB_DIR = Path(settings.BASE_DIR) / ".pytest_db"
+
+
+def is_sqlite(db_settings):
+    return db_settings["ENGINE"] == "django.db.backends.sqlite3"
+
+
+def snapshot_path(alias, digest):
+    return TEST_DB_DIR / f"schema_{alias}_{digest}.sql"
+
+
+def remove_stale_files(digest):
+    """Delete databases and snapshots built from older migrations."""
+    for path in TEST_DB_DIR.glob("*"):
+        if digest not in path.name:
+            path.unlink(missing_ok=True)
+
+
+@pytest.fixture(scope="session")
+def migrations_digest():
+    return migrations_hash()
+
+
+@pytest.fixture(scope="session")
+def django_db_keepdb(request):
+    """Reuse test databases unless ``--create-db`` is given."""
+    return not request.config.getvalue("create_db")
+
+
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings(request, migrations_digest):
+    """Name test databases per migrations hash and xdist worker."""
+    worker = getattr(request.config, "workerinput", {}).get("workerid", "main")
+    create_db = request.config.getvalue("create_db")
+
+    for alias, db_settings in settings.DATABASES.items():
+        test_settings = db_settings.setdefault("TEST", {})
+        if test_settings.get("NAME") == ":memory:":
+            continue
+        if not is_sqlite(db_settings):
+            name = test_settings.get("NAME") or f"test_{db_settings['NAME']}"
+            test_settings["NAME"] = f"{name}_{migrations_digest}_{worker}"
+            continue
+
+        path = TEST_DB_DIR / f"test_{alias}_{migrations_digest}_{worker}.sqlite3"
+        test_settings["NAME"] = str(path)
+        TEST_DB_DIR.mkdir(exist_ok=True)
+        snapshot = snapshot_path(alias, migrations_digest)
+        if create_db:
+            path.unlink(missing_ok=True)
+        elif not path.exists() and snapshot.exists():
+            # Loading the dump is much faster than replaying every migration;
+            # Django's migrate then finds nothing left to apply.
+            connection = sqlite3.connect(path)
+            connection.executescript(snapshot.read_text())
+            connection.close()
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup, django_db_blocker, migrations_digest):
+    """Snapshot freshly migrated SQLite databases for the next run."""
+    from django.db import connections
+
+    with django_db_blocker.unblock():
+        for alias in connections:
+            connection = connections[alias]
+            snapshot = snapshot_path(alias, migrations_digest)
+            if not is_sqlite(connection.settings_dict) or snapshot.exists():
+                continue
+            remove_stale_files(migrations_digest)
+            connection.ensure_connection()
+            partial = snapshot.with_suffix(f".{os.getpid()}.tmp")
+            partial.write_text("\n".join(connection.connection.iterdump()))
+            partial.replace(snapshot)
+    yield
@@ -0,0 +1,154 @@
+"""
+Tests for the admin performance helpers.
+"""
+
+from unittest.mock import patch
+
+from django.contrib.admin import AdminSite
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth.admin import UserAdmin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+
+from app.admin import (
+    CURSOR_VAR,
+    EstimatedCountPaginator,
+    PerformanceChangeList,
+    PerformanceModelAdmin,
+    estimated_count,
+)
+
+
+class PerformanceUserAdmin(PerformanceModelAdmin, UserAdmin):
+    ordering = ("-pk",)
+    list_per_page = 3
+
+
+class LogEntryAdmin(PerformanceModelAdmin):
+    list_display = ("action_time", "user", "content_type", "object_repr")
+
+
+class EstimatedCountTestCase(TestCase):
+    """Test cheap row counting."""
+
+    def setUp(self):
+        cache.clear()
+        for i in range(5):
+            User.objects.create(username=f"user{i}")
+
+    def test_count_is_cached(self):
+        """Test that repeated counts of the same query hit the cache."""
+        self.assertEqual(estimated_count(User.objects.all()), 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(estimated_count(User.objects.all()), 5)
+
+    def test_filtered_count_is_exact(self):
+        """Test that filtered querysets are counted, not estimated."""
+        queryset = User.objects.filter(username__in=["user1", "user2"])
+        with patch("app.admin.table_row_estimate", return_value=10**9) as mock:
+            self.assertEqual(estimated_count(queryset), 2)
+            mock.assert_not_called()
+
+    def test_large_table_uses_estimate(self):
+        """Test that large unfiltered tables use table statistics."""
+        with patch("app.admin.table_row_estimate", return_value=10**9):
+            with self.assertNumQueries(0):
+                self.assertEqual(estimated_count(User.objects.all()), 10**9)
+
+    def test_paginator_late_row_lookup(self):
+        """Test that deep pages return the same rows as plain slicing."""
+        queryset = User.objects.order_by("pk")
+        paginator = EstimatedCountPaginator(queryset, 2)
+
+        page = paginator.page(2)
+
+        self.assertEqual(list(page.object_list), list(queryset[2:4]))
+
+
+class PerformanceModelAdminTestCase(TestCase):
+    """Test the PerformanceModelAdmin changelist."""
+
+    def setUp(self):
+        cache.clear()
+        self.site = AdminSite(name="test")
+        self.superuser = User.objects.create_superuser(
+            "admin", "admin@example.com", "password"
+        )
+        for i in range(6):
+            User.objects.create(username=f"user{i}")
+
+    def get_changelist(self, model_admin, params=None):
+        request = RequestFactory().get("/admin/", params or {})
+        request.user = self.superuser
+        return model_admin.get_changelist_instance(request)
+
+    def test_keyset_pagination(self):
+        """Test that pages follow the cursor instead of an offset."""
+        model_admin = PerformanceUserAdmin(User, self.site)
+        pks = list(User.objects.order_by("-pk").values_list("pk", flat=True))
+
+        first = self.get_changelist(model_admin)
+        self.assertIsInstance(first, PerformanceChangeList)
+        self.assertTrue(first.keyset)
+        self.assertEqual([user.pk for user in first.result_list], pks[:3])
+        self.assertEqual(first.next_cursor, pks[2])
+
+        second = self.get_changelist(model_admin, {CURSOR_VAR: first.next_cursor})
+        self.assertEqual([user.pk for user in second.result_list], pks[3:6])
+        self.assertEqual(second.next_cursor, pks[5])
+
+        last = self.get_changelist(model_admin, {CURSOR_VAR: second.next_cursor})
+        self.assertEqual([user.pk for user in last.result_list], pks[6:])
+        self.assertIsNone(last.next_cursor)
+        self.assertIsNone(last.next_page_url)
+
+    def test_cursor_not_treated_as_filter(self):
+        """Test that the cursor parameter is not passed to the queryset filter."""
+        model_admin = PerformanceUserAdmin(User, self.site)
+        changelist = self.get_changelist(model_admin, {CURSOR_VAR: "abc"})
+        self.assertEqual(changelist.result_list.count(), 3)
+        self.assertNotIn(CURSOR_VAR, changelist.get_query_string())
+
+    def test_non_pk_ordering_uses_pages(self):
+        """Test that other orderings fall back to numbered pages."""
+        model_admin = PerformanceUserAdmin(User, self.site)
+        model_admin.ordering = ("username",)
+
+        changelist = self.get_changelist(model_admin, {"p": 2})
+
+        self.assertFalse(changelist.keyset)
+        self.assertIsInstance(changelist.paginator, EstimatedCountPaginator)
+        self.assertEqual(len(changelist.result_list), 3)
+
+    def test_list_select_related_from_list_display(self):
+        """Test that only displayed foreign keys are joined."""
+        model_admin = LogEntryAdmin(LogEntry, self.site)
+        request = RequestFactory().get("/admin/")
+
+        self.assertEqual(
+            model_admin.get_list_select_related(request), ("user", "content_type")
+        )
+
+    def test_heavy_fields_deferred(self):
+        """Test that undisplayed text columns are deferred."""
+        model_admin = LogEntryAdmin(LogEntry, self.site)
+        request = RequestFactory().get("/admin/")
+
+        deferred = model_admin.get_list_deferred_fields(request)
+
+        self.assertIn("change_message", deferred)
+        self.assertIn("object_id", deferred)
+        self.assertNotIn("object_repr", deferred)
+
+    def test_changelist_view_renders(self):
+        """Test that the changelist renders with the keyset paginator."""
+        model_admin = PerformanceUserAdmin(User, self.site)
+        request = RequestFactory().get("/admin/auth/user/")
+        request.user = self.superuser
+
+        response = model_admin.changelist_view(request)
+        response.render()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, f"?{CURSOR_VAR}=")
@@ -0,0 +1,66 @@
+"""
+Tests for materialized aggregates.
+"""
+
+from io import StringIO
+
+from django.contrib.auth.models import Group, User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from app import aggregates
+
+
+class AggregatesTestCase(TestCase):
+    """Test incremental maintenance, O(1) reads and reconciliation."""
+
+    def setUp(self):
+        aggregates.register("users.active", User, filter={"is_active": True})
+        aggregates.register("users.by_name", User, group_by="first_name")
+        aggregates.register("groups.id_sum", Group, op="sum", field="id")
+        for name in ("users.active", "users.by_name", "groups.id_sum"):
+            self.addCleanup(aggregates.unregister, name)
+
+    def test_incremental_updates(self):
+        """Test that creates, updates and deletes adjust the stored values."""
+        ada = User.objects.create(username="ada", first_name="Ada")
+        User.objects.create(username="bob", first_name="Bob", is_active=False)
+        self.assertEqual(aggregates.value("users.active"), 1)
+        self.assertEqual(aggregates.values("users.by_name"), {"Ada": 1, "Bob": 1})
+
+        ada.is_active = False
+        ada.first_name = "Bob"
+        ada.save()
+        self.assertEqual(aggregates.value("users.active"), 0)
+        self.assertEqual(aggregates.value("users.by_name", "Bob"), 2)
+        self.assertEqual(aggregates.value("users.by_name", "Ada"), 0)
+
+        ada.delete()
+        self.assertEqual(aggregates.value("users.by_name", "Bob"), 1)
+
+        group = Group.objects.create(name="staff")
+        self.assertEqual(aggregates.value("groups.id_sum"), group.pk)
+
+    def test_reads_are_single_queries(self):
+        """Test that reading an aggregate does not scan the source table."""
+        User.objects.create(username="ada")
+        with self.assertNumQueries(1):
+            self.assertEqual(aggregates.value("users.active"), 1)
+
+    def test_reconcile_fixes_drift(self):
+        """Test that writes bypassing signals are detected and corrected."""
+        User.objects.create(username="ada", first_name="Ada")
+        User.objects.bulk_create([User(username="bob", first_name="Bob")])
+        User.objects.filter(username="ada").update(first_name="Eve")
+
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command(
+                "reconcile_aggregates", "users.by_name", check=True, stdout=out
+            )
+        self.assertIn("[Eve] stored 0, actual 1", out.getvalue())
+
+        call_command("reconcile_aggregates", stdout=out)
+        self.assertEqual(aggregates.values("users.by_name"), {"Bob": 1, "Eve": 1})
+        self.assertEqual(aggregates.value("users.active"), 2)
+        self.assertEqual(aggregates.reconcile("users.by_name"), [])
@@ -0,0 +1,89 @@
+"""
+Tests for the JSON API layer.
+"""
+
+import gzip
+import json
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase, override_settings
+
+from app import api
+
+
+class UserResource(api.Resource):
+    model = User
+    fields = {"id": "pk", "username": "username", "joined": "date_joined"}
+    default_fields = ["id", "username"]
+    page_size = 2
+
+
+class APITestCase(TestCase):
+    """Test encoding, sparse fieldsets, cursor pagination and streaming."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(User(username=f"user{i}") for i in range(5))
+
+    def get(self, headers=None, **params):
+        request = RequestFactory().get("/api/users/", params, headers=headers)
+        return UserResource.as_view()(request)
+
+    def test_dumps(self):
+        """Test compact output and the types both encoders have to handle."""
+        from decimal import Decimal
+
+        self.assertEqual(api.dumps({"a": [1, "é"]}), '{"a":[1,"é"]}'.encode())
+        self.assertEqual(api.dumps([Decimal("1.50")]), b'["1.50"]')
+
+    def test_sparse_fieldsets(self):
+        """Test default, requested and unknown fields."""
+        response = self.get()
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertEqual(
+            json.loads(response.content)["results"][0].keys(), {"id", "username"}
+        )
+
+        results = json.loads(self.get(fields="username,joined").content)["results"]
+        self.assertEqual(list(results[0]), ["username", "joined"])
+
+        response = self.get(fields="password")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("password", json.loads(response.content)["error"])
+
+    def test_cursor_pagination(self):
+        """Test that following next links visits every row exactly once."""
+        usernames, params, pages = [], {"fields": "username"}, 0
+        while True:
+            data = json.loads(self.get(**params).content)
+            usernames += [row["username"] for row in data["results"]]
+            pages += 1
+            if not data["next"]:
+                break
+            self.assertIn("fields=username", data["next"])
+            params = {"fields": "username", "cursor": data["next"].split("cursor=")[1]}
+
+        self.assertEqual(usernames, [f"user{i}" for i in range(5)])
+        self.assertEqual(pages, 3)
+        self.assertEqual(self.get(cursor="not-a-cursor").status_code, 400)
+        self.assertEqual(self.get(limit="x").status_code, 400)
+
+    @override_settings(API_STREAM_CHUNK_SIZE=2)
+    def test_streaming(self):
+        """Test that streamed lists are valid JSON, gzipped on request."""
+        response = self.get(stream="1", fields="username")
+        body = b"".join(response.streaming_content)
+        self.assertEqual(
+            [row["username"] for row in json.loads(body)],
+            [f"user{i}" for i in range(5)],
+        )
+
+        response = self.get({"Accept-Encoding": "gzip, br"}, stream="1")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        body = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(len(json.loads(body)), 5)
+
+        User.objects.all().delete()
+        response = self.get(stream="1")
+        self.assertEqual(b"".join(response.streaming_content), b"[]")
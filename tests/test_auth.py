@@ -0,0 +1,91 @@
+"""
+Tests for the cached authentication backend.
+"""
+
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
+from django.test import TestCase
+
+from asgiref.sync import async_to_sync
+
+from app.auth import CachedModelBackend
+
+
+class CachedModelBackendTestCase(TestCase):
+    """Test caching and invalidation of users and permissions."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("alice")
+        cls.group = Group.objects.create(name="editors")
+        cls.user.groups.add(cls.group)
+        cls.change_user = Permission.objects.get(codename="change_user")
+        cls.view_group = Permission.objects.get(codename="view_group")
+
+    def setUp(self):
+        cache.clear()
+        self.backend = CachedModelBackend()
+
+    def fresh_user(self):
+        return self.backend.get_user(self.user.pk)
+
+    def test_get_user_cached(self):
+        """Test that the session's user is loaded from the database once."""
+        with self.assertNumQueries(1):
+            self.assertEqual(self.fresh_user(), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.fresh_user(), self.user)
+        with self.assertNumQueries(0):
+            user = async_to_sync(self.backend.aget_user)(self.user.pk)
+        self.assertEqual(user, self.user)
+
+    def test_user_save_invalidates(self):
+        """Test that saving or deactivating a user drops the cached row."""
+        self.fresh_user()
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(pk=self.user.pk).save(update_fields=["last_login"])
+        with self.assertNumQueries(1):
+            self.fresh_user()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        self.assertIsNone(self.fresh_user())
+
+    def test_permissions_cached(self):
+        """Test that permission sets are computed once across requests."""
+        self.group.permissions.add(self.change_user)
+        self.fresh_user()
+        with self.assertNumQueries(2):
+            self.assertTrue(self.fresh_user().has_perm("auth.change_user"))
+        with self.assertNumQueries(0):
+            user = self.fresh_user()
+            self.assertTrue(user.has_perm("auth.change_user"))
+            self.assertFalse(user.has_perm("auth.view_group"))
+            self.assertTrue(user.has_module_perms("auth"))
+
+    def test_group_permission_change_invalidates(self):
+        """Test that changing a group's permissions reaches its members."""
+        self.assertFalse(self.fresh_user().has_perm("auth.view_group"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.permissions.add(self.view_group)
+        self.assertTrue(self.fresh_user().has_perm("auth.view_group"))
+
+    def test_membership_change_invalidates(self):
+        """Test that group membership changes from either side are seen."""
+        self.assertFalse(self.fresh_user().has_perm("auth.view_group"))
+        other = Group.objects.create(name="viewers")
+        other.permissions.add(self.view_group)
+        with self.captureOnCommitCallbacks(execute=True):
+            other.user_set.add(self.user)
+        self.assertTrue(self.fresh_user().has_perm("auth.view_group"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.groups.remove(other)
+        self.assertFalse(self.fresh_user().has_perm("auth.view_group"))
+
+    def test_user_permission_change_invalidates(self):
+        """Test that direct user permissions are invalidated."""
+        self.assertFalse(self.fresh_user().has_perm("auth.change_user"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_permissions.add(self.change_user)
+        self.assertTrue(self.fresh_user().has_perm("auth.change_user"))
@@ -0,0 +1,115 @@
+"""
+Tests for per-URL HTTP cache policies.
+"""
+
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from app import cache_policy
+from app.cache_policy import CachePolicy
+
+
+class CachePolicyTestCase(TestCase):
+    """Test policy headers, downgrades, purges and the cache_policies command."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_cache_control_directives(self):
+        """Test that policies render the expected Cache-Control values."""
+        policy = CachePolicy(max_age=60, s_maxage=300, stale_while_revalidate=30)
+
+        self.assertEqual(
+            policy.cache_control(),
+            "public, max-age=60, s-maxage=300, stale-while-revalidate=30",
+        )
+        self.assertEqual(policy.cache_control(shared=False), "private, no-cache")
+        self.assertEqual(
+            CachePolicy(max_age=10, private=True).cache_control(), "private, max-age=10"
+        )
+        self.assertEqual(CachePolicy(no_store=True).cache_control(), "no-store")
+
+    def test_home_page_gets_policy_headers(self):
+        """Test that the middleware applies the policy of the matched URL."""
+        response = self.client.get(reverse("home"))
+
+        self.assertIn("public", response["Cache-Control"])
+        self.assertIn("s-maxage=300", response["Cache-Control"])
+        self.assertIn("Accept-Language", response["Vary"])
+        self.assertEqual(response["Cache-Tag"], "pages")
+
+    def test_per_visitor_responses_are_private(self):
+        """Test that cookies, CSRF tokens and Vary: Cookie downgrade the policy."""
+        policy = CachePolicy(max_age=60, s_maxage=300, tags=["pages"])
+
+        request = self.factory.get("/")
+        get_token(request)
+        response = cache_policy.apply(policy, request, HttpResponse())
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertFalse(response.has_header("Cache-Tag"))
+
+        response = HttpResponse()
+        response.set_cookie("flavour", "chocolate")
+        cache_policy.apply(policy, self.factory.get("/"), response)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+    def test_views_and_methods_win(self):
+        """Test that explicit headers, POSTs and errors are left alone."""
+        policy = CachePolicy(max_age=60)
+
+        response = HttpResponse()
+        response["Cache-Control"] = "no-cache"
+        cache_policy.apply(policy, self.factory.get("/"), response)
+        self.assertEqual(response["Cache-Control"], "no-cache")
+
+        response = cache_policy.apply(policy, self.factory.post("/"), HttpResponse())
+        self.assertFalse(response.has_header("Cache-Control"))
+
+        response = cache_policy.apply(
+            policy, self.factory.get("/"), HttpResponse(status=500)
+        )
+        self.assertFalse(response.has_header("Cache-Control"))
+
+    def test_model_change_requests_purge(self):
+        """Test that saving a watched model sends purge_requested on commit."""
+        received = []
+
+        def receiver(sender, urls, tags, **kwargs):
+            received.append((urls, tags))
+
+        cache_policy.purge_requested.connect(receiver)
+        self.addCleanup(cache_policy.purge_requested.disconnect, receiver)
+        policies = {
+            "home": {"max_age": 60, "tags": ["pages"], "purge_on": ["auth.User"]}
+        }
+
+        with override_settings(CACHE_POLICIES=policies):
+            cache_policy.connect_purge_hooks()
+            for signal in (post_save, post_delete):
+                self.addCleanup(
+                    signal.disconnect, sender=User, dispatch_uid="cache_policy"
+                )
+            with self.captureOnCommitCallbacks(execute=True):
+                User.objects.create_user("purger")
+
+        self.assertEqual(received, [(["/"], ["pages"])])
+
+    def test_cache_policies_command(self):
+        """Test that the command lists routes and fails strictly on gaps."""
+        out = StringIO()
+        call_command("cache_policies", stdout=out)
+        self.assertIn("home", out.getvalue())
+        self.assertNotIn("no policy", out.getvalue())
+
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("cache_policies", "--exclude", "none", "--strict", stdout=out)
+        self.assertIn("admin:index", out.getvalue())
@@ -0,0 +1,278 @@
+"""
+Tests for the stampede-protected cache helpers.
+"""
+
+import threading
+import time
+from unittest.mock import patch
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.test import RequestFactory, TestCase
+from django.utils.cache import patch_vary_headers
+
+from app.caching import cache_view, cached, get_or_compute
+
+
+class SlowCompute:
+    """Thread-safe call counter that takes a while to produce its value."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        with self.lock:
+            self.calls += 1
+            calls = self.calls
+        time.sleep(self.delay)
+        return f"value-{calls}"
+
+
+def run_concurrently(func, count=20):
+    """Call ``func`` from ``count`` threads released at the same instant."""
+    barrier = threading.Barrier(count)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(func())
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class GetOrComputeTestCase(TestCase):
+    """Test get_or_compute under concurrent expiry."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_miss_computes_once(self):
+        """Test that concurrent misses share a single computation."""
+        compute = SlowCompute()
+
+        results = run_concurrently(lambda: get_or_compute("hot", compute, 60))
+
+        self.assertEqual(compute.calls, 1)
+        self.assertEqual(set(results), {"value-1"})
+
+    def test_cross_process_lock_waits_for_winner(self):
+        """Test that a worker losing the cache lock waits for the winner."""
+        cache.set("hot:lock", "other-process")
+
+        def other_process_finishes(seconds):
+            cache.set("hot", ("from-other", time.time() + 60, 0.01))
+
+        compute = SlowCompute(delay=0)
+        with patch("app.caching.time.sleep", other_process_finishes):
+            self.assertEqual(get_or_compute("hot", compute, 60), "from-other")
+        self.assertEqual(compute.calls, 0)
+
+    def test_cross_process_lock_timeout_computes_uncached(self):
+        """Test that a stuck lock holder does not block callers forever."""
+        cache.set("hot:lock", "other-process")
+        compute = SlowCompute(delay=0)
+
+        self.assertEqual(get_or_compute("hot", compute, 60, lock_wait=0.02), "value-1")
+        self.assertIsNone(cache.get("hot"))
+
+    def test_fresh_value_not_recomputed(self):
+        """Test that fresh values are served from the cache."""
+        compute = SlowCompute(delay=0)
+        get_or_compute("key", compute, 60)
+        get_or_compute("key", compute, 60)
+        self.assertEqual(compute.calls, 1)
+
+    def test_early_expiration(self):
+        """Test that a value close to expiry may be refreshed early."""
+        cache.set("key", ("old", time.time() + 1, 0.5))
+        compute = SlowCompute(delay=0)
+
+        # random() close to 1 makes -log(1 - random()) large: refresh now.
+        with patch("app.caching.random.random", return_value=0.999999):
+            self.assertEqual(get_or_compute("key", compute, 60), "value-1")
+        # random() of 0 never refreshes before expiry.
+        with patch("app.caching.random.random", return_value=0.0):
+            self.assertEqual(get_or_compute("key", compute, 60), "value-1")
+        self.assertEqual(compute.calls, 1)
+
+    def test_early_expiration_disabled(self):
+        """Test that beta=0 only refreshes at expiry."""
+        cache.set("key", ("old", time.time() + 1, 0.5))
+        compute = SlowCompute(delay=0)
+
+        with patch("app.caching.random.random", return_value=0.999999):
+            self.assertEqual(get_or_compute("key", compute, 60, beta=0), "old")
+
+    def test_stale_while_revalidate(self):
+        """Test that expired values are served while one thread refreshes."""
+        cache.set("key", ("stale", time.time() - 1, 0.01))
+        compute = SlowCompute(delay=0.1)
+
+        results = run_concurrently(
+            lambda: get_or_compute("key", compute, 60, stale_ttl=30)
+        )
+
+        self.assertEqual(set(results), {"stale"})
+        deadline = time.monotonic() + 2
+        while cache.get("key")[0] == "stale" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(cache.get("key")[0], "value-1")
+        self.assertEqual(compute.calls, 1)
+
+    def test_compute_errors_propagate(self):
+        """Test that errors reach every waiting caller and release the lock."""
+
+        def fail():
+            time.sleep(0.02)
+            raise ValueError("boom")
+
+        errors = []
+
+        def call():
+            try:
+                get_or_compute("key", fail, 60)
+            except ValueError as error:
+                errors.append(error)
+
+        run_concurrently(call, count=5)
+
+        self.assertEqual(len(errors), 5)
+        self.assertIsNone(cache.get("key:lock"))
+
+
+class DecoratorTestCase(TestCase):
+    """Test the cached and cache_view decorators."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def test_cached_function(self):
+        """Test that results are cached per arguments."""
+        calls = []
+
+        @cached(timeout=60)
+        def square(number):
+            calls.append(number)
+            return number * number
+
+        self.assertEqual(square(3), 9)
+        self.assertEqual(square(3), 9)
+        self.assertEqual(square(4), 16)
+        self.assertEqual(calls, [3, 4])
+
+        square.invalidate(3)
+        square(3)
+        self.assertEqual(calls, [3, 4, 3])
+
+    def test_cache_view(self):
+        """Test that anonymous GET responses are cached per path."""
+        calls = []
+
+        @cache_view(timeout=60)
+        def view(request):
+            calls.append(request.path)
+            return HttpResponse(f"call {len(calls)}")
+
+        for path in ("/a/", "/a/", "/b/"):
+            request = self.factory.get(path)
+            request.user = AnonymousUser()
+            response = view(request)
+
+        self.assertEqual(calls, ["/a/", "/b/"])
+        self.assertEqual(response.content, b"call 2")
+
+    def test_cache_view_skips_uncacheable_responses(self):
+        """Test that POSTs and cookie-setting responses are not cached."""
+        calls = []
+
+        @cache_view(timeout=60)
+        def view(request):
+            calls.append(request.method)
+            response = HttpResponse("ok")
+            response.set_cookie("flavour", "chocolate")
+            return response
+
+        for method in ("get", "get", "post"):
+            request = getattr(self.factory, method)("/")
+            request.user = AnonymousUser()
+            view(request)
+
+        self.assertEqual(calls, ["GET", "GET", "POST"])
+
+    def test_cache_view_skips_per_visitor_responses(self):
+        """Test that CSRF-token pages and Vary: Cookie responses are not cached."""
+        calls = []
+
+        @cache_view(timeout=60)
+        def csrf_view(request):
+            calls.append("csrf")
+            return HttpResponse(get_token(request))
+
+        @cache_view(timeout=60)
+        def vary_view(request):
+            calls.append("vary")
+            response = HttpResponse("ok")
+            patch_vary_headers(response, ["Cookie"])
+            return response
+
+        for view in (csrf_view, csrf_view, vary_view, vary_view):
+            request = self.factory.get("/")
+            request.user = AnonymousUser()
+            view(request)
+
+        self.assertEqual(calls, ["csrf", "csrf", "vary", "vary"])
+
+    def test_cache_view_concurrent_requests_get_own_responses(self):
+        """Test that requests waiting on one render get their own response."""
+        calls = []
+
+        @cache_view(timeout=60)
+        def view(request):
+            calls.append(request.path)
+            time.sleep(0.05)
+            return HttpResponse("shared page")
+
+        def get():
+            request = self.factory.get("/")
+            request.user = AnonymousUser()
+            return view(request)
+
+        responses = run_concurrently(get, count=5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({response.content for response in responses}, {b"shared page"})
+        self.assertEqual(len({id(response) for response in responses}), 5)
+
+    def test_cache_view_concurrent_uncacheable_responses_not_shared(self):
+        """Test that waiting requests render for themselves when not cacheable."""
+        counter = iter(range(100))
+        lock = threading.Lock()
+
+        @cache_view(timeout=60)
+        def view(request):
+            with lock:
+                visitor = next(counter)
+            time.sleep(0.05)
+            response = HttpResponse("ok")
+            response.set_cookie("visitor", str(visitor))
+            return response
+
+        def get():
+            request = self.factory.get("/")
+            request.user = AnonymousUser()
+            return view(request)
+
+        responses = run_concurrently(get, count=5)
+
+        visitors = {response.cookies["visitor"].value for response in responses}
+        self.assertEqual(len(visitors), 5)
@@ -0,0 +1,177 @@
+"""
+Tests for the fragment cache template tags and the template profiler.
+"""
+
+from unittest.mock import patch
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.template import Context, RequestContext, Template, TemplateSyntaxError
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import translation
+
+from app import template_profiler
+from app.middleware import TemplateProfilerMiddleware
+from app.templatetags.fragment_cache import make_fragment_key, settings_fingerprint
+
+
+class Counter:
+    """Template variable that counts how often it is rendered."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return str(self.calls)
+
+
+class FragmentCacheTestCase(TestCase):
+    """Test the fragmentcache tag."""
+
+    def setUp(self):
+        cache.clear()
+        self.counter = Counter()
+
+    def render(self, source, request=None, **context):
+        template = Template("{% load fragment_cache %}" + source)
+        if request is not None:
+            return template.render(RequestContext(request, context))
+        return template.render(Context(context))
+
+    def test_fragment_rendered_once(self):
+        """Test that a cached fragment is not rendered again."""
+        source = '{% fragmentcache "nav" %}{{ counter }}{% endfragmentcache %}'
+
+        self.assertEqual(self.render(source, counter=self.counter), "1")
+        self.assertEqual(self.render(source, counter=self.counter), "1")
+        self.assertEqual(self.counter.calls, 1)
+
+    def test_language_dependency(self):
+        """Test that each language gets its own entry."""
+        source = '{% fragmentcache "nav" language %}{{ counter }}{% endfragmentcache %}'
+
+        with translation.override("en"):
+            self.render(source, counter=self.counter)
+        with translation.override("es"):
+            self.render(source, counter=self.counter)
+
+        self.assertEqual(self.counter.calls, 2)
+
+    def test_user_dependency(self):
+        """Test that users get separate entries and anonymous users share one."""
+        source = '{% fragmentcache "nav" user %}{{ counter }}{% endfragmentcache %}'
+        user = User.objects.create_user(username="alice")
+        factory = RequestFactory()
+
+        for current in (AnonymousUser(), AnonymousUser(), user):
+            request = factory.get("/")
+            request.user = current
+            self.render(source, request=request, counter=self.counter)
+
+        self.assertEqual(self.counter.calls, 2)
+
+    def test_variable_dependency(self):
+        """Test that template variables are part of the key."""
+        source = (
+            '{% fragmentcache "list" page timeout=60 %}{{ counter }}'
+            "{% endfragmentcache %}"
+        )
+
+        self.render(source, counter=self.counter, page=1)
+        self.render(source, counter=self.counter, page=1)
+        self.render(source, counter=self.counter, page=2)
+
+        self.assertEqual(self.counter.calls, 2)
+
+    def test_settings_fingerprint_in_key(self):
+        """Test that changing fingerprinted settings changes the key."""
+        key = make_fragment_key("nav", [])
+        with override_settings(FRAGMENT_CACHE_VERSION="next-release"):
+            self.assertNotEqual(make_fragment_key("nav", []), key)
+        self.assertEqual(make_fragment_key("nav", []), key)
+        self.assertEqual(settings_fingerprint(), settings_fingerprint())
+
+    @override_settings(FRAGMENT_CACHE_LOCK_WAIT=0.05)
+    def test_concurrent_render_is_not_cached(self):
+        """Test that a held lock makes other renderers skip the cache write."""
+        source = '{% fragmentcache "nav" %}{{ counter }}{% endfragmentcache %}'
+        cache.set(make_fragment_key("nav", []) + ":lock", 1)
+
+        self.assertEqual(self.render(source, counter=self.counter), "1")
+        self.assertIsNone(cache.get(make_fragment_key("nav", [])))
+
+    def test_waiter_gets_result_from_lock_holder(self):
+        """Test that a waiting renderer uses the value stored by the lock holder."""
+        source = '{% fragmentcache "nav" %}{{ counter }}{% endfragmentcache %}'
+        key = make_fragment_key("nav", [])
+        cache.set(key + ":lock", 1)
+
+        def finish_render(seconds):
+            cache.set(key, ("from-holder", float("inf"), 0.0))
+
+        with patch("app.caching.time.sleep", finish_render):
+            self.assertEqual(self.render(source, counter=self.counter), "from-holder")
+        self.assertEqual(self.counter.calls, 0)
+
+    def test_requires_name(self):
+        """Test that the tag needs a fragment name."""
+        with self.assertRaises(TemplateSyntaxError):
+            Template(
+                "{% load fragment_cache %}{% fragmentcache %}{% endfragmentcache %}"
+            )
+
+    def test_home_page_renders_consistently(self):
+        """Test that the home page renders the same content twice."""
+        first = self.client.get(reverse("home"))
+        second = self.client.get(reverse("home"))
+
+        self.assertContains(first, "main.css")
+        self.assertEqual(first.content, second.content)
+
+
+class TemplateProfilerTestCase(TestCase):
+    """Test the template profiler."""
+
+    def setUp(self):
+        cache.clear()
+        template_profiler.install()
+        self.addCleanup(template_profiler.uninstall)
+
+    def test_block_and_fragment_timings(self):
+        """Test that blocks and fragments are timed per request."""
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        Template(
+            "{% load fragment_cache %}{% block content %}"
+            '{% fragmentcache "nav" %}x{% endfragmentcache %}{% endblock %}'
+        ).render(RequestContext(request))
+
+        timings = template_profiler.get_timings(request)
+
+        self.assertIn("block.content", timings)
+        self.assertEqual(timings["fragment.nav"]["cache"], "miss")
+        self.assertEqual(timings["block.content"]["count"], 1)
+
+    def test_middleware_adds_server_timing(self):
+        """Test that the middleware reports timings in Server-Timing."""
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+
+        def get_response(request):
+            from app.views import home
+
+            return home(request)
+
+        response = TemplateProfilerMiddleware(get_response)(request)
+
+        self.assertIn("block.content;dur=", response["Server-Timing"])
+        self.assertIn("block.extra_js;dur=", response["Server-Timing"])
+
+    def test_server_timing_format(self):
+        """Test Server-Timing header formatting."""
+        header = template_profiler.server_timing(
+            {"fragment.nav bar": {"duration": 0.0015, "count": 1, "cache": "hit"}}
+        )
+        self.assertEqual(header, 'fragment.nav_bar;dur=1.50;desc="hit"')
@@ -0,0 +1,106 @@
+"""
+Tests for password hasher profiles and the async authentication path.
+"""
+
+import importlib
+import os
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import hashers as django_hashers
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, override_settings
+
+from asgiref.sync import async_to_sync
+
+from app import hashers
+from app.auth import ModelBackend
+
+
+class HasherProfileTestCase(TestCase):
+    """Test the hasher profiles and the tunable hashers."""
+
+    def test_tests_use_fast_profile(self):
+        """Test that the test settings hash with MD5 and still verify PBKDF2."""
+        self.assertEqual(settings.PASSWORD_HASHER_PROFILE, "fast")
+        self.assertTrue(django_hashers.make_password("secret").startswith("md5$"))
+        encoded = django_hashers.make_password("secret", hasher="pbkdf2_sha256")
+        self.assertTrue(django_hashers.check_password("secret", encoded))
+
+    def test_profiles_prefer_their_hasher(self):
+        """Test that each profile lists its own hasher first."""
+        profiles = settings.PASSWORD_HASHER_PROFILES
+        self.assertEqual(profiles["argon2"][0], "app.hashers.Argon2PasswordHasher")
+        self.assertEqual(profiles["scrypt"][0], "app.hashers.ScryptPasswordHasher")
+        for name in ("argon2", "scrypt", "pbkdf2"):
+            self.assertNotIn("MD5", " ".join(profiles[name]))
+
+    def test_scrypt_cost_from_settings(self):
+        """Test that raising the scrypt work factor upgrades older hashes."""
+        hasher = hashers.ScryptPasswordHasher()
+        with override_settings(PASSWORD_SCRYPT_WORK_FACTOR=2**10):
+            encoded = hasher.encode("secret", hasher.salt())
+            self.assertIn("$1024$", encoded)
+            self.assertFalse(hasher.must_update(encoded))
+        with override_settings(PASSWORD_SCRYPT_WORK_FACTOR=2**11):
+            self.assertTrue(hasher.verify("secret", encoded))
+            self.assertTrue(hasher.must_update(encoded))
+
+    def test_production_rejects_fast_profile(self):
+        """Test that production settings refuse the insecure profile."""
+        import app.settings_prod
+
+        try:
+            with mock.patch.dict(os.environ, {"PASSWORD_HASHER_PROFILE": "fast"}):
+                with self.assertRaises(ImproperlyConfigured):
+                    importlib.reload(app.settings_prod)
+        finally:
+            importlib.reload(app.settings_prod)
+        self.assertEqual(app.settings_prod.PASSWORD_HASHER_PROFILE, "argon2")
+
+
+class AsyncAuthenticateTestCase(TestCase):
+    """Test ModelBackend.aauthenticate()."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("alice", password="secret")
+
+    def authenticate(self, username, password):
+        return async_to_sync(ModelBackend().aauthenticate)(
+            None, username=username, password=password
+        )
+
+    def test_authenticate(self):
+        """Test that only the right password of an active user authenticates."""
+        self.assertEqual(self.authenticate("alice", "secret"), self.user)
+        self.assertIsNone(self.authenticate("alice", "wrong"))
+        self.assertIsNone(self.authenticate("nobody", "secret"))
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(self.authenticate("alice", "secret"))
+
+    def test_hashes_in_pool(self):
+        """Test that hashing runs on the pool's threads, not the event loop's."""
+        threads = []
+        verify = django_hashers.verify_password
+
+        def recording_verify(*args):
+            threads.append(threading.current_thread().name)
+            return verify(*args)
+
+        with mock.patch.object(django_hashers, "verify_password", recording_verify):
+            self.authenticate("alice", "secret")
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith("password-hash"))
+
+    def test_upgrades_outdated_hash(self):
+        """Test that a login rehashes a password with the profile's hasher."""
+        User.objects.filter(pk=self.user.pk).update(
+            password=django_hashers.make_password("secret", hasher="pbkdf2_sha256")
+        )
+        user = self.authenticate("alice", "secret")
+        self.assertTrue(user.password.startswith("md5$"))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, user.password)
@@ -0,0 +1,202 @@
+"""
+Tests for the outbound HTTP client, against a local stub server.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase
+
+from app.http_client import (
+    CircuitOpenError,
+    HTTPClient,
+    HTTPStatusError,
+    PoolTimeoutError,
+    RequestError,
+)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers ``/ok``, ``/echo``, ``/slow``, ``/flaky``, ``/down`` and ``/hangup``."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            server.clients.add(self.client_address)
+            hits = server.hits[self.path]
+
+        if self.path.startswith("/slow"):
+            time.sleep(0.2)
+        if self.path.startswith("/down") or (
+            self.path.startswith("/flaky") and hits <= 2
+        ):
+            return self.reply(503, {"error": "unavailable"})
+        self.reply(200, {"path": self.path})
+        if self.path.startswith("/hangup"):
+            # Close the keep-alive connection without announcing it.
+            self.close_connection = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.reply(200, {"received": json.loads(body)})
+
+    def reply(self, status, payload):
+        content = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class HTTPClientTestCase(SimpleTestCase):
+    """Test pooling, retries, circuit breaking and fan-out."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.server.lock = threading.Lock()
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.hits = {}
+        self.server.clients = set()
+        self.client = HTTPClient(timeout=2, backoff=0, breaker_threshold=3)
+        self.addCleanup(self.client.close)
+
+    def url(self, path):
+        return self.base_url + path
+
+    def test_get_json_and_connection_reuse(self):
+        """Test that sequential calls share one keep-alive connection."""
+        for _ in range(3):
+            response = self.client.get(self.url("/ok"), params={"q": "1"})
+            self.assertEqual(response.json(), {"path": "/ok?q=1"})
+
+        self.assertEqual(len(self.server.clients), 1)
+
+    def test_post_json(self):
+        """Test that JSON bodies are encoded and sent."""
+        response = self.client.post(self.url("/echo"), json={"a": 1})
+        self.assertEqual(response.json(), {"received": {"a": 1}})
+
+    def test_retries_transient_errors(self):
+        """Test that 503s are retried for idempotent requests."""
+        response = self.client.get(self.url("/flaky"))
+
+        self.assertEqual(response.status, 200)
+        self.assertEqual(self.server.hits["/flaky"], 3)
+        self.assertEqual(self.client.metrics()[self.host]["retries"], 2)
+
+    def test_timeout(self):
+        """Test that slow hosts raise RequestError after the timeout."""
+        with self.assertRaises(RequestError):
+            self.client.get(self.url("/slow"), timeout=0.05, retries=0)
+
+    def test_unreachable_host(self):
+        """Test that connection errors raise RequestError."""
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        port = server.server_port
+        server.server_close()
+
+        with self.assertRaises(RequestError):
+            self.client.get(f"http://127.0.0.1:{port}/", retries=1)
+
+    def test_circuit_breaker(self):
+        """Test that repeated failures open the circuit, then it recovers."""
+        response = self.client.get(self.url("/down"), retries=2)
+        self.assertEqual(response.status, 503)
+        with self.assertRaises(HTTPStatusError):
+            response.raise_for_status()
+
+        with self.assertRaises(CircuitOpenError):
+            self.client.get(self.url("/ok"))
+        self.assertNotIn("/ok", self.server.hits)
+        self.assertEqual(self.client.metrics()[self.host]["circuit"], "open")
+
+        self.client.breakers[self.host].reset_timeout = 0
+        self.assertEqual(self.client.get(self.url("/ok")).status, 200)
+        self.assertEqual(self.client.metrics()[self.host]["circuit"], "closed")
+
+    def test_pool_timeout_does_not_open_circuit(self):
+        """Test that waiting for a pooled connection is not a host failure."""
+        client = HTTPClient(timeout=2, pool_size=1, breaker_threshold=1)
+        self.addCleanup(client.close)
+        pool, breaker, _ = client._host_state(
+            "http", "127.0.0.1", self.server.server_port
+        )
+        pool.acquire(1)
+
+        with self.assertRaises(PoolTimeoutError):
+            client.get(self.url("/ok"), timeout=0.05)
+
+        self.assertEqual(breaker.state, "closed")
+        self.assertEqual(client.metrics()[self.host]["pool_timeouts"], 1)
+
+    def test_stale_connection_resend(self):
+        """Test that only idempotent requests are resent on a stale connection."""
+        self.client.get(self.url("/hangup"))
+        self.assertEqual(self.client.get(self.url("/ok")).status, 200)
+
+        self.client.get(self.url("/hangup"))
+        with self.assertRaises(RequestError):
+            self.client.post(self.url("/echo"), json={"a": 1})
+
+    def test_gather_runs_concurrently(self):
+        """Test that fan-out costs about one call, in order."""
+        started = time.perf_counter()
+        responses = self.client.gather(
+            *(self.url(f"/slow/{i}") for i in range(5)),
+            ("POST", self.url("/echo"), {"json": [1]}),
+        )
+
+        self.assertLess(time.perf_counter() - started, 0.8)
+        self.assertEqual(
+            [r.json() for r in responses],
+            [{"path": f"/slow/{i}"} for i in range(5)] + [{"received": [1]}],
+        )
+
+    def test_async_gather(self):
+        """Test the async facade from an event loop."""
+
+        async def fetch():
+            one = await self.client.aget(self.url("/ok"))
+            many = await self.client.agather(self.url("/slow/a"), self.url("/slow/b"))
+            return one, many
+
+        one, many = asyncio.run(fetch())
+
+        self.assertEqual(one.status, 200)
+        self.assertEqual([r.status for r in many], [200, 200])
+
+    def test_metrics(self):
+        """Test that per-host latency metrics are collected."""
+        self.client.get(self.url("/ok"))
+        self.client.get(self.url("/ok"))
+
+        metrics = self.client.metrics()[self.host]
+        self.assertEqual(metrics["requests"], 2)
+        self.assertEqual(metrics["errors"], 0)
+        self.assertGreater(metrics["p95_ms"], 0)
+
+    @property
+    def host(self):
+        return f"http://127.0.0.1:{self.server.server_port}"
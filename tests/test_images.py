@@ -0,0 +1,139 @@
+"""
+Tests for image derivatives and the responsive image tags.
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from app import images
+
+
+class ImageDerivativeTestCase(TestCase):
+    """Test cache keys, eviction, tags and the derivative view."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.media = Path(self.tmpdir.name)
+        override = override_settings(
+            MEDIA_ROOT=self.media,
+            IMAGE_CACHE_DIR=self.media / "derivatives",
+            IMAGE_WORKERS=0,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def make_image(self, name="photo.png", width=800, height=600):
+        from PIL import Image
+
+        path = self.media / name
+        Image.new("RGB", (width, height), "teal").save(path)
+        return path
+
+    def test_widths_for(self):
+        """Test that widths stop at the first one covering the original."""
+        self.assertEqual(images.widths_for((700, 500)), [320, 640, 960])
+        self.assertEqual(images.widths_for((100, 100)), [320])
+        self.assertEqual(images.widths_for(None), [320, 640, 960, 1280, 1920])
+
+    def test_derivative_path_is_content_addressed(self):
+        """Test that keys follow the source bytes and rendering parameters."""
+        source = self.media / "a.png"
+        source.write_bytes(b"one")
+        first = images.derivative_path(source, 320, "webp")
+
+        self.assertEqual(first, images.derivative_path(source, 320, "webp"))
+        self.assertNotEqual(first, images.derivative_path(source, 640, "webp"))
+        self.assertEqual(first.suffix, ".webp")
+
+        copy = self.media / "b.png"
+        copy.write_bytes(b"one")
+        self.assertEqual(first, images.derivative_path(copy, 320, "webp"))
+
+        source.write_bytes(b"two")
+        os.utime(source, ns=(1, 1))
+        self.assertNotEqual(first, images.derivative_path(source, 320, "webp"))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used files go first."""
+        directory = self.media / "derivatives" / "ab"
+        directory.mkdir(parents=True)
+        for age, name in enumerate(["new", "middle", "old"]):
+            path = directory / name
+            path.write_bytes(b"x" * 100)
+            os.utime(path, (1000 - age, 1000 - age))
+
+        self.assertEqual(images.evict(max_size=150), 200)
+        self.assertEqual([path.name for path in directory.iterdir()], ["new"])
+
+    def test_tags_without_derivatives(self):
+        """Test that tags fall back to the original image."""
+        (self.media / "photo.png").write_bytes(b"not really")
+        template = Template(
+            '{% load images %}{% srcset "photo.png" "webp" %}|'
+            '{% picture "photo.png" alt=caption %}'
+        )
+
+        with patch("app.images.supported_formats", return_value=[]):
+            output = template.render(Context({"caption": "A <photo>"}))
+
+        self.assertEqual(
+            output,
+            '|<picture><img src="/media/photo.png" alt="A &lt;photo&gt;" class=""'
+            ' loading="lazy" decoding="async"></picture>',
+        )
+
+    def test_view_rejects_unknown_variants(self):
+        """Test that only configured widths and formats are rendered."""
+        url = reverse("image-derivative", args=[123, "webp", "photo.png"])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        url = reverse("image-derivative", args=[320, "webp", "../secret.png"])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_view_rejects_derivative_sources(self):
+        """Test that cached derivatives are not resized again."""
+        cached = self.media / "derivatives" / "ab" / "abc.webp"
+        cached.parent.mkdir(parents=True)
+        cached.write_bytes(b"RIFF")
+        url = reverse("image-derivative", args=[320, "webp", "derivatives/ab/abc.webp"])
+
+        with patch("app.images.supported_formats", return_value=["webp"]):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+    @unittest.skipUnless(images.pillow_available(), "Pillow is not installed")
+    def test_pregenerate_skips_unreadable_images(self):
+        """Test that files with an image extension but other bytes are skipped."""
+        source = self.media / "notes.jpg"
+        source.write_bytes(b"not an image")
+
+        with self.assertLogs("app.images", "WARNING"):
+            self.assertEqual(images.pregenerate(source), [])
+        self.assertFalse((self.media / "derivatives").exists())
+
+    @unittest.skipUnless(images.pillow_available(), "Pillow is not installed")
+    def test_render_and_serve(self):
+        """Test that derivatives are rendered once, served and linked."""
+        self.make_image()
+        url = reverse("image-derivative", args=[320, "webp", "photo.png"])
+
+        response = self.client.get(url)
+        body = b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        self.assertIn("max-age=31536000", response["Cache-Control"])
+        self.assertEqual(body[8:12], b"WEBP")
+
+        output = Template('{% load images %}{% srcset "photo.png" "webp" %}').render(
+            Context()
+        )
+        self.assertIn("/img/320/webp/photo.png?v=", output)
+        self.assertIn(" 800w", output)
+        self.assertNotIn("1280", output)
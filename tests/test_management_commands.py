@@ -109,3 +109,45 @@ class SetupProjectCommandTestCase(TestCase):
             output = out.getvalue()
             self.assertIn("Setting up Django project", output)
             self.assertIn("Project setup completed", output)
+
+    def test_setup_project_seed_is_idempotent(self):
+        """Test that seeding bulk-creates rows once and tops them up."""
+        from django.contrib.admin.models import LogEntry
+        from django.contrib.auth.models import User
+
+        out = StringIO()
+        call_command("setup_project", "--seed", "--scale", "0.01", stdout=out)
+        self.assertEqual(User.objects.filter(username__startswith="seed-").count(), 10)
+        self.assertEqual(LogEntry.objects.count(), 50)
+        self.assertIn("auth.User: 10 rows created", out.getvalue())
+
+        call_command("setup_project", "--seed", "--scale", "0.01", stdout=out)
+        self.assertIn("auth.User: 0 rows created (already seeded)", out.getvalue())
+
+        call_command("setup_project", "--seed", "--scale", "0.02", stdout=out)
+        self.assertEqual(User.objects.count(), 20)
+        self.assertTrue(User.objects.get(username="seed-user-0").check_password("seed"))
+
+    def test_setup_project_seed_fixture(self):
+        """Test that fixtures are bulk-loaded and can be loaded twice."""
+        import json
+        import tempfile
+
+        from django.contrib.auth.models import Group
+
+        fixture = [
+            {"model": "auth.group", "pk": pk, "fields": {"name": f"group {pk}"}}
+            for pk in (1, 2)
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as file:
+            json.dump(fixture, file)
+            file.flush()
+            for _ in range(2):
+                call_command(
+                    "setup_project", "--seed-fixture", file.name, stdout=StringIO()
+                )
+
+        self.assertEqual(
+            list(Group.objects.values_list("name", flat=True).order_by("pk")),
+            ["group 1", "group 2"],
+        )
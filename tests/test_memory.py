@@ -0,0 +1,122 @@
+"""
+Tests for worker memory instrumentation.
+"""
+
+import json
+import os
+import signal
+import tempfile
+import time
+import tracemalloc
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from app import memory
+from app.middleware import MemoryProfilingMiddleware
+
+
+class MemoryProfilingTestCase(TestCase):
+    """Test RSS sampling, snapshots and the memory_report command."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.directory = Path(self.tmpdir.name)
+
+        override = override_settings(MEMORY_PROFILING_DIR=self.directory)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.was_tracing = tracemalloc.is_tracing()
+        self.addCleanup(self.stop_tracing)
+        memory._profiler = None
+
+    def stop_tracing(self):
+        memory._profiler = None
+        if not self.was_tracing:
+            tracemalloc.stop()
+
+    def test_current_rss(self):
+        """Test that the current RSS is a plausible byte count."""
+        self.assertGreater(memory.current_rss(), 1024 * 1024)
+
+    def test_middleware_records_view_stats(self):
+        """Test that each request's RSS delta is accounted to its view."""
+        leak = []
+
+        def get_response(request):
+            leak.append(bytearray(4 * 1024 * 1024))
+            return HttpResponse("ok")
+
+        middleware = MemoryProfilingMiddleware(get_response)
+        for _ in range(2):
+            request = RequestFactory().get("/leaky/")
+            request.user = AnonymousUser()
+            middleware(request)
+
+        stats = memory.get_profiler().views["/leaky/"]
+        self.assertEqual(stats["requests"], 2)
+        self.assertGreater(stats["total_delta"], 0)
+        self.assertTrue(tracemalloc.is_tracing())
+
+    @override_settings(MEMORY_PROFILING_SAMPLE_RATE=0.0)
+    def test_middleware_respects_sample_rate(self):
+        """Test that unsampled requests are not measured."""
+        middleware = MemoryProfilingMiddleware(lambda request: HttpResponse("ok"))
+        middleware(RequestFactory().get("/"))
+
+        self.assertEqual(memory.get_profiler().requests, 0)
+
+    def test_snapshot_written_when_interval_elapses(self):
+        """Test that a snapshot is dumped once the interval has passed."""
+        profiler = memory.MemoryProfiler(self.directory, snapshot_interval=0)
+        profiler.start()
+
+        profiler.record_request("home", 1024)
+
+        self.assertEqual(len(list(self.directory.glob("*.tracemalloc"))), 1)
+        stats = json.loads((self.directory / f"{profiler.pid}-views.json").read_text())
+        self.assertEqual(stats["views"]["home"]["total_delta"], 1024)
+
+    def test_signal_handler_does_not_take_locks(self):
+        """Test that SIGUSR2 inside the profiler's locks cannot deadlock."""
+        profiler = memory.get_profiler()
+        previous = memory.install_signal_handler()
+        self.addCleanup(signal.signal, signal.SIGUSR2, previous)
+
+        with memory._profiler_lock, profiler.lock:
+            os.kill(os.getpid(), signal.SIGUSR2)
+
+        deadline = time.monotonic() + 5
+        while not list(self.directory.glob("*-views.json")):
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+
+    def test_memory_report_command(self):
+        """Test that memory_report lists views and allocation sites."""
+        profiler = memory.get_profiler()
+        profiler.start()
+        profiler.record_request("home", 2048)
+        profiler.take_snapshot()
+        retained = [bytearray(1024) for _ in range(100)]  # noqa: F841
+        profiler.take_snapshot()
+
+        out = StringIO()
+        call_command("memory_report", "--top", "5", stdout=out)
+        self.assertIn("home: 1 requests", out.getvalue())
+        self.assertIn("top 5 allocation sites", out.getvalue())
+
+        out = StringIO()
+        call_command("memory_report", "--compare", stdout=out)
+        self.assertIn("growing allocation sites", out.getvalue())
+
+    def test_memory_report_without_snapshots(self):
+        """Test that a missing directory is reported as an error."""
+        with self.assertRaises(CommandError):
+            call_command("memory_report", "--dir", str(self.directory / "missing"))
@@ -0,0 +1,167 @@
+"""
+Tests for preload Link headers and 103 Early Hints.
+"""
+
+from django.http import HttpResponse, JsonResponse
+from django.template import engines
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from asgiref.sync import async_to_sync
+
+from app import preload, request_cache
+from app.middleware import PreloadMiddleware
+
+
+class PreloadLinkTestCase(TestCase):
+    """Test Link values, learned assets and the Link response header."""
+
+    def setUp(self):
+        preload._learned.clear()
+
+    def tearDown(self):
+        preload._learned.clear()
+
+    def test_link_for(self):
+        """Test that the ``as`` type follows the extension."""
+        self.assertEqual(
+            preload.link_for("/static/css/main.css"),
+            "</static/css/main.css>; rel=preload; as=style",
+        )
+        self.assertEqual(
+            preload.link_for("/static/js/main.js?v=2"),
+            "</static/js/main.js?v=2>; rel=preload; as=script",
+        )
+        self.assertEqual(
+            preload.link_for("/static/fonts/a.woff2"),
+            "</static/fonts/a.woff2>; rel=preload; as=font; crossorigin",
+        )
+        self.assertIsNone(preload.link_for("/static/img/logo.png"))
+
+    def test_home_link_header(self):
+        """Test that the home page announces its declared assets."""
+        response = self.client.get(reverse("home"))
+        self.assertIn("</static/css/main.css>; rel=preload; as=style", response["Link"])
+        self.assertIn("</static/js/main.js>; rel=preload; as=script", response["Link"])
+
+    def test_assets_learned_from_render(self):
+        """Test that ``{% static %}`` URLs rendered for a view are learned."""
+        template = engines["django"].from_string(
+            "{% load static %}"
+            "{% static 'css/extra.css' %}{% static 'img/logo.png' %}"
+            "{% static 'js/extra.js' %}"
+        )
+        with request_cache.request_scope():
+            preload.start("probe")
+            template.render({})
+        self.assertEqual(
+            preload.links_for_view(lambda request: None, "probe"),
+            [
+                "</static/css/extra.css>; rel=preload; as=style",
+                "</static/js/extra.js>; rel=preload; as=script",
+            ],
+        )
+
+    def test_nothing_learned_outside_views(self):
+        """Test that URLs generated outside a view are not collected."""
+        engines["django"].from_string(
+            "{% load static %}{% static 'css/extra.css' %}"
+        ).render({})
+        self.assertEqual(preload._learned, {})
+
+    @override_settings(PRELOAD_MAX_LINKS=1)
+    def test_max_links(self):
+        """Test that at most PRELOAD_MAX_LINKS links are announced."""
+        view = resolve(reverse("home"))
+        links = preload.links_for_view(view.func, view.url_name)
+        self.assertEqual(links, ["</static/css/main.css>; rel=preload; as=style"])
+
+    def test_non_html_response(self):
+        """Test that non-HTML responses get no Link header."""
+        request = RequestFactory().get("/")
+        view = resolve(reverse("home"))
+        middleware = PreloadMiddleware(lambda request: JsonResponse({}))
+        request.resolver_match = view
+        with request_cache.request_scope():
+            middleware.process_view(request, view.func, (), {})
+            response = middleware(request)
+        self.assertFalse(response.has_header("Link"))
+
+    def test_existing_link_header_kept(self):
+        """Test that links are appended to a Link header set by the view."""
+        existing = '</feed>; rel="alternate"'
+
+        def view(request):
+            response = HttpResponse()
+            response["Link"] = existing
+            return response
+
+        request = RequestFactory().get("/")
+        request.resolver_match = resolve(reverse("home"))
+        middleware = PreloadMiddleware(view)
+        with request_cache.request_scope():
+            middleware.process_view(
+                request, preload.preload_static("a.css")(view), (), {}
+            )
+            response = middleware(request)
+        self.assertEqual(
+            response["Link"], f"{existing}, </static/a.css>; rel=preload; as=style"
+        )
+
+
+class EarlyHintsMiddlewareTestCase(TestCase):
+    """Test the ASGI wrapper sending 103 Early Hints."""
+
+    def setUp(self):
+        preload._learned.clear()
+
+    def run_app(self, scope):
+        messages = []
+
+        async def application(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200})
+
+        async def receive():
+            return {"type": "http.request"}
+
+        async def send(message):
+            messages.append(message)
+
+        async_to_sync(preload.EarlyHintsMiddleware(application))(scope, receive, send)
+        return messages
+
+    def scope(self, **extra):
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": reverse("home"),
+            "extensions": {"http.response.early_hint": {}},
+        }
+        scope.update(extra)
+        return scope
+
+    def test_early_hints_sent(self):
+        """Test that the view's links are sent before the response starts."""
+        messages = self.run_app(self.scope())
+        self.assertEqual(messages[0]["type"], "http.response.early_hint")
+        self.assertIn(
+            b"</static/css/main.css>; rel=preload; as=style", messages[0]["links"]
+        )
+        self.assertEqual(messages[1]["type"], "http.response.start")
+
+    def test_without_extension(self):
+        """Test that servers without the extension get no early hints."""
+        messages = self.run_app(self.scope(extensions={}))
+        self.assertEqual([m["type"] for m in messages], ["http.response.start"])
+
+    def test_post_and_unknown_paths(self):
+        """Test that POSTs and unresolvable paths get no early hints."""
+        for scope in (self.scope(method="POST"), self.scope(path="/no-such-page/")):
+            messages = self.run_app(scope)
+            self.assertEqual([m["type"] for m in messages], ["http.response.start"])
+
+    @override_settings(PRELOAD_EARLY_HINTS=False)
+    def test_disabled(self):
+        """Test that PRELOAD_EARLY_HINTS = False turns early hints off."""
+        messages = self.run_app(self.scope())
+        self.assertEqual([m["type"] for m in messages], ["http.response.start"])
@@ -0,0 +1,200 @@
+"""
+Tests for the sampling request profiler.
+"""
+
+import asyncio
+import json
+import tempfile
+import threading
+import time
+from collections import Counter
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from app import profiling
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def wsgi_app(environ, start_response):
+    busy_loop(0.05)
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [b"ok"]
+
+
+async def asgi_app(scope, receive, send):
+    busy_loop(0.05)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def streaming_wsgi_app(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain")])
+
+    def render_body():
+        yield b"head"
+        busy_loop(0.05)
+        yield b"body"
+
+    return render_body()
+
+
+def call_wsgi(application, path="/", **headers):
+    """Call ``application`` and consume its response as a WSGI server does."""
+    environ = {"PATH_INFO": path, "REQUEST_METHOD": "GET", **headers}
+    response = application(environ, lambda status, headers: None)
+    try:
+        return b"".join(response)
+    finally:
+        if hasattr(response, "close"):
+            response.close()
+
+
+def call_asgi(application, path="/", headers=()):
+    scope = {"type": "http", "path": path, "headers": list(headers)}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+class ProfilingTestCase(TestCase):
+    """Test request sampling, profile formats and merge_profiles."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.directory = Path(self.tmpdir.name)
+
+        override = override_settings(
+            PROFILING_DIR=self.directory, PROFILING_INTERVAL=0.001
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def profiles(self, pattern="*"):
+        return sorted(path for path in self.directory.glob(pattern) if path.is_file())
+
+    def test_sampler_captures_thread(self):
+        """Test that the sampler records stacks of the sampled thread."""
+        sampler = profiling.Sampler([threading.get_ident()], interval=0.001).start()
+        busy_loop(0.05)
+        sampler.stop()
+
+        self.assertGreater(sampler.samples, 0)
+        frames = {frame for stack in sampler.stacks for frame in stack}
+        self.assertTrue(any(frame.startswith("busy_loop ") for frame in frames))
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0)
+    def test_wsgi_sampled_request_written(self):
+        """Test that sampled WSGI requests are written per URL name."""
+        application = profiling.ProfilingWSGIMiddleware(wsgi_app)
+
+        self.assertEqual(call_wsgi(application, "/"), b"ok")
+
+        [path] = self.profiles()
+        self.assertTrue(path.name.startswith("home."))
+        self.assertTrue(path.name.endswith(".collapsed"))
+        self.assertIn("busy_loop", path.read_text())
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0)
+    def test_wsgi_streamed_body_profiled(self):
+        """Test that rendering a streamed body is part of the profile."""
+        application = profiling.ProfilingWSGIMiddleware(streaming_wsgi_app)
+
+        response = application(
+            {"PATH_INFO": "/", "REQUEST_METHOD": "GET"}, lambda *args: None
+        )
+        self.assertEqual(self.profiles(), [])
+        self.assertEqual(b"".join(response), b"headbody")
+        response.close()
+
+        [path] = self.profiles()
+        self.assertIn("render_body", path.read_text())
+
+    @override_settings(PROFILING_SAMPLE_RATE=0.0, PROFILING_TOKEN="secret")
+    def test_wsgi_header_trigger(self):
+        """Test that only requests carrying the token are profiled."""
+        application = profiling.ProfilingWSGIMiddleware(wsgi_app)
+
+        call_wsgi(application, "/")
+        call_wsgi(application, "/", HTTP_X_PROFILE="wrong")
+        self.assertEqual(self.profiles(), [])
+
+        call_wsgi(application, "/", HTTP_X_PROFILE="secret")
+        self.assertEqual(len(self.profiles()), 1)
+
+    @override_settings(PROFILING_SAMPLE_RATE=0.0, PROFILING_TOKEN="")
+    def test_header_ignored_without_token(self):
+        """Test that the header cannot trigger profiles while no token is set."""
+        application = profiling.ProfilingWSGIMiddleware(wsgi_app)
+
+        call_wsgi(application, "/", HTTP_X_PROFILE="")
+        self.assertEqual(self.profiles(), [])
+
+    @override_settings(PROFILING_TOKEN="secret", PROFILING_FORMAT="speedscope")
+    def test_asgi_speedscope_profile(self):
+        """Test that ASGI requests are profiled as speedscope documents."""
+        application = profiling.ProfilingASGIMiddleware(asgi_app)
+
+        sent = call_asgi(application, "/", [(b"x-profile", b"secret")])
+
+        self.assertEqual(sent[0]["status"], 200)
+        [path] = self.profiles("*.speedscope.json")
+        document = json.loads(path.read_text())
+        self.assertEqual(document["name"], "home")
+        frames = [frame["name"] for frame in document["shared"]["frames"]]
+        self.assertTrue(any(frame.startswith("busy_loop ") for frame in frames))
+
+    def test_format_round_trips(self):
+        """Test that collapsed and speedscope output parse back unchanged."""
+        stacks = Counter({("main", "view"): 3, ("main", "view", "query"): 5})
+
+        self.assertEqual(
+            profiling.parse_collapsed(profiling.to_collapsed(stacks)), stacks
+        )
+        document = profiling.to_speedscope("home", stacks, 0.005)
+        self.assertEqual(profiling.parse_speedscope(document, 0.005), stacks)
+
+    def test_merge_profiles_command(self):
+        """Test that profiles are merged per URL name across formats."""
+        first = Counter({("main", "view"): 2})
+        second = Counter({("main", "view"): 1, ("main", "query"): 1})
+        (self.directory / "home.1.10.collapsed").write_text(
+            profiling.to_collapsed(first)
+        )
+        (self.directory / "home.2.11.speedscope.json").write_text(
+            json.dumps(profiling.to_speedscope("home", second, 0.001))
+        )
+        (self.directory / "admin_index.3.10.collapsed").write_text("main 1\n")
+
+        out = StringIO()
+        call_command("merge_profiles", "--url-name", "home", "--speedscope", stdout=out)
+
+        self.assertIn("home: 2 profiles, 4 samples", out.getvalue())
+        self.assertNotIn("admin_index", out.getvalue())
+        merged = (self.directory / "merged" / "home.collapsed").read_text()
+        self.assertEqual(
+            profiling.parse_collapsed(merged),
+            Counter({("main", "view"): 3, ("main", "query"): 1}),
+        )
+        self.assertTrue((self.directory / "merged" / "home.speedscope.json").exists())
+
+    def test_merge_profiles_without_profiles(self):
+        """Test that an empty directory is reported as an error."""
+        with self.assertRaises(CommandError):
+            call_command("merge_profiles", "--dir", str(self.directory / "missing"))
@@ -0,0 +1,106 @@
+"""
+Tests for access-controlled file serving.
+"""
+
+import tempfile
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+CONTENT = b"0123456789" * 10
+
+
+class ProtectedMediaTestCase(TestCase):
+    """Test authorization, range requests and proxy delegation."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        root = Path(self.tmpdir.name)
+        (root / "reports").mkdir()
+        (root / "reports" / "q1 report.txt").write_bytes(CONTENT)
+
+        override = override_settings(
+            PROTECTED_MEDIA_ROOT=root, PROTECTED_MEDIA_BACKEND="python"
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.url = reverse("protected-file", args=["reports/q1 report.txt"])
+        self.client.force_login(User.objects.create_user("reader"))
+
+    def get(self, url=None, **headers):
+        response = self.client.get(url or self.url, headers=headers)
+        # Consuming the content lets the test client close the file.
+        body = b"".join(response.streaming_content) if response.streaming else b""
+        return response, body
+
+    def test_requires_authorization(self):
+        """Test that anonymous users are refused."""
+        self.client.logout()
+
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_path_traversal(self):
+        """Test that paths outside the root are not served."""
+        response, _ = self.get(reverse("protected-file", args=["../etc/passwd"]))
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_full_file(self):
+        """Test that the whole file is served with validators."""
+        response, body = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, CONTENT)
+        self.assertEqual(response["Content-Length"], str(len(CONTENT)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(response["Cache-Control"], "private, max-age=0")
+
+        response, _ = self.get(If_None_Match=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_range_requests(self):
+        """Test byte, open-ended and suffix ranges."""
+        for header, expected, content_range in (
+            ("bytes=10-19", CONTENT[10:20], "bytes 10-19/100"),
+            ("bytes=95-", CONTENT[95:], "bytes 95-99/100"),
+            ("bytes=-5", CONTENT[-5:], "bytes 95-99/100"),
+            ("bytes=90-500", CONTENT[90:], "bytes 90-99/100"),
+        ):
+            with self.subTest(header):
+                response, body = self.get(Range=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(body, expected)
+                self.assertEqual(response["Content-Range"], content_range)
+                self.assertEqual(response["Content-Length"], str(len(expected)))
+
+    def test_unsatisfiable_and_stale_ranges(self):
+        """Test 416 responses and If-Range falling back to the full file."""
+        response, _ = self.get(Range="bytes=200-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */100")
+
+        response, body = self.get(Range="bytes=0-9", If_Range='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, CONTENT)
+
+    def test_proxy_backends(self):
+        """Test that nginx and sendfile backends only send headers."""
+        with override_settings(PROTECTED_MEDIA_BACKEND="nginx"):
+            response = self.client.get(self.url + "?download")
+        self.assertEqual(
+            response["X-Accel-Redirect"], "/_protected/reports/q1%20report.txt"
+        )
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["Content-Type"], "text/plain")
+        self.assertTrue(response["Content-Disposition"].startswith("attachment;"))
+
+        with override_settings(PROTECTED_MEDIA_BACKEND="sendfile"):
+            response = self.client.get(self.url)
+        self.assertEqual(
+            response["X-Sendfile"],
+            str(Path(self.tmpdir.name) / "reports" / "q1 report.txt"),
+        )
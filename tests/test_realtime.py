@@ -0,0 +1,222 @@
+"""
+Tests for pub/sub fan-out and the SSE/WebSocket protocol router.
+"""
+
+import asyncio
+import threading
+
+from django.test import SimpleTestCase, override_settings
+
+from app import pubsub
+from app.realtime import ProtocolRouter, format_event
+
+
+class FakeConnection:
+    """Drive an ASGI application with a scripted client."""
+
+    def __init__(self, application, scope):
+        self.application = application
+        self.scope = scope
+        self.incoming = asyncio.Queue()
+        self.sent = asyncio.Queue()
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send(self, message):
+        await self.sent.put(message)
+
+    def start(self):
+        self.task = asyncio.create_task(
+            self.application(self.scope, self.receive, self.send)
+        )
+        return self
+
+    async def next_sent(self, timeout=1):
+        return await asyncio.wait_for(self.sent.get(), timeout)
+
+    async def disconnect(self, message_type):
+        await self.incoming.put({"type": message_type})
+        await asyncio.wait_for(self.task, 1)
+
+
+async def django_stub(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"django"})
+
+
+def http_scope(path, method="GET"):
+    return {"type": "http", "path": path, "method": method, "headers": []}
+
+
+async def wait_for_subscribers(channel, count=1):
+    while pubsub.get_hub().subscriber_count(channel) < count:
+        await asyncio.sleep(0.001)
+
+
+class PubSubTestCase(SimpleTestCase):
+    """Test in-process and cross-worker fan-out."""
+
+    def setUp(self):
+        pubsub._hub = None
+        self.addCleanup(setattr, pubsub, "_hub", None)
+
+    def test_fan_out_to_every_subscriber(self):
+        """Test that each subscriber gets its own copy of a message."""
+
+        async def scenario():
+            hub = pubsub.get_hub()
+            with hub.subscribe("news") as first, hub.subscribe("news") as second:
+                pubsub.publish("news", {"id": 1}, event="created")
+                return await first.get(1), await second.get(1)
+
+        first, second = asyncio.run(scenario())
+        self.assertEqual(first, {"event": "created", "data": {"id": 1}})
+        self.assertEqual(first, second)
+        self.assertEqual(pubsub.get_hub().subscriber_count(), 0)
+
+    def test_publish_from_another_thread(self):
+        """Test that sync code in other threads can publish."""
+
+        async def scenario():
+            with pubsub.get_hub().subscribe("news") as subscription:
+                thread = threading.Thread(target=pubsub.publish, args=("news", "hi"))
+                thread.start()
+                thread.join()
+                return await subscription.get(1)
+
+        self.assertEqual(asyncio.run(scenario())["data"], "hi")
+
+    def test_slow_consumer_drops_oldest(self):
+        """Test that a full queue drops the oldest messages."""
+
+        async def scenario():
+            with pubsub.get_hub().subscribe("news", maxsize=2) as subscription:
+                for number in range(4):
+                    pubsub.publish("news", number)
+                messages = [await subscription.get(1) for _ in range(2)]
+                return messages, subscription
+
+        messages, subscription = asyncio.run(scenario())
+        self.assertEqual([message["data"] for message in messages], [2, 3])
+        self.assertEqual(subscription.dropped, 2)
+        self.assertTrue(subscription.overflowed)
+
+    def test_broker_fans_out_across_workers(self):
+        """Test that messages published by one worker reach another."""
+
+        async def receive_from_other_worker(subscriber_worker, publisher_worker):
+            with subscriber_worker.subscribe("news") as subscription:
+                # Publish until the listener thread has subscribed.
+                while True:
+                    await asyncio.to_thread(publisher_worker.publish, "news", "hi")
+                    try:
+                        return await subscription.get(0.05)
+                    except TimeoutError:
+                        continue
+
+        async def scenario():
+            server = await pubsub.start_broker("127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            url = f"tcp://127.0.0.1:{port}"
+            workers = pubsub.Hub(url), pubsub.Hub(url)
+            async with server:
+                try:
+                    return await asyncio.wait_for(
+                        receive_from_other_worker(*workers), timeout=5
+                    )
+                finally:
+                    # The server waits for every client connection on exit.
+                    for worker in workers:
+                        await asyncio.to_thread(worker.close)
+
+        self.assertEqual(asyncio.run(scenario()), {"event": None, "data": "hi"})
+
+
+@override_settings(REALTIME_HEARTBEAT=0.05)
+class ProtocolRouterTestCase(SimpleTestCase):
+    """Test SSE and WebSocket streaming through the ASGI router."""
+
+    def setUp(self):
+        pubsub._hub = None
+        self.addCleanup(setattr, pubsub, "_hub", None)
+
+    def test_http_passes_through_to_django(self):
+        """Test that ordinary requests reach the wrapped application."""
+
+        async def scenario():
+            connection = FakeConnection(ProtocolRouter(django_stub), http_scope("/"))
+            connection.start()
+            await connection.task
+            return [await connection.next_sent() for _ in range(2)]
+
+        start, body = asyncio.run(scenario())
+        self.assertEqual(body["body"], b"django")
+
+    def test_sse_stream(self):
+        """Test that published messages and heartbeats are streamed."""
+
+        async def scenario():
+            router = ProtocolRouter(django_stub)
+            connection = FakeConnection(router, http_scope("/events/news/")).start()
+            start = await connection.next_sent()
+            await connection.next_sent()  # retry: hint
+            await wait_for_subscribers("news")
+            pubsub.publish("news", {"id": 1}, event="created")
+            event = await connection.next_sent()
+            heartbeat = await connection.next_sent()
+            await connection.disconnect("http.disconnect")
+            return start, event, heartbeat, router
+
+        start, event, heartbeat, router = asyncio.run(scenario())
+        self.assertEqual(start["status"], 200)
+        self.assertIn(
+            (b"content-type", b"text/event-stream; charset=utf-8"), start["headers"]
+        )
+        self.assertEqual(event["body"], b'event: created\ndata: {"id":1}\n\n')
+        self.assertEqual(heartbeat["body"], b": heartbeat\n\n")
+        self.assertEqual(router.connections, 0)
+        self.assertEqual(pubsub.get_hub().subscriber_count(), 0)
+
+    def test_sse_rejects_bad_channel_and_limits(self):
+        """Test invalid channels and the per-worker connection limit."""
+
+        async def status(router, path):
+            connection = FakeConnection(router, http_scope(path)).start()
+            await connection.task
+            return (await connection.next_sent())["status"]
+
+        async def scenario():
+            router = ProtocolRouter(django_stub)
+            bad = await status(router, "/events/bad channel/")
+            router.max_connections = 0
+            full = await status(router, "/events/news/")
+            return bad, full
+
+        self.assertEqual(asyncio.run(scenario()), (404, 503))
+
+    def test_websocket_stream(self):
+        """Test that WebSocket clients receive JSON frames and heartbeats."""
+
+        async def scenario():
+            scope = {"type": "websocket", "path": "/ws/news/", "headers": []}
+            connection = FakeConnection(ProtocolRouter(django_stub), scope)
+            await connection.incoming.put({"type": "websocket.connect"})
+            connection.start()
+            accept = await connection.next_sent()
+            await wait_for_subscribers("news")
+            pubsub.publish("news", [1, 2])
+            frame = await connection.next_sent()
+            heartbeat = await connection.next_sent()
+            await connection.disconnect("websocket.disconnect")
+            return accept, frame, heartbeat
+
+        accept, frame, heartbeat = asyncio.run(scenario())
+        self.assertEqual(accept["type"], "websocket.accept")
+        self.assertEqual(frame["text"], '{"event":null,"data":[1,2]}')
+        self.assertEqual(heartbeat["text"], '{"event":"heartbeat"}')
+
+    def test_format_event_multiline(self):
+        """Test that multi-line text becomes several data fields."""
+        message = {"event": None, "data": "one\ntwo"}
+        self.assertEqual(format_event(message), b"data: one\ndata: two\n\n")
@@ -0,0 +1,99 @@
+"""
+Tests for request-scoped memoization and the data loader.
+"""
+
+import asyncio
+
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase
+
+from asgiref.sync import async_to_sync
+
+from app import request_cache
+from app.middleware import RequestCacheMiddleware
+
+
+class RequestCacheTestCase(TestCase):
+    """Test scoping, memoization and batched lookups."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = User.objects.bulk_create(
+            User(username=f"user{i}") for i in range(3)
+        )
+        cls.pks = list(User.objects.order_by("pk").values_list("pk", flat=True))
+
+    def test_memoize_within_scope(self):
+        """Test that results are shared within a scope and not beyond it."""
+        calls = []
+
+        @request_cache.memoize
+        def lookup(name):
+            calls.append(name)
+            return name.upper()
+
+        with request_cache.request_scope():
+            self.assertEqual([lookup("a"), lookup("a"), lookup("b")], ["A", "A", "B"])
+        with request_cache.request_scope():
+            lookup("a")
+        lookup("a")
+
+        self.assertEqual(calls, ["a", "b", "a", "a"])
+
+    def test_middleware_scopes_sync_and_async_requests(self):
+        """Test that each request gets a fresh scope, under WSGI and ASGI."""
+
+        def view(request):
+            request_cache.store("seen", request_cache.get("seen", 0) + 1)
+            return HttpResponse(str(request_cache.get("seen")))
+
+        async def async_view(request):
+            return view(request)
+
+        request = RequestFactory().get("/")
+        middleware = RequestCacheMiddleware(view)
+        self.assertEqual(middleware(request).content, b"1")
+        self.assertEqual(middleware(request).content, b"1")
+        self.assertFalse(request_cache.active())
+
+        async def both():
+            middleware = RequestCacheMiddleware(async_view)
+            return await asyncio.gather(middleware(request), middleware(request))
+
+        self.assertEqual(
+            [response.content for response in asyncio.run(both())], [b"1", b"1"]
+        )
+
+    def test_data_loader_batches_lookups(self):
+        """Test that queued keys are fetched with one query in a template."""
+        with request_cache.request_scope():
+            loader = request_cache.DataLoader.for_model(User)
+            self.assertIs(loader, request_cache.DataLoader.for_model(User))
+            rows = [loader.load(pk) for pk in self.pks + [0]]
+            template = Template(
+                "{% for user in rows %}{{ user.username|default:'-' }} {% endfor %}"
+            )
+
+            with self.assertNumQueries(1):
+                output = template.render(Context({"rows": rows}))
+            with self.assertNumQueries(0):
+                self.assertEqual(loader.get(self.pks[0]).username, "user0")
+
+        self.assertEqual(output, "user0 user1 user2 - ")
+
+    def test_data_loader_by_field_and_async(self):
+        """Test loading by a unique field and the async API."""
+        loader = request_cache.DataLoader(User.objects.all(), field="username")
+
+        with self.assertNumQueries(1):
+            found = loader.get_many(["user1", "user2", "nobody"])
+        self.assertEqual(found["user1"].pk, self.pks[1])
+        self.assertIsNone(found["nobody"])
+
+        # async_to_sync runs the ORM call back on this thread's connection.
+        user = async_to_sync(request_cache.DataLoader(User.objects.all()).aget)(
+            self.pks[2]
+        )
+        self.assertEqual(user.username, "user2")
@@ -0,0 +1,101 @@
+"""
+Tests for schema snapshots and the bootstrap_schema command.
+"""
+
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, override_settings
+
+from app import schema
+
+
+class SchemaSnapshotTestCase(TestCase):
+    """Test snapshot files and bootstrapping an empty database."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.directory = Path(self.tmpdir.name)
+
+        override = override_settings(SCHEMA_SNAPSHOT_DIR=self.directory / "cache")
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def use_empty_database(self, name):
+        """Point a ``bootstrap`` database alias at a new SQLite file."""
+        connections.settings["bootstrap"] = {
+            **connections["default"].settings_dict,
+            "NAME": str(self.directory / name),
+            "TEST": {},
+        }
+        # TestCase only lets tests connect to the databases it declares.
+        databases = type(self).databases
+        type(self).databases = databases | {"bootstrap"}
+        self.addCleanup(setattr, type(self), "databases", databases)
+        self.addCleanup(self.remove_database)
+        return connections["bootstrap"]
+
+    def remove_database(self):
+        if "bootstrap" not in connections.settings:
+            return
+        connections["bootstrap"].close()
+        del connections["bootstrap"]
+        del connections.settings["bootstrap"]
+
+    def test_migrations_hash_is_stable(self):
+        """Test that the migrations hash only depends on the migration files."""
+        self.assertEqual(schema.migrations_hash(), schema.migrations_hash())
+        self.assertEqual(len(schema.migrations_hash()), 12)
+
+    def test_snapshot_checksum_verified(self):
+        """Test that stale or tampered snapshots are rejected."""
+        path = self.directory / "sqlite-abc.json"
+        statements = [["CREATE TABLE t (id integer)", None, False]]
+        schema.write_snapshot(path, "abc", statements)
+
+        self.assertEqual(schema.read_snapshot(path, "abc"), statements)
+        self.assertIsNone(schema.read_snapshot(path, "def"))
+
+        data = json.loads(path.read_text())
+        data["statements"].append(["DROP TABLE t", None, False])
+        path.write_text(json.dumps(data))
+        self.assertIsNone(schema.read_snapshot(path, "abc"))
+        self.assertIsNone(schema.read_snapshot(self.directory / "missing", "abc"))
+
+    def test_bootstrap_records_then_replays_snapshot(self):
+        """Test that a second empty database is built from the snapshot."""
+        self.use_empty_database("first.sqlite3")
+        out = StringIO()
+        call_command("bootstrap_schema", "--database", "bootstrap", stdout=out)
+        self.assertIn("running migrate", out.getvalue())
+        self.assertIn("Slowest", out.getvalue())
+        self.assertIn("auth.0001_initial", out.getvalue())
+        self.remove_database()
+
+        connection = self.use_empty_database("second.sqlite3")
+        out = StringIO()
+        call_command("bootstrap_schema", "--database", "bootstrap", stdout=out)
+        self.assertIn("Schema loaded from", out.getvalue())
+
+        tables = connection.introspection.table_names()
+        self.assertIn("auth_user", tables)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM django_migrations")
+            applied = cursor.fetchone()[0]
+            cursor.execute("SELECT COUNT(*) FROM auth_permission")
+            permissions = cursor.fetchone()[0]
+        self.assertGreater(applied, 10)
+        self.assertGreater(permissions, 0)
+
+    def test_bootstrap_existing_database_migrates(self):
+        """Test that a non-empty database is migrated normally."""
+        out = StringIO()
+        call_command("bootstrap_schema", stdout=out)
+
+        self.assertIn("Database is not empty", out.getvalue())
+        self.assertIn("Applied 0 migrations", out.getvalue())
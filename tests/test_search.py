@@ -0,0 +1,86 @@
+"""
+Tests for the full-text search subsystem.
+"""
+
+from io import StringIO
+
+from django.contrib.auth.models import Group, User
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from app import search
+
+
+class SearchTestCase(TestCase):
+    """Test indexing through signals, ranking, highlighting and rebuilds."""
+
+    @classmethod
+    def setUpClass(cls):
+        # Index tables are created outside the test transactions.
+        index = search.register(
+            User, ["username", "first_name", "last_name"], [2, 1, 1]
+        )
+        index.ensure_table()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        search.unregister(User)
+
+    def create(self, username, first_name="", last_name=""):
+        return User.objects.create(
+            username=username, first_name=first_name, last_name=last_name
+        )
+
+    def test_signals_keep_index_current(self):
+        """Test that saves and deletes update the index."""
+        user = self.create("ada", "Ada", "Lovelace")
+        self.assertEqual(
+            [result.object for result in search.search(User, "lovelace")], [user]
+        )
+
+        user.last_name = "Byron"
+        user.save()
+        self.assertEqual(search.search(User, "lovelace"), [])
+        self.assertEqual(len(search.search(User, "byron")), 1)
+
+        user.delete()
+        self.assertEqual(search.search(User, "byron"), [])
+
+    def test_ranking_and_highlighting(self):
+        """Test weighted ranking, stemming, prefixes and escaped highlights."""
+        self.create("grace", "Grace", "<Hopper>")
+        self.create("hopper", "Someone")
+
+        results = search.search(User, "hopp")
+
+        self.assertEqual(
+            [result.object.username for result in results], ["hopper", "grace"]
+        )
+        self.assertGreater(results[0].rank, results[1].rank)
+        self.assertEqual(
+            results[1].highlights["last_name"], "&lt;<mark>Hopper</mark>&gt;"
+        )
+        self.assertEqual(search.search(User, '" OR *'), [])
+
+    def test_rebuild_command(self):
+        """Test that the command reindexes rows changed behind the signals."""
+        user = self.create("alan", "Alan", "Turing")
+        User.objects.filter(pk=user.pk).update(last_name="Kay")
+
+        out = StringIO()
+        call_command("rebuild_search_index", "auth.User", batch_size=1, stdout=out)
+
+        self.assertIn("auth.User: 1 rows indexed", out.getvalue())
+        self.assertEqual(search.search(User, "turing"), [])
+        self.assertEqual(len(search.search(User, "kay")), 1)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_search_index", "auth.Group", stdout=out)
+
+    def test_unregistered_model(self):
+        """Test that searching an unregistered model is a configuration error."""
+        with self.assertRaises(ImproperlyConfigured):
+            search.search(Group, "admins")
@@ -0,0 +1,93 @@
+"""
+Tests for the in-memory static file manifest.
+"""
+
+import json
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+
+from app import static
+from app.static import ManifestStaticFilesStorage
+
+
+class StaticManifestTestCase(TestCase):
+    """Test URL resolution, the CDN prefix and failing fast."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.root = Path(self.tmpdir.name)
+
+    def write_manifest(self, paths):
+        manifest = {"version": "1.1", "paths": paths, "hash": "test"}
+        (self.root / "staticfiles.json").write_text(json.dumps(manifest))
+
+    def storage(self):
+        return ManifestStaticFilesStorage(location=self.root)
+
+    def test_preloaded_urls(self):
+        """Test that preloaded names resolve without touching the manifest code."""
+        self.write_manifest({"css/main.css": "css/main.0123abcd.css"})
+        storage = self.storage()
+        self.assertEqual(storage.preload(), 1)
+        with mock.patch.object(storage, "stored_name", side_effect=AssertionError):
+            self.assertEqual(
+                storage.url("css/main.css"), "/static/css/main.0123abcd.css"
+            )
+
+    def test_other_names_memoized(self):
+        """Test that names outside the manifest keys are resolved once."""
+        self.write_manifest({"css/main.css": "css/main.0123abcd.css"})
+        storage = self.storage()
+        with mock.patch.object(
+            storage, "stored_name", wraps=storage.stored_name
+        ) as stored_name:
+            for _ in range(3):
+                url = storage.url("css/main.css#section")
+        self.assertEqual(url, "/static/css/main.0123abcd.css#section")
+        self.assertEqual(stored_name.call_count, 1)
+
+    @override_settings(STATIC_CDN_URL="https://cdn.example.com/static/")
+    def test_cdn_prefix(self):
+        """Test that STATIC_CDN_URL prefixes generated URLs."""
+        self.write_manifest({"js/main.js": "js/main.4567cdef.js"})
+        storage = self.storage()
+        storage.preload()
+        self.assertEqual(
+            storage.url("js/main.js"),
+            "https://cdn.example.com/static/js/main.4567cdef.js",
+        )
+
+    def test_missing_assets(self):
+        """Test that missing assets fail loudly once there is a manifest."""
+        self.write_manifest({"css/main.css": "css/main.0123abcd.css"})
+        with self.assertRaisesMessage(ValueError, "Missing staticfiles manifest"):
+            self.storage().url("css/missing.css")
+
+    def test_without_manifest(self):
+        """Test that a missing manifest is fatal only when required."""
+        storage = self.storage()
+        self.assertEqual(storage.preload(), 0)
+        self.assertEqual(storage.url("css/main.css"), "/static/css/main.css")
+        with override_settings(STATIC_MANIFEST_REQUIRED=True):
+            with self.assertRaises(ImproperlyConfigured):
+                storage.preload()
+
+    def test_collectstatic_and_template(self):
+        """Test that {% static %} renders collectstatic's hashed names."""
+        with override_settings(STATIC_ROOT=self.root):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            self.assertEqual(static.preload(), len(staticfiles_storage.hashed_files))
+            hashed = staticfiles_storage.hashed_files["css/main.css"]
+            self.assertNotEqual(hashed, "css/main.css")
+            html = Template("{% load static %}{% static 'css/main.css' %}").render(
+                Context()
+            )
+        self.assertEqual(html, f"/static/{hashed}")
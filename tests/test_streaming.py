@@ -0,0 +1,138 @@
+"""
+Tests for streamed template rendering.
+"""
+
+from django.contrib.auth.models import User
+from django.shortcuts import render
+from django.template import engines
+from django.test import AsyncRequestFactory, RequestFactory, TestCase, override_settings
+from django.urls import path, reverse
+
+from asgiref.sync import async_to_sync
+
+from app import request_cache, streaming
+
+
+class Probe:
+    """A template variable recording when it is rendered."""
+
+    def __init__(self):
+        self.rendered = False
+
+    def __str__(self):
+        self.rendered = True
+        return "probe"
+
+
+class UserProbe:
+    """A template variable reading the user, as ``{{ user.username }}`` does."""
+
+    def __init__(self, request):
+        self.request = request
+
+    def __str__(self):
+        return f"Hello {self.request.user.username}"
+
+
+def personal(request):
+    return streaming.render(
+        request, "home.html", {"PROJECT_DESCRIPTION": UserProbe(request)}
+    )
+
+
+urlpatterns = [path("personal/", personal, name="personal")]
+
+
+class StreamingRenderTestCase(TestCase):
+    """Test chunking, equivalence with render() and both server interfaces."""
+
+    def setUp(self):
+        self.template = engines["django"].from_string(
+            '{% extends "base/base.html" %}'
+            "{% block title %}Probe - {{ block.super }}{% endblock %}"
+            "{% block content %}{{ probe }}{% endblock %}"
+        )
+
+    def test_head_flushed_before_content(self):
+        """Test that the <head> is produced before the content renders."""
+        probe = Probe()
+        chunks = streaming.render_chunks(
+            self.template, {"probe": probe}, RequestFactory().get("/")
+        )
+        head = next(chunks)
+        self.assertIn("<title>Probe - My App</title>", head)
+        self.assertIn('<link rel="stylesheet" href="/static/css/main.css">', head)
+        self.assertTrue(head.rstrip().endswith("</head>"))
+        self.assertFalse(probe.rendered)
+        rest = list(chunks)
+        self.assertEqual(len(rest), 2)
+        self.assertTrue(probe.rendered)
+        self.assertIn("probe", rest[-1])
+
+    def test_same_output_as_render(self):
+        """Test that the streamed page is byte for byte the regular one."""
+        request = RequestFactory().get("/")
+        context = {"page_title": "Home"}
+        regular = render(request, "home.html", context)
+        streamed = streaming.render(request, "home.html", context, stream=True)
+        self.assertTrue(streamed.streaming)
+        self.assertEqual(streamed.getvalue(), regular.content)
+
+    def test_asgi_streams_asynchronously(self):
+        """Test that ASGI requests get an async iterator, chunk by chunk."""
+        request = AsyncRequestFactory().get("/")
+        response = streaming.render(request, "home.html", stream=True)
+        self.assertTrue(response.is_async)
+
+        async def consume():
+            return [chunk async for chunk in response]
+
+        chunks = async_to_sync(consume)()
+        self.assertEqual(len(chunks), 3)
+        self.assertIn(b"Welcome to", b"".join(chunks))
+
+    @override_settings(STREAMING_RENDER=True)
+    def test_home_streamed(self):
+        """Test that the home page is streamed when STREAMING_RENDER is on."""
+        response = self.client.get(reverse("home"))
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["X-Accel-Buffering"], "no")
+        self.assertContains(response, "Welcome to My-App")
+
+    def test_chunks_render_in_request_context(self):
+        """Test that chunks see the request's scope after the view returned."""
+
+        class ScopeProbe:
+            def __str__(self):
+                return f"scope active: {request_cache.active()}"
+
+        with request_cache.request_scope():
+            response = streaming.render(
+                RequestFactory().get("/"),
+                "home.html",
+                {"PROJECT_DESCRIPTION": ScopeProbe()},
+                stream=True,
+            )
+        self.assertIn(b"scope active: True", response.getvalue())
+
+    @override_settings(
+        STREAMING_RENDER=True,
+        ROOT_URLCONF=__name__,
+        CACHE_POLICIES={"personal": {"max_age": 60, "tags": ["pages"]}},
+    )
+    def test_streamed_page_reading_user_is_private(self):
+        """Test that streamed pages are not shared unless the view says so."""
+        self.client.force_login(User.objects.create_user("streamer"))
+        response = self.client.get("/personal/")
+        self.assertTrue(response.streaming)
+        self.assertIn(b"Hello streamer", response.getvalue())
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+        self.assertIn("Cookie", response["Vary"])
+        self.assertFalse(response.has_header("Cache-Tag"))
+
+    @override_settings(STREAMING_RENDER=True)
+    def test_shared_streamed_page_keeps_policy(self):
+        """Test that the home page, declared shared, stays publicly cacheable."""
+        response = self.client.get(reverse("home"))
+        self.assertTrue(response["Cache-Control"].startswith("public"))
+        self.assertNotIn("Cookie", response.get("Vary", ""))
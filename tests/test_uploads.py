@@ -0,0 +1,191 @@
+"""
+Tests for streaming and resumable uploads.
+"""
+
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from app import images, uploads
+
+OCTET_STREAM = "application/offset+octet-stream"
+
+
+class UploadTestCase(TestCase):
+    """Test the multipart handler and the resumable upload protocol."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        media = Path(self.tmpdir.name)
+        override = override_settings(
+            MEDIA_ROOT=media, UPLOAD_ROOT=media / "uploads", UPLOAD_CHUNK_SIZE=4
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+        user = User.objects.create_user("uploader", password="secret")
+        self.client.force_login(user)
+
+    def create(self, content, **extra):
+        payload = {"filename": "../report.txt", "size": len(content), **extra}
+        return self.client.post(
+            reverse("upload-create"), payload, content_type="application/json"
+        )
+
+    def patch(self, location, chunk, offset):
+        return self.client.patch(
+            location,
+            chunk,
+            content_type=OCTET_STREAM,
+            headers={"Upload-Offset": offset},
+        )
+
+    def test_multipart_upload_streams_to_final_path(self):
+        """Test that files land in UPLOAD_ROOT with their checksum."""
+        content = b"hello streaming world"
+        response = self.client.post(
+            reverse("upload-file"),
+            {"document": SimpleUploadedFile("notes.txt", content)},
+        )
+
+        self.assertEqual(response.status_code, 201)
+        stored = response.json()["files"][0]
+        self.assertEqual(stored["sha256"], hashlib.sha256(content).hexdigest())
+        self.assertTrue(stored["url"].startswith("/media/uploads/"))
+        path = Path(self.tmpdir.name) / stored["url"].removeprefix("/media/")
+        self.assertEqual(path.read_bytes(), content)
+        self.assertEqual(list(uploads.PartialUpload.directory().iterdir()), [])
+
+    @unittest.skipUnless(images.pillow_available(), "Pillow is not installed")
+    @override_settings(IMAGE_PREGENERATE_ON_UPLOAD=True, IMAGE_WORKERS=0)
+    def test_multipart_upload_of_unreadable_image(self):
+        """Test that an image upload Pillow can't read is stored, not a 500."""
+        with self.assertLogs("app.images", "WARNING"):
+            response = self.client.post(
+                reverse("upload-file"),
+                {"document": SimpleUploadedFile("notes.jpg", b"plain text")},
+            )
+
+        self.assertEqual(response.status_code, 201)
+
+    def test_multipart_upload_size_limit(self):
+        """Test that oversized bodies are rejected before they are read."""
+        with override_settings(UPLOAD_MAX_SIZE=10):
+            response = self.client.post(
+                reverse("upload-file"),
+                {"document": SimpleUploadedFile("big.bin", b"x" * 100)},
+            )
+
+        self.assertEqual(response.status_code, 413)
+
+    def csrf_client(self, token="a" * 32, login=True):
+        client = Client(enforce_csrf_checks=True)
+        client.cookies[settings.CSRF_COOKIE_NAME] = "a" * 32
+        if login:
+            client.force_login(User.objects.get(username="uploader"))
+        return client, {"X-CSRFToken": token} if token else {}
+
+    def stored_files(self):
+        return [path for path in Path(self.tmpdir.name).rglob("*") if path.is_file()]
+
+    def test_multipart_upload_with_csrf_header(self):
+        """Test that uploads pass CSRF checks with the token in the header."""
+        client, headers = self.csrf_client()
+        response = client.post(
+            reverse("upload-file"),
+            {"document": SimpleUploadedFile("notes.txt", b"hello")},
+            headers=headers,
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(self.stored_files()), 1)
+
+    def test_multipart_upload_rejected_before_storing(self):
+        """Test that anonymous and forged uploads leave nothing on disk."""
+
+        def post(client, headers):
+            return client.post(
+                reverse("upload-file"),
+                {"document": SimpleUploadedFile("page.html", b"<h1>hi</h1>")},
+                headers=headers,
+            )
+
+        self.assertEqual(post(*self.csrf_client(login=False)).status_code, 403)
+        for token in (None, "b" * 32):
+            with self.assertLogs("django.security.csrf", "WARNING"):
+                response = post(*self.csrf_client(token=token))
+            self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_multipart_upload_size_limit_with_csrf(self):
+        """Test that oversized bodies get a 413 with CSRF checks enforced."""
+        client, headers = self.csrf_client()
+        with override_settings(UPLOAD_MAX_SIZE=10):
+            response = client.post(
+                reverse("upload-file"),
+                {"document": SimpleUploadedFile("big.bin", b"x" * 100)},
+                headers=headers,
+            )
+
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(self.stored_files(), [])
+
+    def test_discard_removes_stored_files(self):
+        """Test that a failed request's finished files are deleted."""
+        handler = uploads.StreamingUploadHandler()
+        handler.new_file("document", "notes.txt", "text/plain", None)
+        handler.receive_data_chunk(b"hello", 0)
+        handler.file_complete(5)
+        handler.new_file("other", "more.txt", "text/plain", None)
+        handler.receive_data_chunk(b"partial", 0)
+        self.assertEqual(len(self.stored_files()), 3)
+
+        handler.discard()
+        self.assertEqual(self.stored_files(), [])
+
+    def test_resumable_upload(self):
+        """Test that an upload can be resumed from the reported offset."""
+        content = b"0123456789abcdef"
+        response = self.create(content, sha256=hashlib.sha256(content).hexdigest())
+        self.assertEqual(response.status_code, 201)
+        location = response["Location"]
+
+        self.assertEqual(self.patch(location, content[:6], 0).status_code, 204)
+        self.assertEqual(self.patch(location, content[6:], 3).status_code, 409)
+
+        # Another worker resumes without the running hash.
+        uploads._hashers.clear()
+        response = self.client.head(location)
+        self.assertEqual(response["Upload-Offset"], "6")
+        self.assertEqual(response["Upload-Length"], str(len(content)))
+
+        response = self.patch(location, content[6:], 6)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["name"], "report.txt")
+        self.assertEqual(response.json()["sha256"], hashlib.sha256(content).hexdigest())
+        self.assertEqual(self.client.head(location).status_code, 404)
+
+    def test_resumable_upload_rejects_bad_chunks(self):
+        """Test size and checksum enforcement."""
+        location = self.create(b"abcd", sha256="0" * 64)["Location"]
+
+        self.assertEqual(self.patch(location, b"abcdef", 0).status_code, 413)
+        self.assertEqual(self.patch(location, b"abcd", 0).status_code, 400)
+        self.assertFalse(any(uploads.PartialUpload.directory().iterdir()))
+
+        with override_settings(UPLOAD_MAX_SIZE=3):
+            self.assertEqual(self.create(b"abcd").status_code, 413)
+
+    def test_uploads_require_login(self):
+        """Test that anonymous clients cannot upload."""
+        self.client.logout()
+
+        self.assertEqual(self.create(b"abcd").status_code, 403)
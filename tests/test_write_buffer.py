@@ -0,0 +1,116 @@
+"""
+Tests for the write-behind buffer.
+"""
+
+import datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from app import write_buffer
+from app.models import MaterializedAggregate
+
+
+class WriteBufferTestCase(TestCase):
+    """Test coalescing, batched flushes and failure handling."""
+
+    def setUp(self):
+        self.buffer = write_buffer.WriteBuffer(flush_interval=60, batch_size=2)
+        self.counters = [
+            MaterializedAggregate.objects.create(name="hits", group=str(i))
+            for i in range(3)
+        ]
+
+    def test_increments_are_coalesced(self):
+        """Test that many increments become one UPDATE per batch."""
+        for counter in self.counters:
+            for _ in range(5):
+                self.buffer.increment(MaterializedAggregate, counter.pk, "value")
+        self.buffer.increment(MaterializedAggregate, self.counters[0].pk, "value", 10)
+        self.assertEqual(self.buffer.pending, 16)
+
+        # Savepoint, two batched UPDATEs, release.
+        with self.assertNumQueries(4):
+            self.assertEqual(self.buffer.flush(), 3)
+
+        values = MaterializedAggregate.objects.order_by("pk").values_list(
+            "value", flat=True
+        )
+        self.assertEqual(list(values), [Decimal(15), Decimal(5), Decimal(5)])
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_updates_and_upserts(self):
+        """Test that the last update wins and upserts insert or overwrite."""
+        user = User.objects.create(username="ada")
+        first = datetime.datetime(2025, 1, 1, tzinfo=datetime.UTC)
+        self.buffer.update(User, user.pk, last_login=first)
+        self.buffer.update(User, user.pk, last_login=first.replace(day=2))
+        key = ["name", "group"]
+        self.buffer.upsert(MaterializedAggregate, key, name="hits", group="0", value=7)
+        self.buffer.upsert(MaterializedAggregate, key, name="hits", group="9", value=1)
+
+        self.buffer.flush()
+
+        user.refresh_from_db()
+        self.assertEqual(user.last_login.day, 2)
+        self.assertEqual(
+            dict(
+                MaterializedAggregate.objects.filter(group__in=["0", "9"]).values_list(
+                    "group", "value"
+                )
+            ),
+            {"0": Decimal(7), "9": Decimal(1)},
+        )
+
+    def test_failed_flush_keeps_writes(self):
+        """Test that writes survive a failed flush and merge with newer ones."""
+        self.buffer.increment(MaterializedAggregate, self.counters[0].pk, "value", 2)
+        self.buffer.increment(MaterializedAggregate, self.counters[0].pk, "missing")
+
+        with self.assertRaises(Exception):
+            self.buffer.flush()
+
+        self.buffer.increments.pop((MaterializedAggregate, "missing"))
+        self.buffer.increment(MaterializedAggregate, self.counters[0].pk, "value")
+        self.buffer.flush()
+        self.counters[0].refresh_from_db()
+        self.assertEqual(self.counters[0].value, 3)
+
+    def test_cache_backend_shares_increments(self):
+        """Test that one worker flushes increments recorded by another."""
+        self.addCleanup(cache.clear)
+        pk = self.counters[1].pk
+        worker_a = write_buffer.CacheWriteBuffer(flush_interval=60)
+        worker_b = write_buffer.CacheWriteBuffer(flush_interval=60)
+        worker_a.increment(MaterializedAggregate, pk, "value", 2)
+        worker_b.increment(MaterializedAggregate, pk, "value", 3)
+
+        worker_a.flush()
+        worker_b.flush()
+
+        self.counters[1].refresh_from_db()
+        self.assertEqual(self.counters[1].value, 5)
+
+    def test_cache_backend_concurrent_flushes_count_once(self):
+        """Test that two workers flushing one key don't both count its hits."""
+        self.addCleanup(cache.clear)
+        pk = self.counters[1].pk
+        key = f"write_buffer:app.materializedaggregate:value:{pk}"
+        worker_a = write_buffer.CacheWriteBuffer(flush_interval=60)
+        worker_b = write_buffer.CacheWriteBuffer(flush_interval=60)
+        worker_a.increment(MaterializedAggregate, pk, "value", 4)
+        worker_b.increment(MaterializedAggregate, pk, "value", 0)
+
+        # Both workers read 4 before either subtracts it.
+        snapshot = cache.get_many([key])
+        with patch.object(worker_a.cache, "get_many", lambda keys: snapshot):
+            taken = [worker.take()[0] for worker in (worker_a, worker_b)]
+
+        counted = [
+            increments[MaterializedAggregate, "value"][pk] for increments in taken
+        ]
+        self.assertEqual(sorted(counted), [0, 4])
+        self.assertEqual(cache.get(key), 0)